@@ -0,0 +1,39 @@
+"""
+Django admin registrations for the CMS app
+"""
+
+from django.contrib import admin
+
+from .models import SlowQuery, WebhookEndpoint
+
+
+@admin.register(WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    list_display = ('name', 'url', 'is_active', 'cursor', 'consecutive_failures', 'last_success_at')
+    list_filter = ('is_active',)
+    readonly_fields = ('consecutive_failures', 'last_success_at', 'last_error')
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'duration', 'method', 'url_name', 'path')
+    list_filter = ('method', 'created_at')
+    search_fields = ('url_name', 'path', 'sql', 'stack')
+    date_hierarchy = 'created_at'
+    readonly_fields = ('created_at', 'duration', 'method', 'path', 'url_name', 'sql', 'params', 'explain', 'stack')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    # The SQL and plans show data of other users: superusers only
+    def has_module_permission(self, request):
+        return request.user.is_superuser
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_superuser
@@ -6,102 +6,381 @@ Provides RESTful API endpoints for headless CMS
 from wagtail.api.v2.views import PagesAPIViewSet
 from wagtail.api.v2.router import WagtailAPIRouter
 from wagtail.images.api.v2.views import ImagesAPIViewSet
+from wagtail.images.api.v2.serializers import ImageSerializer
 from wagtail.documents.api.v2.views import DocumentsAPIViewSet
+from wagtail.documents.api.v2.serializers import DocumentSerializer
+from rest_framework import serializers
+from rest_framework.generics import ListAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from datetime import date
+
+from django.apps import apps
+from django.utils import translation
 from django.views.decorators.cache import never_cache
 from django.utils.decorators import method_decorator
-from .models import SiteSettings
-from wagtail.models import Site
+from .models import EventIndexEntry, RuleIndexEntry, PageRepresentation
+from .cache import patch_swr_headers, single_flight
+from .changes import get_changes
+from .locales import get_default_language, get_request_language, normalize_language, patch_language_headers
+from .navigation import get_navigation
+from .representations import materialize_page, resolve_hosts
+from .site_settings import get_site_settings
+from .sites import get_site
+from .serializers import (
+    image_representation, ImagePlaceholderField,
+    MediaImageDownloadUrlField, MediaDocumentDownloadUrlField,
+)
+from wagtail.models import Page
 
 
-@method_decorator(never_cache, name='dispatch')
 class SiteSettingsAPIView(APIView):
     """
-    API endpoint for Site Settings
+    API endpoint for the Site Settings of the site serving the request
+    """
+    
+    def get(self, request):
+        site = get_site(request)
+        if site is None:
+            return Response({'error': 'No site is configured for this host'}, status=404)
+        
+        # Changes purge the CDN (see cms_app.purge), so downstream caches may keep it
+        response = Response(get_site_settings(site, request))
+        # Not translated: written in the default language, whatever LocaleMiddleware activated
+        response['Content-Language'] = get_default_language()
+        patch_swr_headers(response)
+        return response
+
+
+class NavigationAPIView(APIView):
+    """
+    Navigation tree of the current site: the settings navigation items and the
+    "show in menus" pages, in display order, in the request language. Cached
+    until the next publish.
+    """
+    
+    def get(self, request):
+        site = get_site(request)
+        if site is None:
+            return Response({'error': 'No site is configured for this host'}, status=404)
+        language = get_request_language(request)
+        response = Response(get_navigation(site, language))
+        patch_language_headers(response, language)
+        patch_swr_headers(response)
+        return response
+
+
+@method_decorator(never_cache, name='dispatch')
+class ChangesAPIView(APIView):
+    """
+    Changes feed for incremental sync of pages, settings, images and documents
+
+    Query parameters: since (cursor from the previous response, 0 for all), limit
+    """
+    max_limit = 1000
+    
+    def get(self, request):
+        try:
+            since = max(int(request.GET.get('since', 0)), 0)
+            limit = min(max(int(request.GET.get('limit', 500)), 1), self.max_limit)
+        except ValueError:
+            return Response({'error': 'since and limit must be integers'}, status=400)
+        
+        changes, cursor, has_more = get_changes(since, limit, site=get_site(request))
+        return Response({
+            'cursor': cursor,
+            'has_more': has_more,
+            'changes': changes,
+        })
+
+
+class PageSearchAPIView(APIView):
+    """
+    Full-text search over published pages, including StreamField content,
+    ranked by relevance
+
+    Query parameters: q (required), type (e.g. cms_app.EventsPage), limit, offset
     """
+    max_limit = 50
     
     def get(self, request):
-        # Get the default site
+        query = request.GET.get('q', '').strip()
+        if not query:
+            return Response({'error': 'Missing search query (q)'}, status=400)
+        
         try:
-            site = Site.objects.get(is_default_site=True)
-            settings = SiteSettings.for_site(site)
-            
-            # Serialize StreamField blocks manually
-            def serialize_streamfield(stream):
-                """Convert StreamField to serializable format"""
-                if not stream:
-                    return []
-                
-                def serialize_value(value):
-                    """Recursively serialize values, handling Image objects"""
-                    if hasattr(value, 'file'):  # It's an Image object
-                        return {
-                            'id': value.id,
-                            'title': value.title,
-                            'original': request.build_absolute_uri(value.file.url),
-                            'width': value.width,
-                            'height': value.height,
-                            'thumbnail': request.build_absolute_uri(value.get_rendition('max-500x500').url) if value else None,
-                            'large': request.build_absolute_uri(value.get_rendition('max-1920x1080').url) if value else None,
-                        }
-                    elif isinstance(value, dict):
-                        return {k: serialize_value(v) for k, v in value.items()}
-                    elif isinstance(value, (list, tuple)):
-                        return [serialize_value(item) for item in value]
-                    else:
-                        return value
-                
-                return [
-                    {
-                        'type': block.block_type,
-                        'value': serialize_value(block.value),
-                        'id': str(block.id) if hasattr(block, 'id') else None,
-                    }
-                    for block in stream
-                ]
-            
-            # Serialize the settings
-            data = {
-                'site_name': settings.site_name,
-                'site_tagline': settings.site_tagline,
-                'site_description': settings.site_description,
-                'site_logo': {
-                    'id': settings.site_logo.id,
-                    'title': settings.site_logo.title,
-                    'original': request.build_absolute_uri(settings.site_logo.file.url),
-                    'width': settings.site_logo.width,
-                    'height': settings.site_logo.height,
-                    'thumbnail': request.build_absolute_uri(settings.site_logo.get_rendition('max-500x500').url),
-                    'large': request.build_absolute_uri(settings.site_logo.get_rendition('max-1920x1080').url),
-                } if settings.site_logo else None,
-                'contact_info': serialize_streamfield(settings.contact_info),
-                'sponsors': serialize_streamfield(settings.sponsors),
-                'organizers': serialize_streamfield(settings.organizers),
-                'social_links': serialize_streamfield(settings.social_links),
-                'copyright_text': settings.copyright_text,
-                'footer_about_text': settings.footer_about_text,
-                'navigation_items': serialize_streamfield(settings.navigation_items),
-                'show_login_button': settings.show_login_button,
-                'login_button_text': settings.login_button_text,
-                'login_url': settings.login_url,
+            limit = min(max(int(request.GET.get('limit', 20)), 1), self.max_limit)
+            offset = max(int(request.GET.get('offset', 0)), 0)
+        except ValueError:
+            return Response({'error': 'limit and offset must be integers'}, status=400)
+        
+        pages = Page.objects.live().public()
+        site = get_site(request)
+        if site:
+            pages = pages.in_site(site)
+        
+        page_type = request.GET.get('type')
+        if page_type:
+            try:
+                model = apps.get_model(page_type)
+            except (LookupError, ValueError):
+                return Response({'error': f'Unknown page type: {page_type}'}, status=400)
+            pages = pages.type(model)
+        
+        # Results come back ordered by relevance
+        results = pages.search(query)
+        items = [
+            {
+                'id': page.id,
+                'title': page.title,
+                'type': f'{page.specific_class._meta.app_label}.{page.specific_class.__name__}',
+                'url': page.get_url(request),
+                'search_description': page.search_description,
             }
-            
-            # Create response with no-cache headers
-            response = Response(data)
-            response['Cache-Control'] = 'no-cache, no-store, must-revalidate, max-age=0'
-            response['Pragma'] = 'no-cache'
-            response['Expires'] = '0'
-            return response
-        except Site.DoesNotExist:
-            return Response({'error': 'Default site not found'}, status=404)
+            for page in results[offset:offset + limit]
+        ]
+        
+        return Response({
+            'query': query,
+            'total_count': results.count(),
+            'items': items,
+        })
+
+
+class EventSerializer(serializers.ModelSerializer):
+    image = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = EventIndexEntry
+        fields = [
+            'id', 'page', 'source', 'title', 'date', 'time', 'date_text', 'time_text',
+            'location', 'status', 'participants', 'description', 'link', 'image',
+        ]
+    
+    def get_image(self, entry):
+        if entry.image is None:
+            return None
+        return image_representation(entry.image, self.context.get('request'))
+
+
+def get_page_id(params):
+    """The page_id query parameter as an integer, or None; a 400 response if it isn't one"""
+    if not params.get('page_id'):
+        return None
+    try:
+        return int(params['page_id'])
+    except ValueError:
+        raise serializers.ValidationError({'page_id': 'Expected an integer page ID'})
+
+
+class EventListAPIView(ListAPIView):
+    """
+    Published events from the event index, without touching page StreamFields
+
+    Query parameters:
+        from, to     date range (YYYY-MM-DD), inclusive
+        upcoming     "true" for events from today on
+        location     exact location
+        status       exact status (e.g. "Registration Open")
+        page_id      events of one page
+        ordering     date, -date, title or -title (default: date)
+        page         page number of the paginated results
+    """
+    serializer_class = EventSerializer
+    orderings = {
+        'date': ['date', 'time', 'position'],
+        '-date': ['-date', '-time', 'position'],
+        'title': ['title'],
+        '-title': ['-title'],
+    }
+    
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = EventIndexEntry.objects.select_related('image', 'image__arc_metadata')
+        
+        for param, lookup in [('from', 'date__gte'), ('to', 'date__lte')]:
+            if params.get(param):
+                try:
+                    queryset = queryset.filter(**{lookup: date.fromisoformat(params[param])})
+                except ValueError:
+                    raise serializers.ValidationError({param: 'Expected a date in YYYY-MM-DD format'})
+        
+        if params.get('upcoming') == 'true':
+            queryset = queryset.filter(date__gte=date.today())
+        if params.get('location'):
+            queryset = queryset.filter(location=params['location'])
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        page_id = get_page_id(params)
+        if page_id is not None:
+            queryset = queryset.filter(page_id=page_id)
+        
+        ordering = params.get('ordering', 'date')
+        if ordering not in self.orderings:
+            raise serializers.ValidationError({'ordering': f'Must be one of {", ".join(self.orderings)}'})
+        return queryset.order_by(*self.orderings[ordering])
+
+
+class RuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RuleIndexEntry
+        fields = ['id', 'page', 'source', 'category', 'rule_number', 'title', 'description']
+
+
+class RuleListAPIView(ListAPIView):
+    """
+    Published rules from the rules index
+
+    Query parameters:
+        category     category slug ("general" for the general rules)
+        source       rule_categories, general_rules or rules
+        page_id      rules of one page
+        page         page number of the paginated results
+    """
+    serializer_class = RuleSerializer
+    
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = RuleIndexEntry.objects.all()
+        for param, lookup in [('category', 'category'), ('source', 'source')]:
+            if params.get(param):
+                queryset = queryset.filter(**{lookup: params[param]})
+        page_id = get_page_id(params)
+        if page_id is not None:
+            queryset = queryset.filter(page_id=page_id)
+        return queryset.order_by('page_id', 'position')
+
+
+class RuleCategoryAPIView(APIView):
+    """
+    A single rule category with its rules
+
+    URL: /api/v2/rules/categories/<slug>/ (optional ?page_id= when several pages share a category)
+    """
+    
+    def get(self, request, category):
+        rules = RuleIndexEntry.objects.filter(category=category)
+        page_id = get_page_id(request.GET)
+        if page_id is not None:
+            rules = rules.filter(page_id=page_id)
+        
+        first = rules.order_by('page_id', 'position').first()
+        if first is None:
+            return Response({'error': f'Rule category "{category}" not found'}, status=404)
+        rules = rules.filter(page_id=first.page_id).order_by('position')
+        
+        return Response({
+            'category': first.category,
+            'title': first.category_title,
+            'description': first.category_description,
+            'icon_name': first.category_icon,
+            'page': first.page_id,
+            'rules': RuleSerializer(rules, many=True).data,
+        })
+
+
+class RuleDetailAPIView(APIView):
+    """
+    A single rule by rule number
+
+    URL: /api/v2/rules/<rule number>/ with optional ?category= (default: the
+    uncategorized rules blocks) and ?page_id=
+    """
+    
+    def get(self, request, rule_number):
+        rules = RuleIndexEntry.objects.filter(
+            rule_number=rule_number,
+            category=request.GET.get('category', ''),
+        )
+        page_id = get_page_id(request.GET)
+        if page_id is not None:
+            rules = rules.filter(page_id=page_id)
+        
+        rule = rules.order_by('page_id', 'position').first()
+        if rule is None:
+            return Response({'error': f'Rule "{rule_number}" not found'}, status=404)
+        return Response(RuleSerializer(rule).data)
+
+
+class ArcPagesAPIViewSet(PagesAPIViewSet):
+    """
+    Pages API serving the representation stored at publish time (see
+    cms_app.representations) for plain detail requests. Requests with query
+    parameters, or for pages without a stored representation, are serialized live.
+    Either way a page is serialized in the language of its locale.
+    """
+    
+    def initial(self, request, *args, **kwargs):
+        # Wagtail's own Site.find_for_request calls reuse the site cached on the request
+        get_site(request)
+        super().initial(request, *args, **kwargs)
+    
+    def detail_view(self, request, pk):
+        # The base queryset still decides whether the page may be served (live, public, in this site)
+        language_code = self.get_queryset().filter(pk=pk).values_list('locale__language_code', flat=True).first()
+        if language_code is None:
+            return super().detail_view(request, pk)
+        language = normalize_language(language_code) or language_code
+        
+        if not request.GET:
+            representation = self.get_stored_representation(pk)
+            if representation is None:
+                # Missing (e.g. before rebuild_projections): concurrent requests wait for
+                # one of them to store it instead of each serializing the page
+                representation = single_flight(
+                    f'cms_app:representation:{pk}',
+                    lambda: self.materialize(pk),
+                    lookup=lambda: self.get_stored_representation(pk),
+                )
+            if representation is not None:
+                response = Response(resolve_hosts(representation, request))
+                response['Content-Language'] = language
+                patch_swr_headers(response)
+                return response
+        
+        with translation.override(language_code):
+            response = super().detail_view(request, pk)
+        response['Content-Language'] = language
+        return response
+    
+    def get_stored_representation(self, pk):
+        return PageRepresentation.objects.filter(page_id=pk).values_list('data', flat=True).first()
+    
+    def materialize(self, pk):
+        materialize_page(Page.objects.get(pk=pk).specific)
+        return self.get_stored_representation(pk)
+
+
+class ArcImageSerializer(ImageSerializer):
+    download_url = MediaImageDownloadUrlField(read_only=True)
+    placeholder = ImagePlaceholderField(read_only=True)
+
+
+class ArcDocumentSerializer(DocumentSerializer):
+    download_url = MediaDocumentDownloadUrlField(read_only=True)
+
+
+class ArcImagesAPIViewSet(ImagesAPIViewSet):
+    """
+    Images API with CDN-aware URLs and the precomputed placeholder and dominant colour
+    """
+    base_serializer_class = ArcImageSerializer
+    body_fields = ImagesAPIViewSet.body_fields + ['placeholder']
+    listing_default_fields = ImagesAPIViewSet.listing_default_fields + ['placeholder']
+
+
+class ArcDocumentsAPIViewSet(DocumentsAPIViewSet):
+    """
+    Documents API with CDN-aware download URLs
+    """
+    base_serializer_class = ArcDocumentSerializer
 
 
 # Create the router
 api_router = WagtailAPIRouter('wagtailapi')
 
 # Register API endpoints
-api_router.register_endpoint('pages', PagesAPIViewSet)
-api_router.register_endpoint('images', ImagesAPIViewSet)
-api_router.register_endpoint('documents', DocumentsAPIViewSet)
+api_router.register_endpoint('pages', ArcPagesAPIViewSet)
+api_router.register_endpoint('images', ArcImagesAPIViewSet)
+api_router.register_endpoint('documents', ArcDocumentsAPIViewSet)
 
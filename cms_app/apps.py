@@ -6,3 +6,7 @@ class CmsAppConfig(AppConfig):
     name = 'cms_app'
     verbose_name = 'CMS Content'
 
+    def ready(self):
+        from .signals import register_signal_handlers
+
+        register_signal_handlers()
@@ -5,7 +5,8 @@ Custom StreamField blocks with proper API serialization
 from wagtail import blocks
 from wagtail.images.blocks import ImageChooserBlock
 from wagtail.documents.blocks import DocumentChooserBlock
-from wagtail.images.api.fields import ImageRenditionField
+
+from .serializers import image_representation
 
 
 class APIImageChooserBlock(ImageChooserBlock):
@@ -15,19 +16,7 @@ class APIImageChooserBlock(ImageChooserBlock):
         if value:
             # Get the request from context to build full URLs
             request = context.get('request') if context else None
-            base_url = ''
-            if request:
-                base_url = f"{request.scheme}://{request.get_host()}"
-            
-            return {
-                'id': value.id,
-                'title': value.title,
-                'original': base_url + value.file.url,
-                'width': value.width,
-                'height': value.height,
-                'thumbnail': base_url + value.get_rendition('max-500x500').url if value else None,
-                'large': base_url + value.get_rendition('max-1920x1080').url if value else None,
-            }
+            return image_representation(value, request)
         return None
 
 
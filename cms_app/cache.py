@@ -0,0 +1,318 @@
+"""
+Cached API payloads: single-flight builds and stale-while-revalidate
+
+When a cached payload is missing (after a change, an eviction or a restart),
+concurrent requests for it would all rebuild it, and all render the same
+missing renditions. single_flight() lets one request build it while the others
+wait for its result:
+
+- within a process, followers wait on the leader's thread event;
+- across uWSGI workers, the leader holds a shared lock (see acquire_lock()),
+  and the other workers poll the cache until the payload appears.
+
+Followers that wait longer than SINGLE_FLIGHT_WAIT seconds, or whose leader
+fails, build the payload themselves, so a stuck build never blocks requests
+for good.
+
+Shared locks are taken with cache.add() when the cache backend adds keys
+atomically (Redis, Memcached, the database), and expire after
+SINGLE_FLIGHT_LOCK_TIMEOUT in case their worker dies. The file and dummy
+backends check for the key and then write it, so two workers could both get
+the lock: with them, locks are fcntl.flock() locks on files in LOCK_DIR,
+shared by the workers of one host and released when their process exits.
+
+get_payload() stores payloads in envelopes with a freshness deadline
+(API_CACHE_TIMEOUT). Once an envelope has aged out, it is still served for up
+to API_CACHE_MAX_STALE seconds while a background thread rebuilds it, so no
+request waits for the rebuild. Past that it is not served any more and the
+request builds it (single-flight). Background threads need uWSGI's
+enable-threads option.
+
+A change to the content deletes the payloads it affects instead: the CDN
+purge and the change events make clients refetch right away, and they must
+get the new content, not a stale copy that downstream caches would keep again.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import close_old_connections
+from django.utils.cache import patch_cache_control
+
+log = logging.getLogger(__name__)
+
+LOCK_KEY = 'cms_app:lock:{key}'
+
+# How often (in seconds) a worker checks for a payload built by another worker
+POLL_INTERVAL = 0.05
+
+
+# ===================================================
+# Shared locks
+# ===================================================
+
+class _CacheLock:
+    def __init__(self, key):
+        self.key = key
+
+    def release(self):
+        cache.delete(self.key)
+
+
+class _FileLock:
+    def __init__(self, fd):
+        self.fd = fd
+
+    def release(self):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+
+
+def _uses_file_locks():
+    # Their add() is a has_key() followed by a set()
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], (FileBasedCache, DummyCache))
+
+
+def _lock_path(key):
+    os.makedirs(settings.LOCK_DIR, exist_ok=True)
+    return os.path.join(settings.LOCK_DIR, hashlib.sha1(key.encode()).hexdigest() + '.lock')
+
+
+def acquire_lock(key, timeout=None):
+    """
+    Take the lock named ``key`` for this worker without waiting; None if
+    another thread or worker holds it. Release the returned lock with
+    release(). ``timeout`` bounds how long a lock held in the cache survives
+    a dead worker.
+    """
+    if not _uses_file_locks():
+        if cache.add(key, 1, timeout=timeout or settings.SINGLE_FLIGHT_LOCK_TIMEOUT):
+            return _CacheLock(key)
+        return None
+
+    fd = os.open(_lock_path(key), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return _FileLock(fd)
+
+
+def is_locked(key):
+    if not _uses_file_locks():
+        return cache.get(key) is not None
+    lock = acquire_lock(key)
+    if lock is None:
+        return True
+    lock.release()
+    return False
+
+
+@contextmanager
+def locked(key):
+    """
+    Hold the lock named ``key`` for a short read-modify-write of a cache
+    entry, waiting up to SINGLE_FLIGHT_WAIT for it; past that the block runs
+    unlocked rather than failing the request.
+    """
+    deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT
+    lock = acquire_lock(key)
+    while lock is None and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        lock = acquire_lock(key)
+    if lock is None:
+        log.warning('Gave up waiting for lock %s', key)
+    try:
+        yield
+    finally:
+        if lock is not None:
+            lock.release()
+
+
+# ===================================================
+# Single flight
+# ===================================================
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.failed = False
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def single_flight(key, build, lookup=None):
+    """
+    Run ``build()`` once for concurrent callers with the same ``key`` and
+    return its result to all of them.
+
+    ``build`` computes the payload and stores it in the cache; ``lookup``
+    returns the stored payload or None. Without ``lookup`` only callers in the
+    same process are coalesced.
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        if flight.done.wait(settings.SINGLE_FLIGHT_WAIT) and not flight.failed:
+            return flight.value
+        return build()
+
+    try:
+        flight.value = _build_once(key, build, lookup)
+        return flight.value
+    except BaseException:
+        flight.failed = True
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
+
+
+def _build_once(key, build, lookup):
+    """Build unless another worker holds the lock, in which case wait for its result"""
+    if lookup is None:
+        return build()
+
+    lock_key = LOCK_KEY.format(key=key)
+    lock = acquire_lock(lock_key)
+    if lock is not None:
+        try:
+            # Stored by a leader that released the lock since our caller looked
+            value = lookup()
+            if value is not None:
+                return value
+            return build()
+        finally:
+            lock.release()
+
+    deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        value = lookup()
+        if value is not None:
+            return value
+        if not is_locked(lock_key):
+            # The other worker finished without storing a payload, or died
+            break
+    return build()
+
+
+# ===================================================
+# Stale-while-revalidate
+# ===================================================
+
+REFRESH_LOCK_KEY = 'cms_app:refresh:{key}'
+
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+_executor = None
+
+
+def is_envelope(value):
+    """False for missing entries and for payloads cached before they had envelopes"""
+    return isinstance(value, dict) and 'fresh_until' in value and 'stale_until' in value
+
+
+def make_envelope(value):
+    now = time.time()
+    return {
+        'value': value,
+        'fresh_until': now + settings.API_CACHE_TIMEOUT,
+        'stale_until': now + settings.API_CACHE_TIMEOUT + settings.API_CACHE_MAX_STALE,
+    }
+
+
+def envelope_timeout(envelope):
+    """Cache timeout dropping an envelope once it may no longer be served"""
+    return max(int(envelope['stale_until'] - time.time()) + 1, 1)
+
+
+def _fresh_value(envelope):
+    if is_envelope(envelope) and time.time() < envelope['fresh_until']:
+        return envelope['value']
+    return None
+
+
+def get_payload(key, build, load, store):
+    """
+    Return a cached payload, serving it stale while it is refreshed in the
+    background.
+
+    ``build()`` computes the payload, ``load()`` returns its stored envelope
+    (or None) and ``store(envelope)`` saves one.
+    """
+    def rebuild():
+        value = build()
+        store(make_envelope(value))
+        return value
+
+    envelope = load()
+    if is_envelope(envelope):
+        now = time.time()
+        if now < envelope['fresh_until']:
+            return envelope['value']
+        if now < envelope['stale_until']:
+            refresh_in_background(key, rebuild)
+            return envelope['value']
+
+    return single_flight(key, rebuild, lookup=lambda: _fresh_value(load()))
+
+
+def refresh_in_background(key, rebuild):
+    """Run ``rebuild`` in a worker thread, unless this or another process is already refreshing ``key``"""
+    global _executor
+
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.API_CACHE_REFRESH_WORKERS)
+
+    lock = acquire_lock(REFRESH_LOCK_KEY.format(key=key))
+    if lock is None:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+        return
+
+    def refresh():
+        try:
+            rebuild()
+        except Exception:
+            log.exception('Background refresh of %s failed', key)
+        finally:
+            lock.release()
+            with _refreshing_lock:
+                _refreshing.discard(key)
+            close_old_connections()
+
+    _executor.submit(refresh)
+
+
+def patch_swr_headers(response):
+    """Let downstream caches serve the response stale while they revalidate it"""
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.API_CACHE_MAX_AGE,
+        stale_while_revalidate=settings.API_CACHE_MAX_STALE,
+    )
@@ -0,0 +1,110 @@
+"""
+Change log behind the changes API (delta sync)
+
+Publish, unpublish and delete of pages, saves of site settings, and saves and
+deletes of images and documents are appended to ChangeLogEntry once their
+transaction commits. A client keeps the id of the last entry it has seen as
+its cursor, and asks for the changes after it.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+
+def record_change(object_type, object_id, action, site_id=None, url=''):
+    """Append a change once the current transaction commits"""
+    from .models import ChangeLogEntry
+
+    def write():
+        ChangeLogEntry.objects.create(
+            object_type=object_type,
+            object_id=object_id,
+            action=action,
+            site_id=site_id,
+            url=(url or '')[:500],
+        )
+
+    transaction.on_commit(write)
+
+
+def record_page_change(page, action):
+    record_changes([page_change(page, action)])
+
+
+def page_change(page, action):
+    site = page.get_site()
+    return ('page', page.pk, action, site.pk if site else None, page.get_url() or '')
+
+
+def published_action(page):
+    return 'created' if page.first_published_at == page.last_published_at else 'updated'
+
+
+def record_changes(changes):
+    """Append ``(object_type, object_id, action, site_id, url)`` changes in one query once the transaction commits"""
+    from .models import ChangeLogEntry
+
+    entries = [
+        ChangeLogEntry(object_type=object_type, object_id=object_id, action=action, site_id=site_id, url=(url or '')[:500])
+        for object_type, object_id, action, site_id, url in changes
+    ]
+    transaction.on_commit(lambda: ChangeLogEntry.objects.bulk_create(entries))
+
+
+def get_changes(cursor, limit, site=None):
+    """
+    Return ``(changes, next_cursor, has_more)`` for the entries after ``cursor``.
+
+    Only the latest change of each object within the batch is returned. Entries
+    younger than CHANGE_LOG_SETTLE_SECONDS are held back: ids are allocated
+    before commit, so a slightly older transaction could still add an entry
+    below the newest id.
+    """
+    from .models import ChangeLogEntry
+
+    settled = timezone.now() - timedelta(seconds=settings.CHANGE_LOG_SETTLE_SECONDS)
+    entries = ChangeLogEntry.objects.filter(id__gt=cursor, created_at__lte=settled).order_by('id')
+    if site is not None:
+        # Images and documents are shared between sites
+        entries = entries.filter(Q(site_id__isnull=True) | Q(site_id=site.pk))
+
+    batch = list(entries[:limit + 1])
+    has_more = len(batch) > limit
+    batch = batch[:limit]
+    if not batch:
+        return [], cursor, False
+
+    latest = {}
+    for entry in batch:
+        key = (entry.object_type, entry.object_id)
+        latest.pop(key, None)
+        latest[key] = entry
+
+    return [serialize_change(entry) for entry in latest.values()], batch[-1].id, has_more
+
+
+def serialize_change(entry):
+    return {
+        'cursor': entry.id,
+        'object_type': entry.object_type,
+        'object_id': entry.object_id,
+        'action': entry.action,
+        'url': entry.url or None,
+        'detail_url': get_detail_url(entry),
+        'timestamp': entry.created_at.isoformat(),
+    }
+
+
+def get_detail_url(entry):
+    """API URL to fetch the current state of a changed object from"""
+    if entry.action in ('deleted', 'unpublished'):
+        return None
+    if entry.object_type == 'settings':
+        return reverse('site-settings')
+    endpoint = {'page': 'pages', 'image': 'images', 'document': 'documents'}[entry.object_type]
+    return reverse(f'wagtailapi:{endpoint}:detail', args=[entry.object_id])
@@ -0,0 +1,199 @@
+"""
+Lazy-loading StreamField editor for pages with very large bodies
+
+The standard StreamField editor builds the form of every block when the page
+editor opens, which gets slow with a body as large as the HomePage's. With
+LazyStreamFieldPanel the body is shown as an outline of collapsed blocks, and a
+block's form is fetched from the server when the editor opens it. Blocks that
+were never opened are saved back unchanged from their stored JSON.
+
+Adding, removing and reordering blocks is done in the standard editor, which
+can be loaded on demand with the edits made so far.
+"""
+
+import json
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.forms import Media
+from django.forms.utils import ErrorList
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.html import format_html, strip_tags
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+from django.views.decorators.http import require_POST
+from wagtail.admin.panels import FieldPanel
+from wagtail.admin.staticfiles import versioned_static
+from wagtail.blocks import BlockWidget, ListBlock, StreamValue
+from wagtail.fields import StreamField
+
+
+def block_prefix(name, block_id):
+    """Form prefix of a lazily loaded block"""
+    return f'{name}-lazy-{block_id}'
+
+
+def block_summary(value):
+    """Short text preview of a block from its raw JSON value"""
+    texts = []
+
+    def collect(node):
+        if len(texts) >= 3:
+            return
+        if isinstance(node, str):
+            text = strip_tags(node).strip()
+            if text and not re.fullmatch(r'[0-9a-f-]{36}|#?[\w-]+', text):
+                texts.append(text)
+        elif isinstance(node, dict):
+            for key, child in node.items():
+                if key not in ('id', 'type'):
+                    collect(child)
+        elif isinstance(node, list):
+            for child in node:
+                collect(child)
+
+    collect(value)
+    return Truncator(' · '.join(texts)).chars(100)
+
+
+def render_block_form(block, prefix, value, error=None):
+    """Form of a single block, mounted by the admin's block controller"""
+    errors = ErrorList([error]) if error is not None else None
+    return BlockWidget(block).render_with_errors(prefix, value, errors=errors)
+
+
+class LazyStreamWidget(BlockWidget):
+    template_name = 'cms_app/widgets/lazy_stream_field.html'
+
+    def __init__(self, block_def, model_label, field_name, attrs=None):
+        super().__init__(block_def, attrs=attrs)
+        self.model_label = model_label
+        self.field_name = field_name
+
+    def render_with_errors(self, name, value, attrs=None, errors=None, renderer=None):
+        if not isinstance(value, StreamValue):
+            value = self.block_def.to_python(value or [])
+        raw = self.block_def.get_prep_value(value)
+
+        # Small bodies are cheap enough for the standard editor
+        if len(raw) < settings.LAZY_STREAMFIELD_MIN_BLOCKS:
+            return super().render_with_errors(name, value, attrs=attrs, errors=errors, renderer=renderer)
+
+        error = errors.as_data()[0] if errors else None
+        block_errors = getattr(error, 'block_errors', None) or {}
+        non_block_errors = getattr(error, 'non_block_errors', None) or []
+
+        blocks = []
+        loaded = []
+        for index, (item, child) in enumerate(zip(raw, value)):
+            block = {
+                'id': item['id'],
+                'label': child.block.label,
+                'summary': self.get_summary(child.block, item['value']),
+                'form': '',
+            }
+            # Blocks that failed validation are opened straight away with their errors
+            if index in block_errors:
+                block['form'] = render_block_form(
+                    child.block, block_prefix(name, item['id']), child.value, block_errors[index]
+                )
+                loaded.append(item['id'])
+            blocks.append(block)
+
+        return mark_safe(render_to_string(self.template_name, {
+            'name': name,
+            'url': reverse('cms_app_stream_block_form'),
+            'model_label': self.model_label,
+            'field_name': self.field_name,
+            'raw_json': json.dumps(raw, cls=DjangoJSONEncoder),
+            'loaded': ','.join(loaded),
+            'blocks': blocks,
+            'non_block_errors': [message for e in non_block_errors for message in e.messages],
+        }))
+
+    def get_summary(self, block, raw_value):
+        if isinstance(block, ListBlock):
+            count = len(raw_value or [])
+            return f'{count} item{"s" if count != 1 else ""}: {block_summary(raw_value)}'
+        return block_summary(raw_value)
+
+    def value_from_datadict(self, data, files, name):
+        if data.get(f'{name}-mode') != 'lazy':
+            return super().value_from_datadict(data, files, name)
+
+        raw = json.loads(data.get(f'{name}-raw') or '[]')
+        loaded = set(filter(None, data.get(f'{name}-loaded', '').split(',')))
+        children = []
+        for item in raw:
+            child_block = self.block_def.child_blocks.get(item.get('type'))
+            if child_block is None:
+                continue
+            if item.get('id') in loaded:
+                value = child_block.value_from_datadict(data, files, block_prefix(name, item['id']))
+            else:
+                value = child_block.to_python(item['value'])
+            children.append((item['type'], value, item.get('id')))
+        return StreamValue(self.block_def, children)
+
+    def value_omitted_from_data(self, data, files, name):
+        if data.get(f'{name}-mode') == 'lazy':
+            return False
+        return super().value_omitted_from_data(data, files, name)
+
+    @property
+    def media(self):
+        return super().media + Media(js=[versioned_static('cms_app/js/lazy-stream-field.js')])
+
+
+class LazyStreamFieldPanel(FieldPanel):
+    """FieldPanel for a StreamField that loads the forms of its blocks on demand"""
+
+    def get_form_options(self):
+        opts = super().get_form_options()
+        if not self.read_only:
+            opts['widgets'] = {
+                self.field_name: LazyStreamWidget(
+                    self.db_field.stream_block, self.model._meta.label, self.field_name
+                ),
+            }
+        return opts
+
+
+@require_POST
+def stream_block_form(request):
+    """
+    Render the form of one block (``block_id``) or the whole standard editor
+    for a lazily loaded StreamField, from the submitted page form data.
+    """
+    try:
+        model = apps.get_model(request.POST.get('model', ''))
+        field = model._meta.get_field(request.POST.get('field', ''))
+    except (LookupError, ValueError):
+        return HttpResponseBadRequest('Unknown model or field')
+    if not isinstance(field, StreamField):
+        return HttpResponseBadRequest('Not a StreamField')
+
+    stream_block = field.stream_block
+    name = request.POST.get('name') or field.name
+    block_id = request.POST.get('block_id')
+
+    if block_id:
+        raw = json.loads(request.POST.get(f'{name}-raw') or '[]')
+        item = next((item for item in raw if item.get('id') == block_id), None)
+        if item is None or item.get('type') not in stream_block.child_blocks:
+            return HttpResponseBadRequest('Unknown block')
+        child_block = stream_block.child_blocks[item['type']]
+        html = render_block_form(child_block, block_prefix(name, block_id), child_block.to_python(item['value']))
+    else:
+        widget = LazyStreamWidget(stream_block, model._meta.label, field.name)
+        value = widget.value_from_datadict(request.POST, request.FILES, name)
+        html = format_html(
+            '<input type="hidden" name="{}-mode" value="full">{}',
+            name,
+            BlockWidget(stream_block).render_with_errors(name, value),
+        )
+    return JsonResponse({'html': html})
@@ -0,0 +1,284 @@
+"""
+On-the-fly image serving with a persistent disk cache
+
+Serves any signed filter spec (e.g. ``width-800|format-webp``) for an image,
+picking AVIF or WebP from the request's Accept header when the spec doesn't
+name a format. Generated bytes are cached on disk, bounded by a size cap with
+least-recently-used eviction (run in a background thread), and concurrent
+requests for the same missing variant wait for a single Pillow run instead of
+each generating it.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.generic import View
+from PIL import features
+from wagtail.images import get_image_model
+from wagtail.images.exceptions import InvalidFilterSpecError
+from wagtail.images.models import Filter, SourceImageIOError
+from wagtail.images.utils import generate_signature, verify_signature
+
+log = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+    'jpg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'svg': 'image/svg+xml',
+}
+FORMAT_EXTENSIONS = {'jpeg': 'jpg'}
+
+# How often (in seconds) a process re-checks the total size of the cache
+EVICTION_INTERVAL = 60
+
+
+def dynamic_image_url(image, filter_spec):
+    """Signed URL of the dynamic image view for an image and filter spec"""
+    signature = generate_signature(image.id, filter_spec)
+    return reverse('dynamic-image', args=(signature, image.id, filter_spec))
+
+
+def negotiate_format(request, filter_spec):
+    """
+    Return the output format to add to ``filter_spec`` based on the Accept
+    header, or None when the spec already names one or no modern format is accepted.
+    """
+    if any(operation.startswith('format-') for operation in filter_spec.split('|')):
+        return None
+
+    accept = request.META.get('HTTP_ACCEPT', '')
+    if 'image/avif' in accept and features.check('avif'):
+        return 'avif'
+    if 'image/webp' in accept and features.check('webp'):
+        return 'webp'
+    return None
+
+
+class DiskImageCache:
+    """
+    Generated image variants stored as ``<root>/<image id>/<key>.<ext>``.
+
+    The modification time of a file records when it was last served, so the
+    least recently used variants are the first removed once the cache grows
+    past ``max_size`` bytes.
+    """
+
+    def __init__(self, root, max_size):
+        self.root = root
+        self.max_size = max_size
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._last_eviction = 0
+        self._evicting = False
+
+    def image_dir(self, image_id):
+        return os.path.join(self.root, str(image_id))
+
+    def find(self, image_id, key):
+        """Return the path of a cached variant, marking it as recently used"""
+        directory = self.image_dir(image_id)
+        for ext in CONTENT_TYPES:
+            path = os.path.join(directory, f'{key}.{ext}')
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                continue
+            return path
+        return None
+
+    def store(self, image_id, key, ext, data):
+        directory = self.image_dir(image_id)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{key}.{ext}')
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as fp:
+            fp.write(data)
+        os.replace(temp_path, path)
+        self.evict_if_needed()
+        return path
+
+    def lock(self, image_id, key):
+        """
+        Lock held while a variant is generated. A thread lock coalesces requests
+        within this process, and a file lock does the same across workers.
+        """
+        with self._locks_guard:
+            thread_lock = self._locks.setdefault((image_id, key), threading.Lock())
+        return _VariantLock(self, (image_id, key), thread_lock)
+
+    def clear_image(self, image_id):
+        shutil.rmtree(self.image_dir(image_id), ignore_errors=True)
+
+    def evict_if_needed(self):
+        """Start an eviction in a background thread, at most once per EVICTION_INTERVAL"""
+        with self._locks_guard:
+            now = time.monotonic()
+            if self._evicting or now - self._last_eviction < EVICTION_INTERVAL:
+                return
+            self._last_eviction = now
+            self._evicting = True
+        threading.Thread(target=self._evict_in_background, name='image-cache-eviction', daemon=True).start()
+
+    def _evict_in_background(self):
+        try:
+            self.evict()
+        except Exception:
+            log.exception('Dynamic image cache eviction failed')
+        finally:
+            self._evicting = False
+
+    def evict(self):
+        """Remove the least recently used variants until the cache is back under its size cap"""
+        files = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(('.tmp', '.lock')):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.max_size:
+            return
+
+        # Evict down to 90% of the cap so we don't evict again on the next write
+        target = self.max_size * 0.9
+        files.sort()
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            remove_unused_lock(os.path.splitext(path)[0] + '.lock')
+            total -= size
+        log.info('Dynamic image cache evicted down to %d bytes', total)
+
+
+def remove_unused_lock(path):
+    """Delete a variant's lock file, unless a worker holds it"""
+    try:
+        fd = os.open(path, os.O_WRONLY)
+    except FileNotFoundError:
+        return
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return
+    # Workers waiting on this file notice it's gone once they get the lock (see _VariantLock)
+    os.remove(path)
+    os.close(fd)
+
+
+class _VariantLock:
+    def __init__(self, cache, key, thread_lock):
+        self.cache = cache
+        self.key = key
+        self.thread_lock = thread_lock
+        self.lock_file = None
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        image_id, key = self.key
+        directory = self.cache.image_dir(image_id)
+        path = os.path.join(directory, f'{key}.lock')
+        while True:
+            os.makedirs(directory, exist_ok=True)
+            self.lock_file = open(path, 'w')
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+            # The file may have been removed while we waited: lock the one now at the path
+            try:
+                if os.stat(path).st_ino == os.fstat(self.lock_file.fileno()).st_ino:
+                    return self
+            except FileNotFoundError:
+                pass
+            self.lock_file.close()
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+        self.lock_file.close()
+        self.thread_lock.release()
+        with self.cache._locks_guard:
+            if not self.thread_lock.locked():
+                self.cache._locks.pop(self.key, None)
+
+
+_cache = None
+
+
+def get_image_cache():
+    global _cache
+    if _cache is None:
+        _cache = DiskImageCache(settings.DYNAMIC_IMAGE_CACHE_DIR, settings.DYNAMIC_IMAGE_CACHE_MAX_SIZE)
+    return _cache
+
+
+class DynamicImageView(View):
+    """
+    Serve an image variant for a signed filter spec.
+
+    URL: /dynamic-images/<signature>/<image id>/<filter spec>/
+    """
+
+    def get(self, request, signature, image_id, filter_spec):
+        if not verify_signature(signature.encode(), image_id, filter_spec):
+            raise PermissionDenied
+
+        output_format = negotiate_format(request, filter_spec)
+        effective_spec = f'{filter_spec}|format-{output_format}' if output_format else filter_spec
+        key = hashlib.sha1(effective_spec.encode()).hexdigest()
+
+        cache = get_image_cache()
+        path = cache.find(image_id, key)
+        if path is None:
+            with cache.lock(image_id, key):
+                # Another request may have generated it while we waited
+                path = cache.find(image_id, key)
+                if path is None:
+                    image = get_object_or_404(get_image_model(), id=image_id)
+                    try:
+                        path = self.generate(cache, image, key, filter_spec, effective_spec)
+                    except SourceImageIOError:
+                        return HttpResponse('Source image file not found', content_type='text/plain', status=410)
+                    except InvalidFilterSpecError:
+                        return HttpResponse(
+                            'Invalid filter spec: ' + filter_spec, content_type='text/plain', status=400
+                        )
+
+        ext = os.path.splitext(path)[1][1:]
+        response = FileResponse(open(path, 'rb'), content_type=CONTENT_TYPES[ext])
+        response['Content-Security-Policy'] = "default-src 'none'"
+        response['X-Content-Type-Options'] = 'nosniff'
+        patch_cache_control(response, public=True, max_age=settings.DYNAMIC_IMAGE_MAX_AGE)
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+    def generate(self, cache, image, key, filter_spec, effective_spec):
+        if image.is_svg():
+            # SVGs are never converted to a raster format
+            effective_spec = filter_spec
+        output = Filter(spec=effective_spec).run(image, BytesIO())
+        ext = FORMAT_EXTENSIONS.get(output.format_name, output.format_name)
+        return cache.store(image.id, key, ext, output.f.getvalue())
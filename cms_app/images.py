@@ -0,0 +1,111 @@
+"""
+Image placeholder (LQIP) and dominant colour helpers
+
+Placeholders are computed once per image file and stored in ImageMetadata,
+so API responses can include them without touching the original file.
+"""
+
+import base64
+import io
+import logging
+
+from PIL import Image as PILImage
+
+log = logging.getLogger(__name__)
+
+# Longest edge of the base64 micro-thumbnail, in pixels
+PLACEHOLDER_SIZE = 16
+# Size the image is reduced to before looking for its dominant colour
+DOMINANT_COLOR_SAMPLE_SIZE = 64
+
+
+def compute_placeholder(fp):
+    """
+    Compute the placeholder data for an open image file.
+
+    Returns a ``(placeholder, dominant_color)`` tuple where ``placeholder`` is a
+    ``data:`` URI of a tiny thumbnail and ``dominant_color`` is a ``#rrggbb`` string.
+    """
+    with PILImage.open(fp) as source:
+        source.draft('RGB', (DOMINANT_COLOR_SAMPLE_SIZE * 2, DOMINANT_COLOR_SAMPLE_SIZE * 2))
+        has_alpha = source.mode in ('RGBA', 'LA') or (source.mode == 'P' and 'transparency' in source.info)
+        sample = source.convert('RGBA' if has_alpha else 'RGB')
+
+    sample.thumbnail((DOMINANT_COLOR_SAMPLE_SIZE, DOMINANT_COLOR_SAMPLE_SIZE))
+
+    # Dominant colour: the most common entry of a small adaptive palette
+    palette_image = sample.convert('RGB').quantize(colors=5)
+    count, index = max(palette_image.getcolors())
+    palette = palette_image.getpalette()
+    red, green, blue = palette[index * 3:index * 3 + 3]
+    dominant_color = f'#{red:02x}{green:02x}{blue:02x}'
+
+    thumbnail = sample.copy()
+    thumbnail.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = io.BytesIO()
+    if has_alpha:
+        thumbnail.save(buffer, format='PNG', optimize=True)
+        mime_type = 'image/png'
+    else:
+        thumbnail.save(buffer, format='JPEG', quality=60, optimize=True)
+        mime_type = 'image/jpeg'
+    placeholder = f'data:{mime_type};base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+    return placeholder, dominant_color
+
+
+def update_image_metadata(image):
+    """
+    Compute and store the placeholder data for a Wagtail image.
+
+    Images that cannot be read (e.g. a missing source file) get an empty record,
+    so the work is not retried on every request. Returns None for SVG images.
+    """
+    from .models import ImageMetadata
+
+    if image.is_svg():
+        return None
+
+    try:
+        with image.open_file() as fp:
+            placeholder, dominant_color = compute_placeholder(fp)
+    except Exception:
+        log.warning('Could not compute placeholder for image %s', image.pk, exc_info=True)
+        placeholder, dominant_color = '', ''
+
+    metadata, _ = ImageMetadata.objects.update_or_create(
+        image=image,
+        defaults={
+            'placeholder': placeholder,
+            'dominant_color': dominant_color,
+            'source_hash': image.file_hash,
+        },
+    )
+    image.arc_metadata = metadata
+    return metadata
+
+
+def get_image_metadata(image):
+    """
+    Return the stored ImageMetadata for an image, computing it if it is missing
+    (images uploaded before placeholders existed) or out of date.
+    """
+    from .models import ImageMetadata
+
+    try:
+        metadata = image.arc_metadata
+    except ImageMetadata.DoesNotExist:
+        metadata = None
+
+    if metadata is None or (image.file_hash and metadata.source_hash != image.file_hash):
+        metadata = update_image_metadata(image)
+    return metadata
+
+
+def placeholder_fields(image):
+    """Return the placeholder fields included in every API image representation"""
+    metadata = get_image_metadata(image)
+    return {
+        'placeholder': (metadata.placeholder or None) if metadata else None,
+        'dominant_color': (metadata.dominant_color or None) if metadata else None,
+    }
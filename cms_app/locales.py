@@ -0,0 +1,80 @@
+"""
+Languages of API payloads
+
+Only payloads whose content differs by language are split by it:
+
+- the navigation is built from the translation of the site root into the
+  request language, cached per language, and its responses carry
+  Vary: Accept-Language and Content-Language. The language comes from the
+  Accept-Language header alone (not LocaleMiddleware's language cookie), so
+  the Vary header covers everything the response depends on;
+- a page is in the language of its locale whatever the request language, so
+  page responses carry that Content-Language and no Vary;
+- site settings have no translated fields: one payload, labelled with the
+  default language, serves every language.
+
+Translated pages are picked up once the language is one of Wagtail's content
+languages (WAGTAIL_CONTENT_LANGUAGES) and has a Locale; until then every
+language is served the default content.
+"""
+
+from django.conf import settings
+from django.utils import translation
+from django.utils.cache import patch_vary_headers
+from django.utils.translation.trans_real import parse_accept_lang_header
+
+
+def get_languages():
+    """Language codes payloads can be cached for"""
+    return [code for code, _ in settings.LANGUAGES]
+
+
+def normalize_language(language):
+    """
+    The LANGUAGES code for a language code, or None if it isn't supported.
+    Django reports active languages in lower case ('ar-sa' for 'ar-SA').
+    """
+    try:
+        language = translation.get_supported_language_variant(language)
+    except LookupError:
+        return None
+    codes = {code.lower(): code for code in get_languages()}
+    return codes.get(language.lower())
+
+
+def get_default_language():
+    return normalize_language(settings.LANGUAGE_CODE) or get_languages()[0]
+
+
+def get_request_language(request):
+    """The preferred language of the Accept-Language header of a request, as one of LANGUAGES"""
+    for language, _ in parse_accept_lang_header(request.headers.get('Accept-Language', '')):
+        if language != '*':
+            language = normalize_language(language)
+            if language:
+                return language
+    return get_default_language()
+
+
+def get_locale(language):
+    """The Wagtail Locale of a language, or None when there is no content in it"""
+    from wagtail.models import Locale
+
+    try:
+        return Locale.objects.get_for_language(language)
+    except (Locale.DoesNotExist, LookupError):
+        return None
+
+
+def localize_page(page, language):
+    """The translation of a page into a language, or the page itself"""
+    locale = get_locale(language)
+    if locale is None or locale.pk == page.locale_id:
+        return page
+    return page.get_translation_or_none(locale) or page
+
+
+def patch_language_headers(response, language):
+    """Headers of a response whose content depends on the Accept-Language of the request"""
+    patch_vary_headers(response, ('Accept-Language',))
+    response['Content-Language'] = language
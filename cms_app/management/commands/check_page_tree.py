@@ -0,0 +1,176 @@
+"""
+Management command to check the Wagtail page tree without locking it
+
+Unlike Page.fix_tree(), which scans and rewrites the whole table in one
+transaction, this walks the tree in path order in bounded chunks and only
+reports problems. With --repair each affected node is fixed in its own short
+transaction, after re-checking it against the current state of the table.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.functions import Length
+from wagtail.models import Page
+
+
+class Node:
+    __slots__ = ('id', 'path', 'depth', 'numchild', 'children')
+
+    def __init__(self, id, path, depth, numchild):
+        self.id = id
+        self.path = path
+        self.depth = depth
+        self.numchild = numchild
+        self.children = 0
+
+
+class Command(BaseCommand):
+    help = 'Check the page tree for path, depth and numchild problems in small chunks, optionally repairing them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Fix depth and numchild problems (default: report only)',
+        )
+        parser.add_argument(
+            '--root',
+            type=int,
+            help='ID of the page whose subtree is checked (default: the whole tree)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of pages read per query (default: 1000)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Seconds to pause between chunks, to spread the load on a live database (default: 0)',
+        )
+
+    def handle(self, *args, **options):
+        self.repair = options['repair']
+        self.steplen = Page.steplen
+        self.alphabet = set(Page.alphabet)
+        self.problems = {'path': 0, 'orphan': 0, 'depth': 0, 'numchild': 0}
+        self.repaired = 0
+
+        pages = Page.objects.all()
+        if options['root']:
+            try:
+                root = Page.objects.get(pk=options['root'])
+            except Page.DoesNotExist:
+                raise CommandError(f'Page {options["root"]} not found')
+            pages = pages.filter(path__startswith=root.path)
+            self.stdout.write(f'Checking the subtree of "{root.title}" ({root.path})...')
+        else:
+            self.stdout.write('Checking the page tree...')
+
+        # Ancestors of the current node, from the top of the walk down
+        stack = []
+        self.first_node = True
+        checked = 0
+        last_path = ''
+        while True:
+            chunk = list(
+                pages.filter(path__gt=last_path)
+                .order_by('path')
+                .values_list('id', 'path', 'depth', 'numchild')[:options['chunk_size']]
+            )
+            if not chunk:
+                break
+
+            for row in chunk:
+                self.check_node(Node(*row), stack)
+            checked += len(chunk)
+            last_path = chunk[-1][1]
+            self.stdout.write(f'  {checked} pages checked')
+
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        while stack:
+            self.check_numchild(stack.pop())
+
+        total = sum(self.problems.values())
+        self.stdout.write('')
+        for kind, count in self.problems.items():
+            if count:
+                self.stdout.write(f'  {kind}: {count}')
+
+        if not total:
+            self.stdout.write(self.style.SUCCESS(f'No problems found in {checked} pages'))
+        elif self.repair:
+            self.stdout.write(self.style.SUCCESS(f'Found {total} problems, repaired {self.repaired}'))
+            if self.repaired < total:
+                self.stdout.write(self.style.WARNING('Path and orphan problems need manual attention'))
+        else:
+            self.stdout.write(self.style.WARNING(f'Found {total} problems. Run with --repair to fix depth and numchild'))
+
+    # -------------------------------------------------------------------------
+    # Checks
+    # -------------------------------------------------------------------------
+
+    def check_node(self, node, stack):
+        if not node.path or len(node.path) % self.steplen or not set(node.path) <= self.alphabet:
+            self.report('path', node, f'invalid path "{node.path}"')
+            return
+
+        # Leaving the subtrees that don't contain this node
+        while stack and not node.path.startswith(stack[-1].path):
+            self.check_numchild(stack.pop())
+
+        # The first node is the top of the checked tree, its parent is outside the walk
+        parent_path = node.path[:-self.steplen]
+        if stack and stack[-1].path == parent_path:
+            stack[-1].children += 1
+        elif parent_path and not self.first_node:
+            self.report('orphan', node, f'parent path "{parent_path}" does not exist')
+        self.first_node = False
+
+        expected_depth = len(node.path) // self.steplen
+        if node.depth != expected_depth:
+            self.report('depth', node, f'depth is {node.depth}, expected {expected_depth}')
+            if self.repair:
+                self.repair_depth(node)
+
+        stack.append(node)
+
+    def check_numchild(self, node):
+        if node.numchild != node.children:
+            self.report('numchild', node, f'numchild is {node.numchild}, counted {node.children} children')
+            if self.repair:
+                self.repair_numchild(node)
+
+    def report(self, kind, node, message):
+        self.problems[kind] += 1
+        self.stdout.write(self.style.WARNING(f'  [{kind}] page {node.id} ({node.path}): {message}'))
+
+    # -------------------------------------------------------------------------
+    # Repairs
+    # -------------------------------------------------------------------------
+
+    def repair_depth(self, node):
+        with transaction.atomic():
+            updated = Page.objects.filter(pk=node.id, path=node.path).update(depth=len(node.path) // self.steplen)
+        self.repaired += updated
+
+    def repair_numchild(self, node):
+        # Recount inside the transaction, the tree may have changed since we read it
+        with transaction.atomic():
+            page = Page.objects.select_for_update().filter(pk=node.id, path=node.path).first()
+            if page is None:
+                return
+            numchild = (
+                Page.objects.filter(path__startswith=node.path)
+                .annotate(path_length=Length('path'))
+                .filter(path_length=len(node.path) + self.steplen)
+                .count()
+            )
+            Page.objects.filter(pk=node.id).update(numchild=numchild)
+        self.repaired += 1
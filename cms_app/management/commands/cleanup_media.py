@@ -0,0 +1,280 @@
+"""
+Management command to garbage collect unused renditions and media files
+
+Works out which images no content references any more, and removes their
+renditions (and, once they are old enough, the images themselves). References
+are collected from the StreamFields, rich text and image foreign keys of every
+installed model (pages, snippets and settings of any app) and their revisions,
+and from Wagtail's reference index. Files under MEDIA_ROOT that no image or
+rendition row points at are removed too, unless they were written within the
+last --file-grace minutes (an upload in flight writes its file before its row
+is committed). Tables are walked in primary key order and MEDIA_ROOT with
+os.scandir, so memory use does not grow with the size of the media library.
+"""
+
+import os
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from wagtail.images import get_image_model
+from wagtail.models import ReferenceIndex, Revision
+
+from cms_app.models import ImageMetadata
+from cms_app.references import IMAGE, get_referencing_fields, iter_field_references
+
+
+class Command(BaseCommand):
+    help = 'Delete renditions and media files that are no longer referenced by any content'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be deleted and how many bytes would be reclaimed',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of rows read or deleted per query (default: 500)',
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=30,
+            help='Only delete unreferenced images uploaded at least this many days ago (default: 30)',
+        )
+        parser.add_argument(
+            '--file-grace',
+            type=int,
+            default=60,
+            help='Only delete orphaned files last modified at least this many minutes ago (default: 60)',
+        )
+        parser.add_argument(
+            '--keep-images',
+            action='store_true',
+            help='Delete renditions of unreferenced images but keep the original images',
+        )
+        parser.add_argument(
+            '--skip-revisions',
+            action='store_true',
+            help='Ignore references held only in page revisions (drafts and history)',
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.batch_size = options['batch_size']
+        self.verbosity = options['verbosity']
+        self.Image = get_image_model()
+        self.Rendition = self.Image.get_rendition_model()
+
+        if self.dry_run:
+            self.stdout.write(self.style.WARNING('Dry run - nothing will be deleted'))
+
+        self.stdout.write('Collecting image references...')
+        referenced = self.collect_referenced_images(include_revisions=not options['skip_revisions'])
+        self.stdout.write(f'  {len(referenced)} images are referenced by content')
+
+        total_bytes = 0
+
+        self.stdout.write('Removing renditions of unreferenced images...')
+        count, size = self.delete_renditions(referenced)
+        self.report('renditions', count, size)
+        total_bytes += size
+
+        if not options['keep_images']:
+            self.stdout.write('Removing unreferenced images...')
+            cutoff = timezone.now() - timedelta(days=options['min_age'])
+            count, size = self.delete_images(referenced, cutoff)
+            self.report('images', count, size)
+            total_bytes += size
+
+        self.stdout.write('Removing orphaned files from MEDIA_ROOT...')
+        count, size = self.delete_orphaned_files(time.time() - options['file_grace'] * 60)
+        self.report('orphaned files', count, size)
+        total_bytes += size
+
+        verb = 'Reclaimable' if self.dry_run else 'Reclaimed'
+        self.stdout.write(self.style.SUCCESS(f'\n{verb}: {self.format_bytes(total_bytes)}'))
+
+    # -------------------------------------------------------------------------
+    # Reference collection
+    # -------------------------------------------------------------------------
+
+    def get_content_models(self):
+        """Installed models that can reference images, apart from those holding data of the image itself"""
+        excluded = (self.Image, self.Rendition, ImageMetadata)
+        return [
+            model for model in apps.get_models()
+            if not model._meta.proxy and not issubclass(model, excluded) and get_referencing_fields(model)
+        ]
+
+    def iter_rows(self, queryset, fields):
+        """Walk a queryset in primary key order, one batch at a time"""
+        last_pk = None
+        while True:
+            batch = queryset.order_by('pk')
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            rows = list(batch.values('pk', *fields)[:self.batch_size])
+            if not rows:
+                return
+            yield from rows
+            last_pk = rows[-1]['pk']
+
+    def collect_referenced_images(self, include_revisions=True):
+        referenced = set()
+        content_models = self.get_content_models()
+
+        for model in content_models:
+            for row in self.iter_rows(model.objects.all(), get_referencing_fields(model)):
+                referenced.update(
+                    object_id for kind, object_id in iter_field_references(model, row) if kind == IMAGE
+                )
+
+        if include_revisions:
+            models_by_content_type = {
+                ContentType.objects.get_for_model(model).pk: model for model in content_models
+            }
+            revisions = Revision.objects.filter(content_type_id__in=models_by_content_type)
+            for row in self.iter_rows(revisions, ['content_type_id', 'content']):
+                model = models_by_content_type[row['content_type_id']]
+                referenced.update(
+                    object_id for kind, object_id in iter_field_references(model, row['content'] or {})
+                    if kind == IMAGE
+                )
+
+        # Anything else Wagtail knows to refer to an image, e.g. through a custom field
+        image_type = ContentType.objects.get_for_model(self.Image)
+        references = ReferenceIndex.objects.filter(to_content_type=image_type)
+        for row in self.iter_rows(references, ['to_object_id']):
+            if row['to_object_id'].isdigit():
+                referenced.add(int(row['to_object_id']))
+
+        return referenced
+
+    # -------------------------------------------------------------------------
+    # Deletion
+    # -------------------------------------------------------------------------
+
+    def delete_in_batches(self, queryset, get_size):
+        """Delete the rows of a queryset in batches, returning (count, bytes)"""
+        count = 0
+        size = 0
+        last_pk = None
+        while True:
+            batch = queryset.order_by('pk')
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            objects = list(batch[:self.batch_size])
+            if not objects:
+                return count, size
+
+            last_pk = objects[-1].pk
+            count += len(objects)
+            size += sum(get_size(obj) for obj in objects)
+
+            if not self.dry_run:
+                # Deleting through the ORM lets Wagtail's signal handlers
+                # remove the files from storage and purge the rendition cache
+                queryset.model.objects.filter(pk__in=[obj.pk for obj in objects]).delete()
+
+    def file_size(self, field_file):
+        try:
+            return field_file.size
+        except (OSError, ValueError):
+            return 0
+
+    def delete_renditions(self, referenced):
+        renditions = self.Rendition.objects.all()
+        if referenced:
+            renditions = renditions.exclude(image_id__in=referenced)
+        return self.delete_in_batches(renditions, lambda rendition: self.file_size(rendition.file))
+
+    def delete_images(self, referenced, cutoff):
+        images = self.Image.objects.filter(created_at__lt=cutoff)
+        if referenced:
+            images = images.exclude(pk__in=referenced)
+        return self.delete_in_batches(
+            images,
+            lambda image: image.file_size if image.file_size is not None else self.file_size(image.file),
+        )
+
+    def iter_media_files(self, directory):
+        """Yield (relative path, stat result) for every file below a MEDIA_ROOT directory"""
+        root = os.path.join(settings.MEDIA_ROOT, directory)
+        if not os.path.isdir(root):
+            return
+        stack = [root]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        relative = os.path.relpath(entry.path, settings.MEDIA_ROOT).replace(os.sep, '/')
+                        yield relative, entry.stat()
+
+    def delete_orphaned_files(self, modified_before):
+        count = 0
+        size = 0
+        directories = [
+            ('original_images', self.Image),
+            ('images', self.Rendition),
+        ]
+        for directory, model in directories:
+            batch = []
+            for name, stat in self.iter_media_files(directory):
+                if stat.st_mtime >= modified_before:
+                    # Possibly an upload whose row isn't committed yet
+                    continue
+                batch.append((name, stat.st_size))
+                if len(batch) >= self.batch_size:
+                    batch_count, batch_size = self.delete_orphaned_batch(model, batch)
+                    count += batch_count
+                    size += batch_size
+                    batch = []
+            if batch:
+                batch_count, batch_size = self.delete_orphaned_batch(model, batch)
+                count += batch_count
+                size += batch_size
+        return count, size
+
+    def delete_orphaned_batch(self, model, batch):
+        known = set(model.objects.filter(file__in=[name for name, _ in batch]).values_list('file', flat=True))
+        count = 0
+        size = 0
+        for name, file_size in batch:
+            if name in known:
+                continue
+            count += 1
+            size += file_size
+            if self.verbosity > 1:
+                self.stdout.write(f'  orphaned: {name}')
+            if not self.dry_run:
+                try:
+                    os.remove(os.path.join(settings.MEDIA_ROOT, name))
+                except FileNotFoundError:
+                    pass
+        return count, size
+
+    # -------------------------------------------------------------------------
+    # Reporting
+    # -------------------------------------------------------------------------
+
+    def report(self, label, count, size):
+        verb = 'would be deleted' if self.dry_run else 'deleted'
+        self.stdout.write(f'  {count} {label} {verb} ({self.format_bytes(size)})')
+
+    def format_bytes(self, size):
+        if size < 1024:
+            return f'{size} B'
+        for unit in ['KB', 'MB', 'GB']:
+            size /= 1024
+            if size < 1024 or unit == 'GB':
+                return f'{size:.1f} {unit}'
@@ -0,0 +1,57 @@
+"""
+Management command to deliver content change webhooks
+
+Runs as a long-lived process (or from cron with --once), sending the change
+log to every active WebhookEndpoint in signed, batched requests.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from cms_app.models import WebhookEndpoint
+from cms_app.webhooks import dispatch_endpoint
+
+
+class Command(BaseCommand):
+    help = 'Deliver publish, unpublish and settings change events to the webhook endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Deliver pending events once and exit',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds between checks for new events (default: 5)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Number of change log entries per request (default: WEBHOOK_BATCH_SIZE)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                self.dispatch(options['batch_size'])
+                if options['once']:
+                    return
+                connection.close()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped')
+
+    def dispatch(self, batch_size):
+        for endpoint in WebhookEndpoint.objects.filter(is_active=True):
+            delivered = dispatch_endpoint(endpoint, batch_size)
+            if delivered:
+                self.stdout.write(f'{endpoint.name}: delivered {delivered} events (cursor {endpoint.cursor})')
+            if endpoint.last_error:
+                self.stdout.write(self.style.WARNING(
+                    f'{endpoint.name}: delivery failed {endpoint.consecutive_failures} times, last error: {endpoint.last_error}'
+                ))
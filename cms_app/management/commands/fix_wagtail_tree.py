@@ -2,6 +2,7 @@
 Management command to fix Wagtail page tree structure
 """
 
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from wagtail.models import Page, Site
 
@@ -27,10 +28,9 @@ class Command(BaseCommand):
             )
             self.stdout.write(self.style.SUCCESS('Root page created'))
         
-        # Fix the tree
+        # Fix the tree in short transactions instead of rewriting it with Page.fix_tree()
         self.stdout.write('Fixing tree structure...')
-        Page.fix_tree()
-        self.stdout.write(self.style.SUCCESS('Tree structure fixed!'))
+        call_command('check_page_tree', repair=True, stdout=self.stdout)
         
         # Check for existing HomePage
         from cms_app.models import HomePage
@@ -0,0 +1,319 @@
+"""
+Management command to bulk import images (e.g. an event's photo dump)
+
+Images are decoded and analysed in a process pool, written to the database in
+batches, and their standard API renditions are generated up front so the first
+visitors don't pay for them. Optionally the imported images are appended to a
+page's gallery in a single revision.
+"""
+
+import os
+import tarfile
+import tempfile
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from wagtail.blocks import StreamValue
+from wagtail.images import get_image_model
+from wagtail.models import Collection, Page
+from wagtail.search import index
+
+from cms_app.models import ImageMetadata
+from cms_app.serializers import STANDARD_FILTER_SPECS
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.bmp', '.tif', '.tiff'}
+
+
+def inspect_image(path):
+    """
+    Decode an image file and compute everything needed for its database rows.
+    Runs in a worker process, so it only uses Pillow and returns plain data.
+    """
+    from PIL import Image as PILImage
+    from wagtail.utils.file import hash_filelike
+
+    from cms_app.images import compute_placeholder
+
+    try:
+        with open(path, 'rb') as fp:
+            with PILImage.open(fp) as image:
+                width, height = image.size
+                image.verify()
+            fp.seek(0)
+            placeholder, dominant_color = compute_placeholder(fp)
+            file_hash = hash_filelike(fp)
+    except Exception as e:
+        return {'path': path, 'error': str(e)}
+
+    return {
+        'path': path,
+        'width': width,
+        'height': height,
+        'file_size': os.path.getsize(path),
+        'file_hash': file_hash,
+        'placeholder': placeholder,
+        'dominant_color': dominant_color,
+    }
+
+
+def init_rendition_worker():
+    """Give each worker process its own database connections"""
+    import django
+    from django.db import connections
+
+    django.setup()
+    connections.close_all()
+
+
+def generate_renditions(image_id, filter_specs):
+    """Create the renditions of one image; runs in a worker process"""
+    try:
+        get_image_model().objects.get(pk=image_id).get_renditions(*filter_specs)
+    except Exception as e:
+        return image_id, str(e)
+    return image_id, None
+
+
+class Command(BaseCommand):
+    help = 'Bulk import a directory or archive (.zip, .tar, .tar.gz) of images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Directory or archive containing the images')
+        parser.add_argument(
+            '--collection',
+            help='ID or name of the collection to add the images to (default: root collection)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of worker processes (default: number of CPUs)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Number of images written per database transaction (default: 100)',
+        )
+        parser.add_argument(
+            '--no-renditions',
+            action='store_true',
+            help=f'Skip pre-generating the standard renditions ({", ".join(STANDARD_FILTER_SPECS)})',
+        )
+        parser.add_argument(
+            '--page',
+            type=int,
+            help='ID of a page whose gallery the imported images are appended to',
+        )
+        parser.add_argument(
+            '--publish',
+            action='store_true',
+            help='Publish the gallery revision created with --page',
+        )
+
+    def handle(self, *args, **options):
+        self.Image = get_image_model()
+        self.batch_size = options['batch_size']
+        collection = self.get_collection(options['collection'])
+        page = self.get_gallery_page(options['page']) if options['page'] else None
+
+        with tempfile.TemporaryDirectory() as extract_dir:
+            paths = self.collect_paths(options['source'], extract_dir)
+            if not paths:
+                raise CommandError(f'No images found in {options["source"]}')
+            self.stdout.write(f'Found {len(paths)} image files')
+
+            # Worker processes must not inherit our database connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+                results = pool.map(inspect_image, paths, chunksize=8)
+                image_ids = self.create_images(results, collection, len(paths))
+
+        if image_ids and not options['no_renditions']:
+            self.create_renditions(image_ids, options['workers'])
+
+        if page is not None and image_ids:
+            self.append_to_gallery(page, image_ids, options['publish'])
+
+        self.stdout.write(self.style.SUCCESS(f'\nImported {len(image_ids)} images'))
+
+    # -------------------------------------------------------------------------
+    # Input
+    # -------------------------------------------------------------------------
+
+    def get_collection(self, value):
+        if not value:
+            return Collection.get_first_root_node()
+        try:
+            if value.isdigit():
+                return Collection.objects.get(pk=int(value))
+            return Collection.objects.get(name=value)
+        except Collection.DoesNotExist:
+            raise CommandError(f'Collection "{value}" not found')
+
+    def get_gallery_page(self, page_id):
+        try:
+            page = Page.objects.get(pk=page_id).specific
+        except Page.DoesNotExist:
+            raise CommandError(f'Page {page_id} not found')
+
+        body = getattr(type(page), 'body', None)
+        if body is None or 'gallery' not in body.field.stream_block.child_blocks:
+            raise CommandError(f'{page} has no gallery block in its body')
+        return page
+
+    def collect_paths(self, source, extract_dir):
+        if os.path.isdir(source):
+            directory = source
+        elif zipfile.is_zipfile(source):
+            with zipfile.ZipFile(source) as archive:
+                archive.extractall(extract_dir)
+            directory = extract_dir
+        elif tarfile.is_tarfile(source):
+            with tarfile.open(source) as archive:
+                archive.extractall(extract_dir, filter='data')
+            directory = extract_dir
+        else:
+            raise CommandError(f'{source} is not a directory or a supported archive')
+
+        paths = []
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith(('.', '__MACOSX')))
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS and not filename.startswith('.'):
+                    paths.append(os.path.join(dirpath, filename))
+        return paths
+
+    # -------------------------------------------------------------------------
+    # Database rows
+    # -------------------------------------------------------------------------
+
+    def create_images(self, results, collection, total):
+        image_ids = []
+        batch = []
+        processed = 0
+        for result in results:
+            processed += 1
+            if 'error' in result:
+                self.stdout.write(self.style.WARNING(f'  Skipped {result["path"]}: {result["error"]}'))
+            else:
+                batch.append(result)
+
+            if len(batch) >= self.batch_size:
+                image_ids += self.write_batch(batch, collection)
+                batch = []
+                self.stdout.write(f'  {processed}/{total} processed, {len(image_ids)} imported')
+
+        if batch:
+            image_ids += self.write_batch(batch, collection)
+            self.stdout.write(f'  {processed}/{total} processed, {len(image_ids)} imported')
+        return image_ids
+
+    def write_batch(self, batch, collection):
+        existing = set(
+            self.Image.objects.filter(file_hash__in=[item['file_hash'] for item in batch])
+            .values_list('file_hash', flat=True)
+        )
+
+        images = []
+        metadata = {}
+        try:
+            for item in batch:
+                if item['file_hash'] in existing:
+                    self.stdout.write(f'  Already imported: {os.path.basename(item["path"])}')
+                    continue
+                # Guard against the same file appearing twice in one batch
+                existing.add(item['file_hash'])
+
+                with open(item['path'], 'rb') as fp:
+                    image = self.Image(
+                        title=self.get_title(item['path']),
+                        collection=collection,
+                        width=item['width'],
+                        height=item['height'],
+                        file_size=item['file_size'],
+                        file_hash=item['file_hash'],
+                    )
+                    # Store the file now, so the row can be written with bulk_create
+                    image.file.save(os.path.basename(item['path']), File(fp), save=False)
+                images.append(image)
+                metadata[image.file.name] = item
+
+            if not images:
+                return []
+
+            with transaction.atomic():
+                self.Image.objects.bulk_create(images)
+                # MySQL doesn't return primary keys from bulk inserts, so look them up
+                ids_by_file = dict(
+                    self.Image.objects.filter(file__in=list(metadata)).values_list('file', 'pk')
+                )
+                ImageMetadata.objects.bulk_create([
+                    ImageMetadata(
+                        image_id=ids_by_file[name],
+                        placeholder=item['placeholder'],
+                        dominant_color=item['dominant_color'],
+                        source_hash=item['file_hash'],
+                    )
+                    for name, item in metadata.items()
+                ])
+        except BaseException:
+            # The rows weren't written: don't leave their files behind in storage
+            for image in images:
+                image.file.delete(save=False)
+            raise
+
+        image_ids = [ids_by_file[image.file.name] for image in images]
+        # bulk_create skips the signal that keeps the search index up to date
+        for image in self.Image.objects.filter(pk__in=image_ids):
+            index.insert_or_update_object(image)
+        return image_ids
+
+    def get_title(self, path):
+        name = os.path.splitext(os.path.basename(path))[0]
+        return name.replace('_', ' ').replace('-', ' ').strip() or name
+
+    # -------------------------------------------------------------------------
+    # Renditions and gallery
+    # -------------------------------------------------------------------------
+
+    def create_renditions(self, image_ids, workers):
+        self.stdout.write(f'Generating renditions ({", ".join(STANDARD_FILTER_SPECS)})...')
+        connections.close_all()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_rendition_worker) as pool:
+            futures = [pool.submit(generate_renditions, image_id, STANDARD_FILTER_SPECS) for image_id in image_ids]
+            for done, future in enumerate(futures, start=1):
+                image_id, error = future.result()
+                if error:
+                    self.stdout.write(self.style.WARNING(f'  Renditions failed for image {image_id}: {error}'))
+                if done % self.batch_size == 0 or done == len(futures):
+                    self.stdout.write(f'  {done}/{len(futures)} images')
+
+    def append_to_gallery(self, page, image_ids, publish):
+        page = page.get_latest_revision_as_object()
+        stream_block = type(page).body.field.stream_block
+        raw = list(page.body.get_prep_value())
+
+        items = [
+            {'type': 'item', 'value': {'image': image_id, 'caption': ''}, 'id': str(uuid.uuid4())}
+            for image_id in image_ids
+        ]
+
+        galleries = [block for block in raw if block['type'] == 'gallery']
+        if galleries:
+            galleries[-1]['value'] = list(galleries[-1]['value']) + items
+        else:
+            raw.append({'type': 'gallery', 'value': items, 'id': str(uuid.uuid4())})
+
+        page.body = StreamValue(stream_block, raw, is_lazy=True)
+        revision = page.save_revision(log_action=True)
+        if publish:
+            revision.publish()
+            self.stdout.write(self.style.SUCCESS(f'Published gallery of "{page.title}" with {len(image_ids)} new images'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Saved draft of "{page.title}" with {len(image_ids)} new images'))
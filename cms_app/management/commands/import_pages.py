@@ -0,0 +1,263 @@
+"""
+Management command to bulk import pages from a JSON lines file
+
+Each line is one page spec:
+
+    {"type": "cms_app.EventsPage", "parent": "/home/", "key": "events",
+     "title": "Events 2025", "intro": "<p>...</p>",
+     "body": [{"type": "events", "value": [{"title": "Finals", ...}]}],
+     "publish": true}
+
+"type" is the page model, "parent" is a page ID, a URL path or the "key" of an
+earlier line, and every other key is a field of the page. StreamField content
+uses the stored JSON format (images and documents as IDs).
+
+All lines are validated against the models, the page types allowed under
+their parent and the block definitions before anything is written; pages are
+then created in batched transactions. The search index, projections, change
+log, navigation and CDN purges are updated once per batch, after it commits.
+"""
+
+import json
+import sys
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+from wagtail.fields import StreamField
+from wagtail.models import Page
+
+from cms_app.signals import deferred_publish_effects
+
+# Keys of a spec that aren't page fields
+SPEC_KEYS = {'type', 'parent', 'key', 'publish'}
+# Tree fields set by treebeard when the page is added
+TREE_FIELDS = ['path', 'depth', 'numchild', 'url_path']
+
+
+class Command(BaseCommand):
+    help = 'Bulk import pages (with StreamField content) from a JSON lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='JSON lines file of page specs, or - for stdin')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Number of pages created per database transaction (default: 50)',
+        )
+        parser.add_argument(
+            '--user',
+            help='Username recorded as the owner and author of the revisions',
+        )
+        parser.add_argument(
+            '--skip-invalid',
+            action='store_true',
+            help='Import the valid lines even if some lines fail validation',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file without creating any pages',
+        )
+
+    def handle(self, *args, **options):
+        self.user = self.get_user(options['user'])
+        specs = self.read_specs(options['source'])
+        if not specs:
+            raise CommandError('No page specs found')
+        self.stdout.write(f'Read {len(specs)} page specs')
+
+        pages, errors = self.validate(specs)
+        for line_number, message in errors:
+            self.stdout.write(self.style.ERROR(f'  Line {line_number}: {message}'))
+        if errors and not options['skip_invalid']:
+            raise CommandError(f'{len(errors)} invalid lines, nothing imported (use --skip-invalid to import the rest)')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'\nDry run: {len(pages)} valid pages, {len(errors)} invalid'))
+            return
+
+        created, skipped = self.import_pages(pages, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'\nImported {created} pages ({skipped} skipped)'))
+
+    # -------------------------------------------------------------------------
+    # Input
+    # -------------------------------------------------------------------------
+
+    def get_user(self, username):
+        if not username:
+            return None
+        try:
+            return get_user_model().objects.get_by_natural_key(username)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User "{username}" not found')
+
+    def read_specs(self, source):
+        if source == '-':
+            lines = sys.stdin.readlines()
+        else:
+            try:
+                with open(source, encoding='utf-8') as fp:
+                    lines = fp.readlines()
+            except OSError as e:
+                raise CommandError(f'Cannot read {source}: {e}')
+
+        specs = []
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                spec = json.loads(line)
+            except ValueError as e:
+                raise CommandError(f'Line {line_number} is not valid JSON: {e}')
+            specs.append((line_number, spec))
+        return specs
+
+    # -------------------------------------------------------------------------
+    # Validation
+    # -------------------------------------------------------------------------
+
+    def validate(self, specs):
+        """Build an unsaved page for every spec, returning (pages, errors)"""
+        pages = []
+        errors = []
+        keys = {}
+        for line_number, spec in specs:
+            try:
+                page = self.build_page(spec, keys)
+            except ValidationError as e:
+                errors.append((line_number, '; '.join(self.format_errors(e))))
+                continue
+            except (LookupError, ValueError, TypeError) as e:
+                errors.append((line_number, str(e)))
+                continue
+
+            if spec.get('key'):
+                keys[spec['key']] = type(page)
+            pages.append((line_number, spec, page))
+        return pages, errors
+
+    def build_page(self, spec, keys):
+        if not isinstance(spec, dict):
+            raise ValueError('Page spec must be a JSON object')
+        try:
+            model = apps.get_model(spec.get('type', ''))
+        except (LookupError, ValueError):
+            raise LookupError(f'Unknown page type "{spec.get("type")}"')
+        if not issubclass(model, Page):
+            raise ValueError(f'{spec["type"]} is not a page type')
+
+        parent = spec.get('parent')
+        if parent is None:
+            raise ValueError('Missing "parent"')
+        if isinstance(parent, str) and parent in keys:
+            parent_model = keys[parent]
+            if not (model.is_creatable and model in parent_model.allowed_subpage_models()):
+                raise ValueError(f'{spec["type"]} pages cannot be created under {parent_model.__name__} "{parent}"')
+        else:
+            parent_page = self.resolve_parent(parent, {}).specific
+            if not model.can_create_at(parent_page):
+                raise ValueError(f'{spec["type"]} pages cannot be created under "{parent_page.title}"')
+
+        page = model()
+        stream_errors = {}
+        for name, value in spec.items():
+            if name in SPEC_KEYS:
+                continue
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                raise ValueError(f'{spec["type"]} has no field "{name}"')
+
+            if isinstance(field, StreamField):
+                stream_block = field.stream_block
+                try:
+                    value = stream_block.clean(stream_block.to_python(value or []))
+                except ValidationError as e:
+                    stream_errors[name] = e
+                    continue
+            setattr(page, field.attname, value)
+
+        if not page.slug:
+            page.slug = slugify(page.title or '')
+        exclude = TREE_FIELDS + [f.name for f in model._meta.get_fields() if isinstance(f, StreamField)]
+        try:
+            page.clean_fields(exclude=exclude)
+        except ValidationError as e:
+            stream_errors.update(e.error_dict)
+        if stream_errors:
+            raise ValidationError(stream_errors)
+        return page
+
+    def format_errors(self, error):
+        if not hasattr(error, 'error_dict'):
+            return error.messages
+        messages = []
+        for name, field_errors in error.error_dict.items():
+            for field_error in field_errors:
+                if hasattr(field_error, 'as_json_data'):
+                    # StreamBlockValidationError: report the nested block errors
+                    detail = json.dumps(field_error.as_json_data())
+                else:
+                    detail = '; '.join(field_error.messages)
+                messages.append(f'{name}: {detail}')
+        return messages
+
+    def resolve_parent(self, parent, created):
+        if isinstance(parent, str) and parent in created:
+            return created[parent]
+        try:
+            if isinstance(parent, int):
+                return Page.objects.get(pk=parent)
+            if isinstance(parent, str) and parent.startswith('/'):
+                url_path = parent if parent.endswith('/') else parent + '/'
+                return Page.objects.get(url_path=url_path)
+        except Page.DoesNotExist:
+            pass
+        raise LookupError(f'Parent page "{parent}" not found')
+
+    # -------------------------------------------------------------------------
+    # Import
+    # -------------------------------------------------------------------------
+
+    def import_pages(self, pages, batch_size):
+        created = {}
+        count = 0
+        skipped = 0
+        for start in range(0, len(pages), batch_size):
+            batch = pages[start:start + batch_size]
+            with deferred_publish_effects(), transaction.atomic():
+                for line_number, spec, page in batch:
+                    parent = self.resolve_parent(spec['parent'], created).specific
+                    existing = parent.get_children().filter(slug=page.slug).first()
+                    if existing is not None:
+                        self.stdout.write(f'  Line {line_number}: "{page.slug}" already exists under "{parent.title}", skipped')
+                        if spec.get('key'):
+                            created[spec['key']] = existing
+                        skipped += 1
+                        continue
+                    if not type(page).can_create_at(parent):
+                        # e.g. max_count reached by earlier lines
+                        self.stdout.write(self.style.ERROR(
+                            f'  Line {line_number}: {spec["type"]} pages cannot be created under "{parent.title}", skipped'
+                        ))
+                        skipped += 1
+                        continue
+
+                    page.owner = self.user
+                    page.live = False
+                    parent.add_child(instance=page)
+                    revision = page.save_revision(user=self.user, log_action=True)
+                    if spec.get('publish', True):
+                        revision.publish(user=self.user)
+
+                    if spec.get('key'):
+                        created[spec['key']] = page
+                    count += 1
+
+            self.stdout.write(f'  {start + len(batch)}/{len(pages)} processed, {count} imported')
+        return count, skipped
@@ -0,0 +1,121 @@
+"""
+Management command to profile the import cost of starting the project
+
+Runs manage.py (or a WSGI-style startup) in a fresh interpreter with
+``python -X importtime`` and reports the startup time and the modules and
+packages that cost the most to import.
+
+Usage:
+    python manage.py profile_imports                         # Django setup (manage.py help)
+    python manage.py profile_imports -- fix_wagtail_tree --help
+    python manage.py profile_imports --urls                  # setup and URLconf, as a WSGI worker
+    python manage.py profile_imports --match cms_app --limit 40
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Loads everything a WSGI worker loads before its first request, without the warm-up
+URLS_SCRIPT = (
+    'import django; django.setup(); '
+    'from django.urls import get_resolver; get_resolver().url_patterns'
+)
+
+
+def parse_importtime(output):
+    """``(module, self_us, cumulative_us, depth)`` for each line of -X importtime output"""
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        # "import time:       123 |        456 |     package.module"
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        try:
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            # The header line
+            continue
+        module = name.strip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((module, self_us, cumulative_us, depth))
+    return imports
+
+
+class Command(BaseCommand):
+    help = 'Report the startup time of manage.py or the WSGI app and the cost of each import'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'command',
+            nargs='*',
+            help='manage.py command line to profile (default: help); put it after "--"',
+        )
+        parser.add_argument(
+            '--urls',
+            action='store_true',
+            help='Profile Django setup plus loading the URLconf, as a WSGI worker starts',
+        )
+        parser.add_argument('--limit', type=int, default=20, help='Modules to list (default: 20)')
+        parser.add_argument('--match', help='Only list modules starting with this prefix, e.g. cms_app')
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=3,
+            help='Startups to time; the fastest is reported (default: 3)',
+        )
+
+    def handle(self, *args, **options):
+        if options['urls']:
+            argv = ['-c', URLS_SCRIPT]
+            label = 'Django setup and URLconf'
+        else:
+            command = options['command'] or ['help']
+            argv = [os.path.join(settings.BASE_DIR, 'manage.py'), *command]
+            label = f'manage.py {" ".join(command)}'
+
+        timings = []
+        output = ''
+        for _ in range(max(options['runs'], 1)):
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', *argv],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+            )
+            timings.append(time.perf_counter() - start)
+            output = result.stderr
+        imports = parse_importtime(output)
+        if not imports:
+            raise CommandError(f'No import timings captured:\n{output[-2000:]}')
+
+        total = sum(self_us for _, self_us, _, _ in imports)
+        self.stdout.write(f'{label}')
+        self.stdout.write(
+            f'  startup: {min(timings) * 1000:.0f} ms (fastest of {len(timings)}, '
+            f'median {statistics.median(timings) * 1000:.0f} ms)'
+        )
+        self.stdout.write(f'  imports: {total / 1000:.0f} ms in {len(imports)} modules')
+
+        packages = defaultdict(lambda: [0, 0])
+        for module, self_us, _, _ in imports:
+            package = packages[module.split('.')[0]]
+            package[0] += self_us
+            package[1] += 1
+        self.stdout.write('\nPackages by import time:')
+        for package, (self_us, count) in sorted(packages.items(), key=lambda item: -item[1][0])[:options['limit']]:
+            self.stdout.write(f'  {self_us / 1000:8.1f} ms  {count:4d} modules  {package}')
+
+        modules = imports
+        if options['match']:
+            modules = [item for item in imports if item[0].startswith(options['match'])]
+        self.stdout.write('\nModules by cumulative import time (self / cumulative, first importer nesting):')
+        for module, self_us, cumulative_us, depth in sorted(modules, key=lambda item: -item[2])[:options['limit']]:
+            self.stdout.write(f'  {self_us / 1000:8.1f} / {cumulative_us / 1000:8.1f} ms  {"  " * depth}{module}')
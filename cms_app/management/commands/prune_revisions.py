@@ -0,0 +1,176 @@
+"""
+Management command to prune old page and snippet revisions
+
+Every save stores a full copy of the object's content (including large
+StreamField bodies) as a revision. This keeps the most recent revisions of
+each object plus its published milestones, and deletes the rest in small
+batches so no transaction holds locks on the revision table for long.
+
+Revisions are never deleted if they are:
+    - among the --keep most recent revisions of their object
+    - the live or latest revision of their object
+    - recorded as published in the audit log
+    - scheduled to go live
+    - part of a workflow (moderation) history
+    - the revision an editor's comment was made on (deleting it would delete
+      the comment thread)
+"""
+
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum, TextField
+from django.db.models.functions import Cast, Length
+from wagtail.models import Comment, DraftStateMixin, ModelLogEntry, PageLogEntry, Revision, RevisionMixin, TaskState
+
+
+class Command(BaseCommand):
+    help = 'Delete old revisions, keeping the most recent ones and published milestones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=20,
+            help='Number of most recent revisions kept per page or snippet (default: 20)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of revisions deleted per transaction (default: 500)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Seconds to pause between batches, to spread the load on a live database (default: 0)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be deleted without deleting anything',
+        )
+
+    def handle(self, *args, **options):
+        if options['keep'] < 1:
+            raise CommandError('--keep must be at least 1')
+        self.dry_run = options['dry_run']
+        self.sleep = options['sleep']
+        self.deleted = 0
+        self.kept = 0
+        self.reclaimed = 0
+        self.comment_revisions = 0
+        self.comments = 0
+
+        objects = (
+            Revision.objects.values('base_content_type_id', 'object_id')
+            .annotate(revision_count=Count('id'))
+            .filter(revision_count__gt=options['keep'])
+            .order_by()
+        )
+
+        batch = []
+        object_count = 0
+        for obj in objects.iterator():
+            object_count += 1
+            batch += list(
+                Revision.objects.filter(
+                    base_content_type_id=obj['base_content_type_id'],
+                    object_id=obj['object_id'],
+                )
+                .order_by('-created_at', '-id')
+                .values_list('id', flat=True)[options['keep']:]
+            )
+            while len(batch) >= options['batch_size']:
+                self.prune(batch[:options['batch_size']])
+                batch = batch[options['batch_size']:]
+        if batch:
+            self.prune(batch)
+
+        action = 'Would delete' if self.dry_run else 'Deleted'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n{action} {self.deleted} revisions of {object_count} objects '
+                f'({self.kept} older milestones kept), reclaiming ~{self.format_bytes(self.reclaimed)}'
+            )
+        )
+        if self.comments:
+            self.stdout.write(
+                f'{self.comment_revisions} revisions kept for the {self.comments} comments made on them '
+                f'(deleting a revision deletes its comments)'
+            )
+
+    def prune(self, candidates):
+        protected = self.get_protected(candidates)
+        self.kept += len(protected)
+        ids = [pk for pk in candidates if pk not in protected]
+        if not ids:
+            return
+
+        size = (
+            Revision.objects.filter(pk__in=ids)
+            .aggregate(size=Sum(Length(Cast('content', output_field=TextField()))))['size'] or 0
+        )
+        if not self.dry_run:
+            with transaction.atomic():
+                Revision.objects.filter(pk__in=ids).delete()
+            if self.sleep:
+                time.sleep(self.sleep)
+
+        self.deleted += len(ids)
+        self.reclaimed += size
+        self.stdout.write(f'  {self.deleted} revisions, ~{self.format_bytes(self.reclaimed)}')
+
+    def get_protected(self, candidates):
+        """IDs among ``candidates`` that must be kept"""
+        protected = set()
+        for log_model in (PageLogEntry, ModelLogEntry):
+            protected.update(
+                log_model.objects.filter(revision_id__in=candidates, action='wagtail.publish')
+                .values_list('revision_id', flat=True)
+            )
+        protected.update(
+            Revision.objects.filter(pk__in=candidates, approved_go_live_at__isnull=False)
+            .values_list('id', flat=True)
+        )
+        comment_counts = dict(
+            Comment.objects.filter(revision_created_id__in=candidates)
+            .values('revision_created_id')
+            .annotate(count=Count('id'))
+            .values_list('revision_created_id', 'count')
+            .order_by()
+        )
+        self.comment_revisions += len(comment_counts)
+        self.comments += sum(comment_counts.values())
+        protected.update(comment_counts)
+        protected.update(
+            TaskState.objects.filter(revision_id__in=candidates).values_list('revision_id', flat=True)
+        )
+
+        for model in self.get_revision_models():
+            protected.update(
+                model.objects.filter(latest_revision_id__in=candidates).values_list('latest_revision_id', flat=True)
+            )
+            if issubclass(model, DraftStateMixin):
+                protected.update(
+                    model.objects.filter(live_revision_id__in=candidates).values_list('live_revision_id', flat=True)
+                )
+        return protected
+
+    def get_revision_models(self):
+        # Concrete base models only, e.g. Page rather than every page type
+        return [
+            model for model in apps.get_models()
+            if issubclass(model, RevisionMixin) and not model._meta.parents
+        ]
+
+    def format_bytes(self, size):
+        if size < 1024:
+            return f'{size} B'
+        for unit in ['KB', 'MB', 'GB']:
+            size /= 1024
+            if size < 1024 or unit == 'GB':
+                return f'{size:.1f} {unit}'
@@ -0,0 +1,47 @@
+"""
+Management command to rebuild the publish-time projections of page content
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from wagtail.models import Page
+
+from cms_app.models import BasePage
+from cms_app.projections import PROJECTIONS, clear_page, project_page
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the indexed projections (events, ...) of all published pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            metavar='NAME',
+            help=f'Only rebuild these projections (available: {", ".join(PROJECTIONS)})',
+        )
+
+    def handle(self, *args, **options):
+        only = options['only']
+        if only:
+            unknown = set(only) - set(PROJECTIONS)
+            if unknown:
+                raise CommandError(f'Unknown projection(s): {", ".join(sorted(unknown))}')
+
+        totals = dict.fromkeys(only or PROJECTIONS, 0)
+        pages = 0
+        for page in Page.objects.live().specific().iterator(chunk_size=100):
+            if not isinstance(page, BasePage):
+                continue
+            for name, count in project_page(page, only=only).items():
+                totals[name] += count
+            pages += 1
+
+        # Pages that were unpublished while projections were out of date
+        for page in Page.objects.not_live().specific().iterator(chunk_size=100):
+            if isinstance(page, BasePage):
+                clear_page(page)
+
+        self.stdout.write(f'Projected {pages} published pages')
+        for name, count in totals.items():
+            self.stdout.write(f'  {name}: {count} rows')
+        self.stdout.write(self.style.SUCCESS('Projections rebuilt!'))
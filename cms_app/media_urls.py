@@ -0,0 +1,72 @@
+"""
+Media URL strategy for API responses
+
+All image and document URLs emitted by the API are built here, so media can
+be served from a CDN host instead of the Django origin. Configured with:
+
+    MEDIA_CDN_HOST      default host for all media, e.g. 'https://cdn.example.com'
+    MEDIA_CDN_HOSTS     per-type hosts overriding MEDIA_CDN_HOST, keyed by
+                        'original', 'rendition' or 'document'
+    MEDIA_URL_VERSIONING  append a '?v=<file hash>' cache-busting query string
+
+Without a CDN host, URLs are made absolute against the current request as before.
+"""
+
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+ORIGINAL = 'original'
+RENDITION = 'rendition'
+DOCUMENT = 'document'
+
+
+def get_media_host(kind):
+    """Return the configured CDN host for a kind of media, or '' to use the origin"""
+    hosts = getattr(settings, 'MEDIA_CDN_HOSTS', {}) or {}
+    host = hosts.get(kind) or getattr(settings, 'MEDIA_CDN_HOST', '')
+    return host.rstrip('/')
+
+
+def build_media_url(url, kind, request=None, version=None):
+    """
+    Build the public URL of a media file.
+
+    ``url`` is the storage URL of the file, usually a path such as
+    '/media/images/photo.max-500x500.jpg'.
+    """
+    host = get_media_host(kind)
+    if host:
+        parts = urlsplit(url)
+        url = host + parts.path + (f'?{parts.query}' if parts.query else '')
+    elif request is not None:
+        url = request.build_absolute_uri(url)
+
+    if version and getattr(settings, 'MEDIA_URL_VERSIONING', True):
+        url += ('&' if '?' in url else '?') + f'v={version}'
+    return url
+
+
+def _file_version(obj):
+    file_hash = getattr(obj, 'file_hash', '')
+    return file_hash[:8] if file_hash else None
+
+
+def image_url(image, request=None):
+    """URL of the original image file"""
+    return build_media_url(image.file.url, ORIGINAL, request, _file_version(image))
+
+
+def rendition_url(rendition, request=None):
+    """URL of a rendition; versioned by the hash of its source image"""
+    return build_media_url(rendition.url, RENDITION, request, _file_version(rendition.image))
+
+
+def document_url(document, request=None):
+    """
+    Download URL of a document. With a CDN host the file is linked directly;
+    otherwise the Wagtail document serve view is used.
+    """
+    if get_media_host(DOCUMENT):
+        return build_media_url(document.file.url, DOCUMENT, request, _file_version(document))
+    return build_media_url(document.url, DOCUMENT, request)
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:22
+
+import django.db.models.deletion
+import wagtail.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms_app', '0005_alter_homepage_body'),
+        ('wagtailimages', '0027_image_description'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='homepage',
+            name='body',
+            field=wagtail.fields.StreamField([('hero', 8), ('about', 12), ('about_stats', 16), ('value_cards', 21), ('event_details', 32), ('events_cta', 36), ('volunteer_image', 39), ('volunteer_stats', 40), ('benefit_cards', 43), ('volunteer_cta', 44), ('gallery', 46), ('youtube_videos', 52), ('rule_categories', 57), ('general_rules', 58), ('rule_documents', 65), ('rules_faq_cta', 66), ('organizers', 69), ('organizer_stats', 73), ('organizers_cta', 74), ('testimonials', 78), ('team', 83), ('rules', 87), ('events', 93), ('cta', 94), ('rich_text', 95), ('html', 96)], blank=True, block_lookup={0: ('wagtail.blocks.CharBlock', (), {'help_text': 'Main heading', 'max_length': 255}), 1: ('wagtail.blocks.CharBlock', (), {'help_text': 'Subheading text', 'max_length': 255, 'required': False}), 2: ('wagtail.blocks.RichTextBlock', (), {'help_text': 'Hero description', 'required': False}), 3: ('cms_app.blocks.APIImageChooserBlock', (), {'help_text': 'Background image', 'required': False}), 4: ('wagtail.blocks.CharBlock', (), {'help_text': "Primary button text (e.g., 'Register Now')", 'max_length': 100, 'required': False}), 5: ('wagtail.blocks.URLBlock', (), {'help_text': 'Primary button link', 'required': False}), 6: ('wagtail.blocks.CharBlock', (), {'help_text': "Secondary button text (e.g., 'Become a Volunteer')", 'max_length': 100, 'required': False}), 7: ('wagtail.blocks.URLBlock', (), {'help_text': 'Secondary button link', 'required': False}), 8: ('wagtail.blocks.StructBlock', [[('title', 0), ('subtitle', 1), ('description', 2), ('background_image', 3), ('cta_text', 4), ('cta_link', 5), ('secondary_cta_text', 6), ('secondary_cta_link', 7)]], {}), 9: ('wagtail.blocks.CharBlock', (), {'help_text': 'Section title', 'max_length': 255}), 10: ('wagtail.blocks.RichTextBlock', (), {'help_text': 'About content'}), 11: ('cms_app.blocks.APIImageChooserBlock', (), {'help_text': 'Optional image', 'required': False}), 12: ('wagtail.blocks.StructBlock', [[('title', 9), ('content', 10), ('image', 11)]], {}), 13: ('wagtail.blocks.CharBlock', (), {'help_text': "Stat value (e.g., '5+', '1000+')", 'max_length': 50}), 14: ('wagtail.blocks.CharBlock', (), {'help_text': "Stat label (e.g., 'Years Active', 'Participants')", 'max_length': 100}), 15: ('wagtail.blocks.StructBlock', [[('number', 13), ('label', 14)]], {}), 16: ('wagtail.blocks.ListBlock', (15,), {'label': 'About Stats (e.g., 5+ Years)'}), 17: ('wagtail.blocks.CharBlock', (), {'help_text': "Lucide icon name (e.g., 'Target', 'Users', 'Trophy', 'Lightbulb')", 'max_length': 50}), 18: ('wagtail.blocks.CharBlock', (), {'max_length': 100}), 19: ('wagtail.blocks.TextBlock', (), {}), 20: ('wagtail.blocks.StructBlock', [[('icon_name', 17), ('title', 18), ('description', 19)]], {}), 21: ('wagtail.blocks.ListBlock', (20,), {'label': 'Value Cards (Innovation, Community, etc.)'}), 22: ('wagtail.blocks.CharBlock', (), {'max_length': 255}), 23: ('wagtail.blocks.CharBlock', (), {'help_text': 'Event date', 'max_length': 100}), 24: ('wagtail.blocks.CharBlock', (), {'help_text': 'Event time', 'max_length': 100}), 25: ('wagtail.blocks.CharBlock', (), {'help_text': "e.g., '100+ Teams'", 'max_length': 100}), 26: ('wagtail.blocks.CharBlock', (), {'help_text': "e.g., 'Registration Open', 'Coming Soon'", 'max_length': 50}), 27: ('wagtail.blocks.ChoiceBlock', [], {'choices': [('bg-secondary', 'Secondary (Red)'), ('bg-accent', 'Accent (Blue)'), ('bg-muted', 'Muted (Gray)')]}), 28: ('wagtail.blocks.CharBlock', (), {'default': 'Learn More', 'max_length': 50}), 29: ('wagtail.blocks.URLBlock', (), {'required': False}), 30: ('cms_app.blocks.APIImageChooserBlock', (), {'required': False}), 31: ('wagtail.blocks.StructBlock', [[('title', 22), ('date', 23), ('time', 24), ('location', 22), ('participants', 25), ('description', 19), ('status', 26), ('status_color', 27), ('button_text', 28), ('button_link', 29), ('image', 30)]], {}), 32: ('wagtail.blocks.ListBlock', (31,), {'label': 'Event Details (Full Event Cards)'}), 33: ('wagtail.blocks.TextBlock', (), {'required': False}), 34: ('wagtail.blocks.CharBlock', (), {'max_length': 100, 'required': False}), 35: ('wagtail.blocks.ChoiceBlock', [], {'choices': [('gradient', 'Gradient (Red)'), ('solid', 'Solid'), ('transparent', 'Transparent')]}), 36: ('wagtail.blocks.StructBlock', [[('title', 22), ('description', 33), ('primary_button_text', 18), ('primary_button_link', 29), ('secondary_button_text', 34), ('secondary_button_link', 29), ('background_style', 35)]], {'label': 'Events Call to Action'}), 37: ('cms_app.blocks.APIImageChooserBlock', (), {}), 38: ('wagtail.blocks.CharBlock', (), {'max_length': 255, 'required': False}), 39: ('wagtail.blocks.StructBlock', [[('image', 37), ('caption', 38)]], {'label': 'Volunteer Section Image'}), 40: ('wagtail.blocks.ListBlock', (15,), {'label': 'Volunteer Stats'}), 41: ('wagtail.blocks.CharBlock', (), {'help_text': "Lucide icon name (e.g., 'Users', 'Heart', 'Star')", 'max_length': 50}), 42: ('wagtail.blocks.StructBlock', [[('icon_name', 41), ('title', 18), ('description', 19)]], {}), 43: ('wagtail.blocks.ListBlock', (42,), {'label': 'Volunteer Benefits'}), 44: ('wagtail.blocks.StructBlock', [[('title', 22), ('description', 33), ('primary_button_text', 18), ('primary_button_link', 29), ('secondary_button_text', 34), ('secondary_button_link', 29), ('background_style', 35)]], {'label': 'Volunteer Call to Action'}), 45: ('wagtail.blocks.StructBlock', [[('image', 37), ('caption', 38)]], {}), 46: ('wagtail.blocks.ListBlock', (45,), {'label': 'Gallery Images'}), 47: ('wagtail.blocks.CharBlock', (), {'help_text': 'Video title', 'max_length': 255}), 48: ('wagtail.blocks.URLBlock', (), {'help_text': 'YouTube video URL (e.g., https://www.youtube.com/watch?v=VIDEO_ID)'}), 49: ('cms_app.blocks.APIImageChooserBlock', (), {'help_text': 'Custom thumbnail (optional)', 'required': False}), 50: ('wagtail.blocks.TextBlock', (), {'help_text': 'Video description', 'required': False}), 51: ('wagtail.blocks.StructBlock', [[('title', 47), ('youtube_url', 48), ('thumbnail', 49), ('description', 50)]], {}), 52: ('wagtail.blocks.ListBlock', (51,), {'label': 'YouTube Videos'}), 53: ('wagtail.blocks.CharBlock', (), {'help_text': "Lucide icon name (e.g., 'Trophy', 'Users', 'Settings', 'Shield')", 'max_length': 50}), 54: ('wagtail.blocks.CharBlock', (), {'label': 'Rule', 'max_length': 255}), 55: ('wagtail.blocks.ListBlock', (54,), {}), 56: ('wagtail.blocks.StructBlock', [[('icon_name', 53), ('title', 18), ('description', 19), ('rules', 55)]], {}), 57: ('wagtail.blocks.ListBlock', (56,), {'label': 'Competition Rule Categories'}), 58: ('wagtail.blocks.ListBlock', (22,), {'label': 'General Rules List'}), 59: ('wagtail.blocks.CharBlock', (), {'help_text': 'Display name for the document', 'max_length': 255}), 60: ('wagtail.documents.blocks.DocumentChooserBlock', (), {'help_text': 'Upload any file type (PDF, DOC, XLS, etc.)', 'required': True}), 61: ('wagtail.blocks.TextBlock', (), {'help_text': 'Optional description or caption for the document', 'required': False}), 62: ('wagtail.blocks.CharBlock', (), {'help_text': 'File type (auto-detected from upload)', 'max_length': 20, 'required': False}), 63: ('wagtail.blocks.CharBlock', (), {'help_text': 'File size (auto-calculated)', 'max_length': 20, 'required': False}), 64: ('wagtail.blocks.StructBlock', [[('name', 59), ('document', 60), ('description', 61), ('file_type', 62), ('file_size', 63)]], {}), 65: ('wagtail.blocks.ListBlock', (64,), {'label': 'Rule Documents for Download'}), 66: ('wagtail.blocks.StructBlock', [[('title', 22), ('description', 33), ('primary_button_text', 18), ('primary_button_link', 29), ('secondary_button_text', 34), ('secondary_button_link', 29), ('background_style', 35)]], {'label': 'Rules FAQ Call to Action'}), 67: ('wagtail.blocks.CharBlock', (), {'help_text': "e.g., 'Main Sponsor', 'Educational Partner'", 'max_length': 100}), 68: ('wagtail.blocks.StructBlock', [[('name', 18), ('logo', 30), ('description', 19), ('role', 67)]], {}), 69: ('wagtail.blocks.ListBlock', (68,), {'label': 'Organizers/Partners'}), 70: ('wagtail.blocks.CharBlock', (), {'help_text': 'Lucide icon name', 'max_length': 50}), 71: ('wagtail.blocks.CharBlock', (), {'max_length': 50}), 72: ('wagtail.blocks.StructBlock', [[('icon_name', 70), ('number', 71), ('label', 18)]], {}), 73: ('wagtail.blocks.ListBlock', (72,), {'label': 'Organizer Impact Stats'}), 74: ('wagtail.blocks.StructBlock', [[('title', 22), ('description', 33), ('primary_button_text', 18), ('primary_button_link', 29), ('secondary_button_text', 34), ('secondary_button_link', 29), ('background_style', 35)]], {'label': 'Organizers Network CTA'}), 75: ('wagtail.blocks.TextBlock', (), {'help_text': 'Testimonial text'}), 76: ('wagtail.blocks.CharBlock', (), {'max_length': 150, 'required': False}), 77: ('wagtail.blocks.StructBlock', [[('quote', 75), ('author', 18), ('role', 76), ('avatar', 30)]], {}), 78: ('wagtail.blocks.ListBlock', (77,), {'label': 'Testimonials'}), 79: ('wagtail.blocks.CharBlock', (), {'max_length': 150}), 80: ('wagtail.blocks.EmailBlock', (), {'required': False}), 81: ('wagtail.blocks.CharBlock', (), {'max_length': 50, 'required': False}), 82: ('wagtail.blocks.StructBlock', [[('name', 18), ('role', 79), ('bio', 33), ('photo', 30), ('email', 80), ('phone', 81)]], {}), 83: ('wagtail.blocks.ListBlock', (82,), {'label': 'Team Members'}), 84: ('wagtail.blocks.CharBlock', (), {'max_length': 10, 'required': False}), 85: ('wagtail.blocks.RichTextBlock', (), {}), 86: ('wagtail.blocks.StructBlock', [[('rule_number', 84), ('title', 22), ('description', 85)]], {}), 87: ('wagtail.blocks.ListBlock', (86,), {'label': 'Simple Rules'}), 88: ('wagtail.blocks.DateBlock', (), {'required': False}), 89: ('wagtail.blocks.TimeBlock', (), {'required': False}), 90: ('wagtail.blocks.RichTextBlock', (), {'required': False}), 91: ('wagtail.blocks.URLBlock', (), {'help_text': 'Event registration URL', 'required': False}), 92: ('wagtail.blocks.StructBlock', [[('title', 22), ('date', 88), ('time', 89), ('location', 38), ('description', 90), ('image', 30), ('registration_link', 91)]], {}), 93: ('wagtail.blocks.ListBlock', (92,), {'label': 'Simple Events'}), 94: ('wagtail.blocks.StructBlock', [[('title', 22), ('description', 33), ('primary_button_text', 18), ('primary_button_link', 29), ('secondary_button_text', 34), ('secondary_button_link', 29), ('background_style', 35)]], {'label': 'Call to Action'}), 95: ('wagtail.blocks.RichTextBlock', (), {'label': 'Rich Text Content'}), 96: ('wagtail.blocks.RawHTMLBlock', (), {'label': 'Raw HTML'})}),
+        ),
+        migrations.CreateModel(
+            name='ImageMetadata',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('placeholder', models.TextField(blank=True, help_text='Base64 data URI of a tiny thumbnail')),
+                ('dominant_color', models.CharField(blank=True, help_text='Hex colour, e.g. #1a2b3c', max_length=7)),
+                ('source_hash', models.CharField(blank=True, help_text='file_hash of the image the data was computed from', max_length=40)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('image', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='arc_metadata', to='wagtailimages.image')),
+            ],
+            options={
+                'verbose_name': 'Image Metadata',
+                'verbose_name_plural': 'Image Metadata',
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms_app', '0006_alter_homepage_body_imagemetadata'),
+        ('wagtailcore', '0095_groupsitepermission'),
+        ('wagtailimages', '0027_image_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventIndexEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('event_details', 'Event Detail'), ('events', 'Event')], max_length=20)),
+                ('block_id', models.CharField(blank=True, help_text='ID of the StreamField block', max_length=64)),
+                ('item_id', models.CharField(blank=True, help_text='ID of the event within the block', max_length=64)),
+                ('position', models.PositiveIntegerField(default=0, help_text='Order of the event within the page body')),
+                ('title', models.CharField(max_length=255)),
+                ('date', models.DateField(blank=True, help_text='Normalized event date', null=True)),
+                ('time', models.TimeField(blank=True, help_text='Normalized start time', null=True)),
+                ('date_text', models.CharField(blank=True, help_text='Date as entered by the editor', max_length=100)),
+                ('time_text', models.CharField(blank=True, help_text='Time as entered by the editor', max_length=100)),
+                ('location', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(blank=True, max_length=50)),
+                ('participants', models.CharField(blank=True, max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('link', models.URLField(blank=True, max_length=500)),
+                ('image', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailimages.image')),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailcore.page')),
+            ],
+            options={
+                'verbose_name': 'Event Index Entry',
+                'verbose_name_plural': 'Event Index Entries',
+                'ordering': ['date', 'time', 'position'],
+                'indexes': [models.Index(fields=['date', 'time'], name='cms_event_date_idx'), models.Index(fields=['location'], name='cms_event_location_idx'), models.Index(fields=['status', 'date'], name='cms_event_status_idx'), models.Index(fields=['page', 'position'], name='cms_event_page_idx')],
+            },
+        ),
+    ]
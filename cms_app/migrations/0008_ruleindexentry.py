@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms_app', '0007_eventindexentry'),
+        ('wagtailcore', '0095_groupsitepermission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RuleIndexEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('rule_categories', 'Rule Category'), ('general_rules', 'General Rule'), ('rules', 'Rule')], max_length=20)),
+                ('block_id', models.CharField(blank=True, help_text='ID of the StreamField block', max_length=64)),
+                ('position', models.PositiveIntegerField(default=0, help_text='Order of the rule within the page body')),
+                ('category', models.SlugField(blank=True, help_text='Slug of the rule category, empty for uncategorized rules', max_length=100)),
+                ('category_title', models.CharField(blank=True, max_length=100)),
+                ('category_description', models.TextField(blank=True)),
+                ('category_icon', models.CharField(blank=True, max_length=50)),
+                ('rule_number', models.CharField(blank=True, max_length=10)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, help_text='Rich text HTML of the rule, if any')),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailcore.page')),
+            ],
+            options={
+                'verbose_name': 'Rule Index Entry',
+                'verbose_name_plural': 'Rule Index Entries',
+                'ordering': ['page', 'position'],
+                'indexes': [models.Index(fields=['category', 'position'], name='cms_rule_category_idx'), models.Index(fields=['rule_number'], name='cms_rule_number_idx'), models.Index(fields=['page', 'position'], name='cms_rule_page_idx')],
+            },
+        ),
+    ]
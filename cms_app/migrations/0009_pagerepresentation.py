@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms_app', '0008_ruleindexentry'),
+        ('wagtailcore', '0095_groupsitepermission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageRepresentation',
+            fields=[
+                ('page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='wagtailcore.page')),
+                ('host', models.CharField(help_text='Host the absolute URLs in the representation were built for', max_length=255)),
+                ('revision_id', models.PositiveIntegerField(blank=True, help_text='Published revision it was computed from', null=True)),
+                ('data', models.JSONField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Page Representation',
+                'verbose_name_plural': 'Page Representations',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms_app', '0009_pagerepresentation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('object_type', models.CharField(choices=[('page', 'Page'), ('settings', 'Site Settings'), ('image', 'Image'), ('document', 'Document')], max_length=20)),
+                ('object_id', models.PositiveIntegerField(help_text='ID of the page, image or document, or the site of the settings')),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('unpublished', 'Unpublished'), ('deleted', 'Deleted')], max_length=20)),
+                ('site_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('url', models.CharField(blank=True, help_text='Public URL of the page, if any, at the time of the change', max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Change Log Entry',
+                'verbose_name_plural': 'Change Log Entries',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['object_type', 'object_id'], name='cms_change_object_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms_app', '0011_webhookendpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaDependency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_type', models.CharField(choices=[('page', 'Page'), ('settings', 'Site Settings')], max_length=20)),
+                ('source_id', models.PositiveIntegerField(help_text='ID of the page, or the site of the settings')),
+                ('kind', models.CharField(choices=[('image', 'Image'), ('document', 'Document')], max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Media Dependency',
+                'verbose_name_plural': 'Media Dependencies',
+                'indexes': [models.Index(fields=['kind', 'object_id'], name='cms_media_dependency_idx')],
+                'constraints': [models.UniqueConstraint(fields=('source_type', 'source_id', 'kind', 'object_id'), name='cms_media_dependency_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms_app', '0012_mediadependency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('duration', models.FloatField(help_text='Milliseconds')),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=500)),
+                ('url_name', models.CharField(blank=True, max_length=200)),
+                ('sql', models.TextField()),
+                ('params', models.TextField(blank=True)),
+                ('explain', models.TextField(blank=True, help_text='EXPLAIN output, for SELECT queries')),
+                ('stack', models.TextField(blank=True, help_text='cms_app frames that ran the query, innermost last')),
+            ],
+            options={
+                'verbose_name': 'Slow Query',
+                'verbose_name_plural': 'Slow Queries',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
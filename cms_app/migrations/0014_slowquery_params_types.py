@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:24
+
+from django.db import migrations, models
+
+
+def clear_params(apps, schema_editor):
+    """Drop the parameter values stored before only their types were kept"""
+    apps.get_model('cms_app', 'SlowQuery').objects.update(params='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms_app', '0013_slowquery'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='slowquery',
+            name='params',
+            field=models.TextField(blank=True, help_text='Parameter types; values are not stored'),
+        ),
+        migrations.RunPython(clear_params, migrations.RunPython.noop),
+    ]
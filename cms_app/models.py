@@ -10,6 +10,7 @@ from wagtail.models import Page, Orderable
 from wagtail.fields import RichTextField, StreamField
 from wagtail.admin.panels import FieldPanel, InlinePanel, MultiFieldPanel
 from wagtail.api import APIField
+from wagtail.search import index
 from wagtail.images.models import Image
 from wagtail.images.api.fields import ImageRenditionField
 from wagtail import blocks
@@ -24,6 +25,8 @@ from .blocks import (
     RuleDocumentBlock, OrganizerBlock, OrganizerStatBlock,
     SponsorBlock, ContactInfoBlock, SocialLinkBlock, NavigationItemBlock, CTABlock
 )
+from .editor import LazyStreamFieldPanel
+from .serializers import APIImageRenditionField, FEATURE_FILTER_SPEC
 from wagtail.contrib.settings.models import BaseSiteSetting, register_setting
 
 log = logging.getLogger(__name__)
@@ -39,6 +42,10 @@ class BasePage(Page):
     """
     show_in_menus_default = True
     
+    # The search index is updated on publish/unpublish (see cms_app.signals),
+    # not on every save, so saving drafts of large pages stays cheap
+    search_auto_update = False
+    
     class Meta:
         abstract = True
 
@@ -107,7 +114,7 @@ class HomePage(BasePage):
         ('cta', CTABlock(label='Call to Action')),
         ('rich_text', blocks.RichTextBlock(label='Rich Text Content')),
         ('html', blocks.RawHTMLBlock(label='Raw HTML')),
-    ], use_json_field=True, blank=True)
+    ], use_json_field=True, blank=True, collapsed=True)
     
     content_panels = BasePage.content_panels + [
         MultiFieldPanel([
@@ -115,14 +122,21 @@ class HomePage(BasePage):
             FieldPanel('hero_subtitle'),
             FieldPanel('hero_background'),
         ], heading="Hero Section"),
-        FieldPanel('body'),
+        # The body is large: block forms are loaded when opened
+        LazyStreamFieldPanel('body'),
+    ]
+    
+    search_fields = BasePage.search_fields + [
+        index.SearchField('hero_title'),
+        index.SearchField('hero_subtitle'),
+        index.SearchField('body'),
     ]
     
     # API Configuration
     api_fields = [
         APIField('hero_title'),
         APIField('hero_subtitle'),
-        APIField('hero_background', serializer=ImageRenditionField('fill-1920x1080')),
+        APIField('hero_background', serializer=APIImageRenditionField(FEATURE_FILTER_SPEC)),
         APIField('body'),
     ]
     
@@ -158,6 +172,13 @@ class AboutPage(BasePage):
         FieldPanel('body'),
     ]
     
+    search_fields = BasePage.search_fields + [
+        index.SearchField('intro'),
+        index.SearchField('mission'),
+        index.SearchField('vision'),
+        index.SearchField('body'),
+    ]
+    
     api_fields = [
         APIField('intro'),
         APIField('mission'),
@@ -191,6 +212,11 @@ class EventsPage(BasePage):
         FieldPanel('body'),
     ]
     
+    search_fields = BasePage.search_fields + [
+        index.SearchField('intro'),
+        index.SearchField('body'),
+    ]
+    
     api_fields = [
         APIField('intro'),
         APIField('body'),
@@ -222,6 +248,11 @@ class GalleryPage(BasePage):
         FieldPanel('body'),
     ]
     
+    search_fields = BasePage.search_fields + [
+        index.SearchField('intro'),
+        index.SearchField('body'),
+    ]
+    
     api_fields = [
         APIField('intro'),
         APIField('body'),
@@ -260,6 +291,12 @@ class VolunteerPage(BasePage):
         FieldPanel('body'),
     ]
     
+    search_fields = BasePage.search_fields + [
+        index.SearchField('intro'),
+        index.SearchField('requirements'),
+        index.SearchField('body'),
+    ]
+    
     api_fields = [
         APIField('intro'),
         APIField('requirements'),
@@ -293,6 +330,11 @@ class RulesPage(BasePage):
         FieldPanel('body'),
     ]
     
+    search_fields = BasePage.search_fields + [
+        index.SearchField('intro'),
+        index.SearchField('body'),
+    ]
+    
     api_fields = [
         APIField('intro'),
         APIField('body'),
@@ -328,6 +370,10 @@ class FlexiblePage(BasePage):
         FieldPanel('body'),
     ]
     
+    search_fields = BasePage.search_fields + [
+        index.SearchField('body'),
+    ]
+    
     api_fields = [
         APIField('body'),
     ]
@@ -403,7 +449,7 @@ class SiteSettings(BaseSiteSetting):
         APIField('site_name'),
         APIField('site_tagline'),
         APIField('site_description'),
-        APIField('site_logo', serializer=ImageRenditionField('fill-1920x1080')),
+        APIField('site_logo', serializer=APIImageRenditionField(FEATURE_FILTER_SPEC)),
         APIField('contact_info'),
         APIField('sponsors'),
         APIField('organizers'),
@@ -453,3 +499,275 @@ class SiteSettings(BaseSiteSetting):
         ], heading="Navigation Settings"),
     ]
 
+
+
+# ===============================================================================
+# Image Metadata - Placeholders for progressive image loading
+# ===============================================================================
+
+class ImageMetadata(models.Model):
+    """
+    Placeholder data computed once per image upload (see cms_app.images)
+    """
+    image = models.OneToOneField(
+        'wagtailimages.Image',
+        on_delete=models.CASCADE,
+        related_name='arc_metadata'
+    )
+    placeholder = models.TextField(blank=True, help_text="Base64 data URI of a tiny thumbnail")
+    dominant_color = models.CharField(max_length=7, blank=True, help_text="Hex colour, e.g. #1a2b3c")
+    source_hash = models.CharField(max_length=40, blank=True, help_text="file_hash of the image the data was computed from")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Image Metadata"
+        verbose_name_plural = "Image Metadata"
+    
+    def __str__(self):
+        return f"Metadata for image {self.image_id}"
+
+
+# ===============================================================================
+# Event Index - Published events projected out of page StreamFields
+# ===============================================================================
+
+class EventIndexEntry(models.Model):
+    """
+    One row per event block of a published page (see cms_app.projections).
+    Rebuilt on publish, so event listings are plain indexed queries.
+    """
+    SOURCE_CHOICES = [
+        ('event_details', 'Event Detail'),
+        ('events', 'Event'),
+    ]
+    
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name='+')
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    block_id = models.CharField(max_length=64, blank=True, help_text="ID of the StreamField block")
+    item_id = models.CharField(max_length=64, blank=True, help_text="ID of the event within the block")
+    position = models.PositiveIntegerField(default=0, help_text="Order of the event within the page body")
+    
+    title = models.CharField(max_length=255)
+    date = models.DateField(null=True, blank=True, help_text="Normalized event date")
+    time = models.TimeField(null=True, blank=True, help_text="Normalized start time")
+    date_text = models.CharField(max_length=100, blank=True, help_text="Date as entered by the editor")
+    time_text = models.CharField(max_length=100, blank=True, help_text="Time as entered by the editor")
+    location = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=50, blank=True)
+    participants = models.CharField(max_length=100, blank=True)
+    description = models.TextField(blank=True)
+    link = models.URLField(max_length=500, blank=True)
+    image = models.ForeignKey(
+        'wagtailimages.Image',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+'
+    )
+    
+    class Meta:
+        verbose_name = "Event Index Entry"
+        verbose_name_plural = "Event Index Entries"
+        ordering = ['date', 'time', 'position']
+        indexes = [
+            models.Index(fields=['date', 'time'], name='cms_event_date_idx'),
+            models.Index(fields=['location'], name='cms_event_location_idx'),
+            models.Index(fields=['status', 'date'], name='cms_event_status_idx'),
+            models.Index(fields=['page', 'position'], name='cms_event_page_idx'),
+        ]
+    
+    def __str__(self):
+        return self.title
+
+
+class RuleIndexEntry(models.Model):
+    """
+    One row per rule of a published page (see cms_app.projections), keyed by
+    category and rule number so single rules can be looked up directly.
+    """
+    SOURCE_CHOICES = [
+        ('rule_categories', 'Rule Category'),
+        ('general_rules', 'General Rule'),
+        ('rules', 'Rule'),
+    ]
+    
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name='+')
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    block_id = models.CharField(max_length=64, blank=True, help_text="ID of the StreamField block")
+    position = models.PositiveIntegerField(default=0, help_text="Order of the rule within the page body")
+    
+    category = models.SlugField(max_length=100, blank=True, help_text="Slug of the rule category, empty for uncategorized rules")
+    category_title = models.CharField(max_length=100, blank=True)
+    category_description = models.TextField(blank=True)
+    category_icon = models.CharField(max_length=50, blank=True)
+    
+    rule_number = models.CharField(max_length=10, blank=True)
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True, help_text="Rich text HTML of the rule, if any")
+    
+    class Meta:
+        verbose_name = "Rule Index Entry"
+        verbose_name_plural = "Rule Index Entries"
+        ordering = ['page', 'position']
+        indexes = [
+            models.Index(fields=['category', 'position'], name='cms_rule_category_idx'),
+            models.Index(fields=['rule_number'], name='cms_rule_number_idx'),
+            models.Index(fields=['page', 'position'], name='cms_rule_page_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.rule_number} {self.title}".strip()
+
+
+class PageRepresentation(models.Model):
+    """
+    The pages API detail representation of a published page, computed when it
+    is published (see cms_app.representations) and served as stored.
+    """
+    page = models.OneToOneField(Page, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    host = models.CharField(max_length=255, help_text="Host the absolute URLs in the representation were built for")
+    revision_id = models.PositiveIntegerField(null=True, blank=True, help_text="Published revision it was computed from")
+    data = models.JSONField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Page Representation"
+        verbose_name_plural = "Page Representations"
+    
+    def __str__(self):
+        return f"API representation of page {self.page_id}"
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only log of published content changes. Its id is the cursor of the
+    changes API, so clients can sync incrementally (see cms_app.changes).
+    """
+    PAGE = 'page'
+    SETTINGS = 'settings'
+    IMAGE = 'image'
+    DOCUMENT = 'document'
+    OBJECT_TYPE_CHOICES = [
+        (PAGE, 'Page'),
+        (SETTINGS, 'Site Settings'),
+        (IMAGE, 'Image'),
+        (DOCUMENT, 'Document'),
+    ]
+    
+    CREATED = 'created'
+    UPDATED = 'updated'
+    UNPUBLISHED = 'unpublished'
+    DELETED = 'deleted'
+    ACTION_CHOICES = [
+        (CREATED, 'Created'),
+        (UPDATED, 'Updated'),
+        (UNPUBLISHED, 'Unpublished'),
+        (DELETED, 'Deleted'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    object_type = models.CharField(max_length=20, choices=OBJECT_TYPE_CHOICES)
+    object_id = models.PositiveIntegerField(help_text="ID of the page, image or document, or the site of the settings")
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    site_id = models.PositiveIntegerField(null=True, blank=True)
+    url = models.CharField(max_length=500, blank=True, help_text="Public URL of the page, if any, at the time of the change")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        verbose_name = "Change Log Entry"
+        verbose_name_plural = "Change Log Entries"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['object_type', 'object_id'], name='cms_change_object_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.object_type} {self.object_id} {self.action}"
+
+
+class WebhookEndpoint(models.Model):
+    """
+    A client notified of content changes by the dispatch_webhooks command.
+    Deliveries are signed with the secret and resume from the cursor.
+    """
+    name = models.CharField(max_length=100)
+    url = models.URLField(max_length=500)
+    secret = models.CharField(max_length=255, help_text="Shared secret used to sign the payloads (HMAC-SHA256)")
+    is_active = models.BooleanField(default=True)
+    cursor = models.BigIntegerField(default=0, help_text="Last change log entry delivered")
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    last_success_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    class Meta:
+        verbose_name = "Webhook Endpoint"
+        verbose_name_plural = "Webhook Endpoints"
+    
+    def __str__(self):
+        return self.name
+
+
+class MediaDependency(models.Model):
+    """
+    An image or document referenced by the published content of a page or by
+    the settings of a site, so a change to it purges what it appears in
+    (see cms_app.purge).
+    """
+    PAGE = 'page'
+    SETTINGS = 'settings'
+    SOURCE_TYPE_CHOICES = [
+        (PAGE, 'Page'),
+        (SETTINGS, 'Site Settings'),
+    ]
+    
+    IMAGE = 'image'
+    DOCUMENT = 'document'
+    KIND_CHOICES = [
+        (IMAGE, 'Image'),
+        (DOCUMENT, 'Document'),
+    ]
+    
+    source_type = models.CharField(max_length=20, choices=SOURCE_TYPE_CHOICES)
+    source_id = models.PositiveIntegerField(help_text="ID of the page, or the site of the settings")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    
+    class Meta:
+        verbose_name = "Media Dependency"
+        verbose_name_plural = "Media Dependencies"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source_type', 'source_id', 'kind', 'object_id'], name='cms_media_dependency_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'object_id'], name='cms_media_dependency_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.source_type} {self.source_id} uses {self.kind} {self.object_id}"
+
+
+class SlowQuery(models.Model):
+    """
+    A database query that took longer than SLOW_QUERY_THRESHOLD during a
+    request, with its plan and the cms_app code that ran it
+    (see cms_app.slow_queries).
+    """
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    duration = models.FloatField(help_text="Milliseconds")
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    url_name = models.CharField(max_length=200, blank=True)
+    sql = models.TextField()
+    params = models.TextField(blank=True, help_text="Parameter types; values are not stored")
+    explain = models.TextField(blank=True, help_text="EXPLAIN output, for SELECT queries")
+    stack = models.TextField(blank=True, help_text="cms_app frames that ran the query, innermost last")
+    
+    class Meta:
+        verbose_name = "Slow Query"
+        verbose_name_plural = "Slow Queries"
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.duration:.0f} ms {self.url_name or self.path}"
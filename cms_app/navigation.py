@@ -0,0 +1,124 @@
+"""
+Site navigation tree
+
+Combines the SiteSettings navigation items (in-page sections, sorted by their
+"order") with the live pages marked "show in menus", as one ordered tree. The
+tree is built on the first request and refreshed after the next publish,
+unpublish, move or settings save (see cms_app.signals and cms_app.cache).
+
+Each language has its own tree: pages come from the translation of the site
+root into that language when there is one (see cms_app.locales).
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+
+from .cache import envelope_timeout, get_payload
+from .locales import get_languages, localize_page
+
+CACHE_KEY = 'cms_app:navigation:{site_id}:{language}'
+
+
+def get_navigation(site, language):
+    """Return the cached navigation tree of a site in a language, building it if needed"""
+    key = CACHE_KEY.format(site_id=site.pk, language=language)
+
+    def build():
+        with translation.override(language):
+            return build_navigation(site, language)
+
+    return get_payload(
+        key,
+        build,
+        load=lambda: cache.get(key),
+        store=lambda envelope: cache.set(key, envelope, timeout=envelope_timeout(envelope)),
+    )
+
+
+def invalidate_navigation():
+    """Drop the cached navigation of every site and language"""
+    from wagtail.models import Site
+
+    cache.delete_many([
+        CACHE_KEY.format(site_id=pk, language=language)
+        for pk in Site.objects.values_list('pk', flat=True)
+        for language in get_languages()
+    ])
+
+
+def build_navigation(site, language):
+    from .models import SiteSettings
+
+    site_settings = SiteSettings.for_site(site)
+    items = []
+    section_ids = set()
+    nav_items = [block.value for block in site_settings.navigation_items if block.block_type == 'nav_item']
+    for position, value in sorted(enumerate(nav_items), key=lambda item: (item[1]['order'] or 0, item[0])):
+        section_ids.add(value['section_id'])
+        items.append({
+            'type': 'section',
+            'label': value['label'],
+            'section_id': value['section_id'],
+            'url': f'#{value["section_id"]}',
+            'order': value['order'] or 0,
+            'children': [],
+        })
+
+    root = localize_page(site.root_page, language)
+    pages = build_page_tree(root, site, settings.NAVIGATION_MAX_DEPTH)
+    for page_item in pages:
+        # A section of the same name links to the page and shows its sub pages
+        section = next(
+            (item for item in items if item['type'] == 'section' and item['section_id'] == page_item['slug']),
+            None,
+        )
+        if section is not None:
+            section['page_id'] = page_item['page_id']
+            section['children'] = page_item['children']
+        else:
+            items.append(page_item)
+
+    return {
+        'site_id': site.pk,
+        'language': language,
+        'show_login_button': site_settings.show_login_button,
+        'login_button_text': site_settings.login_button_text,
+        'login_url': site_settings.login_url,
+        'items': items,
+    }
+
+
+def build_page_tree(root, site, max_depth):
+    """Menu pages below ``root``, down to ``max_depth`` levels, in tree order"""
+    from wagtail.models import Page
+
+    pages = (
+        Page.objects.descendant_of(root)
+        .filter(depth__lte=root.depth + max_depth)
+        .live()
+        .public()
+        .in_menu()
+        .order_by('path')
+    )
+
+    nodes = {}
+    top_level = []
+    for page in pages:
+        node = {
+            'type': 'page',
+            'label': page.title,
+            'page_id': page.pk,
+            'slug': page.slug,
+            'url': page.get_url(),
+            'children': [],
+        }
+        nodes[page.path] = node
+        if page.depth == root.depth + 1:
+            top_level.append(node)
+        else:
+            parent = nodes.get(page.path[:-page.steplen])
+            # Pages below a page that isn't in the menu are left out
+            if parent is not None:
+                parent['children'].append(node)
+    return top_level
@@ -0,0 +1,243 @@
+"""
+Publish-time projections of StreamField content into indexed tables
+
+Each projection reads the raw JSON of a published page's body and replaces
+that page's rows in its table, so API endpoints can answer with plain indexed
+queries instead of deserializing StreamFields on every request.
+"""
+
+import logging
+import re
+from datetime import date as date_type
+from datetime import datetime
+from datetime import time as time_type
+
+from django.db import transaction
+from django.utils.text import slugify
+from wagtail.images import get_image_model
+
+from .purge import clear_page_dependencies, record_page_dependencies
+from .representations import clear_representation, materialize_page
+
+log = logging.getLogger(__name__)
+
+DATE_DEFAULTS = (datetime(2000, 1, 1), datetime(2001, 2, 2))
+
+# First clock time in free text such as "9:00 AM - 5:00 PM" or "14:30"
+TIME_PATTERN = re.compile(r'\d{1,2}(?::\d{2})?\s*(?:[ap]\.?m\.?)?', re.IGNORECASE)
+
+
+def iter_body_items(page, block_types):
+    """
+    Yield ``(block_type, block_id, item_id, value)`` for every item of the
+    ListBlocks of ``block_types`` in a page's body, using the raw JSON.
+    """
+    body = getattr(page, 'body', None)
+    if body is None:
+        return
+
+    for block in body.get_prep_value():
+        if block.get('type') not in block_types:
+            continue
+        for item_id, value in _iter_list_values(block.get('value')):
+            yield block['type'], block.get('id', ''), item_id, value
+
+
+def _iter_list_values(items):
+    """Yield ``(item_id, value)`` for the raw items of a nested ListBlock"""
+    for item in items or []:
+        if isinstance(item, dict) and item.get('type') == 'item' and 'value' in item:
+            yield item.get('id', ''), item['value']
+        else:
+            yield '', item
+
+
+def parse_event_date(value):
+    """
+    Normalize an ISO date or a date such as "March 15, 2025" to a date. Text
+    missing the year, month or day ("March 15", "2024") gives None rather
+    than a date completed from today.
+    """
+    if not value:
+        return None
+    if isinstance(value, date_type):
+        return value
+    from dateutil import parser as date_parser
+
+    # Parsing with two defaults that differ in every field shows whether any was filled in
+    try:
+        dates = {date_parser.parse(str(value), default=default).date() for default in DATE_DEFAULTS}
+    except (ValueError, OverflowError, TypeError):
+        return None
+    return dates.pop() if len(dates) == 1 else None
+
+
+def parse_event_time(value):
+    """Normalize an ISO time or free text such as "9:00 AM - 5:00 PM" to its start time"""
+    if not value:
+        return None
+    if isinstance(value, time_type):
+        return value
+    match = TIME_PATTERN.search(str(value))
+    if not match or not re.search(r':|[ap]\.?m', match.group(0), re.IGNORECASE):
+        return None
+    from dateutil import parser as date_parser
+
+    try:
+        return date_parser.parse(match.group(0)).time()
+    except (ValueError, OverflowError):
+        return None
+
+
+# ===================================================
+# Events
+# ===================================================
+
+def project_events(page):
+    """Replace the EventIndexEntry rows of a published page"""
+    from .models import EventIndexEntry
+
+    entries = []
+    for position, (source, block_id, item_id, value) in enumerate(
+        iter_body_items(page, ['event_details', 'events'])
+    ):
+        if source == 'event_details':
+            link = value.get('button_link') or ''
+        else:
+            link = value.get('registration_link') or ''
+
+        entries.append(EventIndexEntry(
+            page_id=page.pk,
+            source=source,
+            block_id=block_id or '',
+            item_id=item_id or '',
+            position=position,
+            title=(value.get('title') or '').strip()[:255],
+            date=parse_event_date(value.get('date')),
+            time=parse_event_time(value.get('time')),
+            date_text=str(value.get('date') or '')[:100],
+            time_text=str(value.get('time') or '')[:100],
+            location=(value.get('location') or '').strip()[:255],
+            status=(value.get('status') or '').strip()[:50],
+            participants=(value.get('participants') or '').strip()[:100],
+            description=value.get('description') or '',
+            link=link[:500],
+            image_id=value.get('image') or None,
+        ))
+
+    # The JSON keeps the ids of deleted images, which the foreign key would reject
+    image_ids = {entry.image_id for entry in entries if entry.image_id}
+    existing = set(get_image_model().objects.filter(pk__in=image_ids).values_list('pk', flat=True))
+    for entry in entries:
+        if entry.image_id not in existing:
+            entry.image_id = None
+
+    with transaction.atomic():
+        EventIndexEntry.objects.filter(page_id=page.pk).delete()
+        EventIndexEntry.objects.bulk_create(entries)
+    return len(entries)
+
+
+def clear_events(page):
+    from .models import EventIndexEntry
+
+    EventIndexEntry.objects.filter(page_id=page.pk).delete()
+
+
+# ===================================================
+# Rules
+# ===================================================
+
+GENERAL_RULES_CATEGORY = 'general'
+
+
+def project_rules(page):
+    """
+    Replace the RuleIndexEntry rows of a published page: one row per rule of
+    the rule_categories, general_rules and rules blocks
+    """
+    from .models import RuleIndexEntry
+
+    entries = []
+
+    def add(source, block_id, **fields):
+        entries.append(RuleIndexEntry(
+            page_id=page.pk,
+            source=source,
+            block_id=block_id or '',
+            position=len(entries),
+            **fields,
+        ))
+
+    for source, block_id, _, value in iter_body_items(page, ['rule_categories', 'general_rules', 'rules']):
+        if source == 'rule_categories':
+            category = {
+                'category': slugify(value.get('title') or '')[:100],
+                'category_title': (value.get('title') or '')[:100],
+                'category_description': value.get('description') or '',
+                'category_icon': (value.get('icon_name') or '')[:50],
+            }
+            for number, (_, rule) in enumerate(_iter_list_values(value.get('rules')), start=1):
+                add(source, block_id, rule_number=str(number), title=str(rule)[:255], **category)
+        elif source == 'general_rules':
+            add(
+                source, block_id,
+                category=GENERAL_RULES_CATEGORY,
+                category_title='General Rules',
+                title=str(value)[:255],
+            )
+        else:
+            add(
+                source, block_id,
+                rule_number=(value.get('rule_number') or '').strip()[:10],
+                title=(value.get('title') or '').strip()[:255],
+                description=value.get('description') or '',
+            )
+
+    # Number general rules within their own category, as the frontend lists them
+    general = [entry for entry in entries if entry.source == 'general_rules']
+    for number, entry in enumerate(general, start=1):
+        entry.rule_number = str(number)
+
+    with transaction.atomic():
+        RuleIndexEntry.objects.filter(page_id=page.pk).delete()
+        RuleIndexEntry.objects.bulk_create(entries)
+    return len(entries)
+
+
+def clear_rules(page):
+    from .models import RuleIndexEntry
+
+    RuleIndexEntry.objects.filter(page_id=page.pk).delete()
+
+
+# ===================================================
+# Registry
+# ===================================================
+
+# name -> (project, clear)
+PROJECTIONS = {
+    'representations': (materialize_page, clear_representation),
+    'events': (project_events, clear_events),
+    'rules': (project_rules, clear_rules),
+    'dependencies': (record_page_dependencies, clear_page_dependencies),
+}
+
+
+def project_page(page, only=None):
+    """Run every projection (or those named in ``only``) for a published page"""
+    counts = {}
+    for name, (project, _) in PROJECTIONS.items():
+        if only and name not in only:
+            continue
+        try:
+            counts[name] = project(page)
+        except Exception:
+            log.exception('Projection "%s" failed for page %s', name, page.pk)
+    return counts
+
+
+def clear_page(page):
+    """Remove an unpublished or deleted page from every projection"""
+    for _, clear in PROJECTIONS.values():
+        clear(page)
@@ -0,0 +1,244 @@
+"""
+Dependency tracking and batched CDN purges
+
+The images and documents referenced by each published page and by each site's
+settings are recorded in MediaDependency. When content changes, only the URLs
+that can serve it are purged:
+
+    page published, unpublished or deleted   its page URL and pages API URL
+                                             (and the navigation, if shown in menus)
+    site settings saved                      the settings and navigation API URLs
+    image or document saved or deleted       its file and API URLs, and the URLs
+                                             of the pages and settings using it
+    rendition deleted                        its file URL
+    page moved, or its slug changed          the URLs of the page and its descendants
+
+Rendition URLs only change content when the image file is replaced, and
+Wagtail deletes the renditions of a replaced file, so they are purged then.
+
+URLs queued during a transaction are purged together once it commits, in
+batches of CDN_PURGE_BATCH_SIZE, through the backend named by CDN_PURGE_BACKEND.
+URLs queued in a transaction that rolls back go out with the next batch, which
+costs an extra purge but never leaves stale content.
+"""
+
+import functools
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from .media_urls import document_url, image_url, rendition_url
+from .references import DOCUMENT, IMAGE, iter_instance_references
+
+log = logging.getLogger(__name__)
+
+PAGE = 'page'
+SETTINGS = 'settings'
+
+
+# ===================================================
+# Dependencies
+# ===================================================
+
+def record_dependencies(source_type, source_id, instance):
+    """Replace the recorded image/document references of a page or site settings"""
+    from .models import MediaDependency
+
+    references = set(iter_instance_references(instance))
+    with transaction.atomic():
+        MediaDependency.objects.filter(source_type=source_type, source_id=source_id).delete()
+        MediaDependency.objects.bulk_create([
+            MediaDependency(source_type=source_type, source_id=source_id, kind=kind, object_id=object_id)
+            for kind, object_id in references
+        ])
+    return len(references)
+
+
+def clear_dependencies(source_type, source_id):
+    from .models import MediaDependency
+
+    MediaDependency.objects.filter(source_type=source_type, source_id=source_id).delete()
+
+
+def record_page_dependencies(page):
+    return record_dependencies(PAGE, page.pk, page)
+
+
+def clear_page_dependencies(page):
+    clear_dependencies(PAGE, page.pk)
+
+
+def record_settings_dependencies(site_settings):
+    return record_dependencies(SETTINGS, site_settings.site_id, site_settings)
+
+
+def get_dependents(kind, object_id):
+    """``(source_type, source_id)`` of the pages and settings referencing an image or document"""
+    from .models import MediaDependency
+
+    return list(
+        MediaDependency.objects.filter(kind=kind, object_id=object_id).values_list('source_type', 'source_id')
+    )
+
+
+# ===================================================
+# URLs
+# ===================================================
+
+def _absolute(url, root_url):
+    return root_url + url if url.startswith('/') else url
+
+
+def _root_urls():
+    from wagtail.models import Site
+
+    return [site.root_url for site in Site.objects.order_by('-is_default_site', 'pk')]
+
+
+def page_urls(page):
+    """Public and API URLs of a page"""
+    url_parts = page.get_url_parts()
+    if url_parts is None:
+        return []
+    _, root_url, page_path = url_parts
+    urls = [root_url + page_path, root_url + reverse('wagtailapi:pages:detail', args=[page.pk])]
+    if page.show_in_menus:
+        urls.append(root_url + reverse('navigation'))
+    return urls
+
+
+def settings_urls(site):
+    return [site.root_url + reverse('site-settings'), site.root_url + reverse('navigation')]
+
+
+def media_urls(kind, obj):
+    """File and API URLs of an image or document, on every site (they are shared)"""
+    root_urls = _root_urls()
+    if not root_urls:
+        return []
+    file_url = image_url(obj) if kind == IMAGE else document_url(obj)
+    endpoint = 'images' if kind == IMAGE else 'documents'
+    api_path = reverse(f'wagtailapi:{endpoint}:detail', args=[obj.pk])
+    return [_absolute(file_url, root_urls[0])] + [root_url + api_path for root_url in root_urls]
+
+
+def dependent_urls(kind, object_id):
+    """URLs of the published pages and site settings referencing an image or document"""
+    from wagtail.models import Page, Site
+
+    dependents = get_dependents(kind, object_id)
+    page_ids = [source_id for source_type, source_id in dependents if source_type == PAGE]
+    site_ids = [source_id for source_type, source_id in dependents if source_type == SETTINGS]
+
+    urls = []
+    for page in Page.objects.live().filter(pk__in=page_ids):
+        urls.extend(page_urls(page))
+    for site in Site.objects.filter(pk__in=site_ids):
+        urls.extend(settings_urls(site))
+    return urls
+
+
+# ===================================================
+# Purging
+# ===================================================
+
+_pending = threading.local()
+
+
+def purge_urls(urls):
+    """
+    Queue URLs to purge once the current transaction commits; URLs queued in
+    the same transaction are deduplicated and purged together
+    """
+    if not hasattr(_pending, 'urls'):
+        _pending.urls = {}
+    _pending.urls.update(dict.fromkeys(urls))
+    # Only the first callback to run after the commit finds anything to purge
+    transaction.on_commit(flush_purges)
+
+
+def flush_purges():
+    """Send the queued URLs to the purge backend in batches"""
+    urls = list(getattr(_pending, 'urls', {}))
+    _pending.urls = {}
+    backend = get_purge_backend()
+    if not urls or backend is None:
+        return
+
+    batch_size = settings.CDN_PURGE_BATCH_SIZE
+    for start in range(0, len(urls), batch_size):
+        batch = urls[start:start + batch_size]
+        try:
+            backend.purge(batch)
+        except Exception:
+            log.exception('Purging %d URLs failed', len(batch))
+
+
+def purge_page(page):
+    purge_urls(page_urls(page))
+
+
+def purge_settings(site):
+    purge_urls(settings_urls(site))
+
+
+def purge_media(kind, obj):
+    purge_urls(media_urls(kind, obj) + dependent_urls(kind, obj.pk))
+
+
+def purge_rendition(rendition):
+    root_urls = _root_urls()
+    if root_urls:
+        purge_urls([_absolute(rendition_url(rendition), root_urls[0])])
+
+
+# ===================================================
+# Backends
+# ===================================================
+
+class PurgeBackend:
+    """Sends a batch of absolute URLs to a CDN or cache to purge"""
+
+    def purge(self, urls):
+        raise NotImplementedError
+
+
+class FrontendCachePurgeBackend(PurgeBackend):
+    """Purges through the backends configured in WAGTAILFRONTENDCACHE (Cloudflare, CloudFront, Varnish, ...)"""
+
+    def purge(self, urls):
+        from wagtail.contrib.frontend_cache.utils import purge_urls_from_cache
+
+        purge_urls_from_cache(urls)
+
+
+class LocalPurgeBackend(PurgeBackend):
+    """Records purged batches in memory instead of calling a CDN, for tests and local development"""
+    batches = []
+
+    def purge(self, urls):
+        log.info('Purge: %s', ', '.join(urls))
+        self.batches.append(list(urls))
+
+    @classmethod
+    def purged_urls(cls):
+        return [url for batch in cls.batches for url in batch]
+
+    @classmethod
+    def reset(cls):
+        cls.batches.clear()
+
+
+@functools.lru_cache(maxsize=None)
+def _load_backend(path):
+    return import_string(path)()
+
+
+def get_purge_backend():
+    """The configured purge backend, or None when purging is disabled"""
+    path = settings.CDN_PURGE_BACKEND
+    return _load_backend(path) if path else None
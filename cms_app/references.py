@@ -0,0 +1,115 @@
+"""
+Helpers for finding which images and documents content refers to
+
+These work on the raw JSON stored for StreamFields (and in revisions), so no
+image or document rows are fetched while walking content.
+"""
+
+import json
+
+from django.db import models
+from wagtail import blocks
+from wagtail.blocks import StreamValue
+from wagtail.documents import get_document_model
+from wagtail.documents.blocks import DocumentChooserBlock
+from wagtail.fields import RichTextField, StreamField
+from wagtail.images import get_image_model
+from wagtail.images.blocks import ImageChooserBlock
+from wagtail.rich_text import extract_references_from_rich_text
+
+IMAGE = 'image'
+DOCUMENT = 'document'
+
+
+def _reference_kind(model):
+    if issubclass(model, get_image_model()):
+        return IMAGE
+    if issubclass(model, get_document_model()):
+        return DOCUMENT
+    return None
+
+
+def iter_rich_text_references(html):
+    """Yield ``(kind, id)`` tuples for images embedded and documents linked in rich text"""
+    if not html:
+        return
+    for model, object_id, _, _ in extract_references_from_rich_text(html):
+        kind = _reference_kind(model)
+        if kind:
+            yield kind, int(object_id)
+
+
+def iter_block_references(block, raw_value):
+    """
+    Yield ``(kind, id)`` tuples for every image or document chosen within
+    the raw (JSON) value of a block.
+    """
+    if raw_value is None or raw_value == '':
+        return
+
+    if isinstance(block, ImageChooserBlock):
+        yield IMAGE, int(raw_value)
+    elif isinstance(block, DocumentChooserBlock):
+        yield DOCUMENT, int(raw_value)
+    elif isinstance(block, blocks.RichTextBlock):
+        yield from iter_rich_text_references(raw_value)
+    elif isinstance(block, blocks.StreamBlock):
+        for child in raw_value:
+            child_block = block.child_blocks.get(child.get('type'))
+            if child_block is not None:
+                yield from iter_block_references(child_block, child.get('value'))
+    elif isinstance(block, blocks.ListBlock):
+        for item in raw_value:
+            # ListBlock items are stored as {"type": "item", "value": ..., "id": ...}
+            # since Wagtail 2.16, but older content may still hold plain values
+            if isinstance(item, dict) and item.get('type') == 'item' and 'value' in item:
+                item = item['value']
+            yield from iter_block_references(block.child_block, item)
+    elif isinstance(block, blocks.StructBlock):
+        for name, child_block in block.child_blocks.items():
+            yield from iter_block_references(child_block, raw_value.get(name))
+
+
+def iter_field_references(model, data):
+    """
+    Yield ``(kind, id)`` tuples for the image/document references held in the
+    fields of ``model``. ``data`` maps field names to their raw stored values,
+    as found in ``Revision.content`` or a ``values()`` queryset.
+    """
+    for field in model._meta.concrete_fields:
+        if isinstance(field, StreamField):
+            raw = data.get(field.attname, data.get(field.name))
+            if isinstance(raw, StreamValue):
+                # Values read from the database keep their raw JSON until accessed
+                raw = raw.get_prep_value()
+            elif isinstance(raw, str):
+                raw = json.loads(raw) if raw else []
+            if raw:
+                yield from iter_block_references(field.stream_block, raw)
+        elif isinstance(field, RichTextField):
+            yield from iter_rich_text_references(data.get(field.attname))
+        elif isinstance(field, models.ForeignKey):
+            kind = _reference_kind(field.related_model)
+            object_id = data.get(field.attname, data.get(field.name))
+            if kind and object_id:
+                yield kind, int(object_id)
+
+
+def get_referencing_fields(model):
+    """Names of the fields of ``model`` that can hold image/document references"""
+    return [
+        field.attname
+        for field in model._meta.concrete_fields
+        if isinstance(field, (StreamField, RichTextField))
+        or (isinstance(field, models.ForeignKey) and _reference_kind(field.related_model))
+    ]
+
+
+def iter_instance_references(instance):
+    """Yield ``(kind, id)`` tuples for a saved model instance (page or setting)"""
+    model = type(instance)
+    data = {}
+    for field in model._meta.concrete_fields:
+        if isinstance(field, (StreamField, RichTextField, models.ForeignKey)):
+            data[field.attname] = getattr(instance, field.attname)
+    yield from iter_field_references(model, data)
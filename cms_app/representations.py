@@ -0,0 +1,135 @@
+"""
+Publish-time API representations of pages
+
+The pages API detail representation of a page is computed once when the page
+is published, by running the standard PagesAPIViewSet against a request for the
+page's site, and stored in PageRepresentation. ArcPagesAPIViewSet then serves
+the stored JSON instead of deserializing the body and looking up renditions on
+every read. Registered as a projection, so it follows publish and unpublish.
+
+Representations are rendered in the language of the page's locale, whatever
+language the publishing editor's admin happens to use.
+
+Page and API URLs in a representation are built from the site's root URL, as
+the live view builds them. Media URLs are made absolute against the request
+host when no CDN host is configured, so they are stored against a placeholder
+host and completed for each request (see resolve_hosts()), and a stored
+representation serves any host the API is reached on.
+
+Besides publishing, a representation is stored again when an image or
+document it uses changes (its rendition URLs may be gone) and when the page or
+an ancestor is moved or changes slug (its URL and parent change).
+"""
+
+import json
+import logging
+import threading
+
+from django.core.exceptions import DisallowedHost
+from django.db import transaction
+from django.utils import translation
+
+log = logging.getLogger(__name__)
+
+# Stands for the request host in stored media URLs
+HOST_PLACEHOLDER = 'request-host.invalid'
+PLACEHOLDER_ORIGINS = (f'http://{HOST_PLACEHOLDER}', f'https://{HOST_PLACEHOLDER}')
+
+
+def site_request(site, path):
+    """A GET request for ``path`` as if made to ``site``"""
+    from django.test import RequestFactory
+
+    port = site.port
+    return RequestFactory().get(
+        path,
+        SERVER_NAME=site.hostname,
+        SERVER_PORT=str(port),
+        secure=port == 443,
+    )
+
+
+def materialize_page(page):
+    """Store the API representation of a published page"""
+    from rest_framework.renderers import JSONRenderer
+    from wagtail.api.v2.views import PagesAPIViewSet
+
+    from .api import api_router
+    from .models import PageRepresentation
+
+    site = page.get_site()
+    if site is None or not page.live:
+        clear_representation(page)
+        return 0
+
+    request = site_request(site, f'/api/v2/pages/{page.pk}/')
+    request.wagtailapi_router = api_router
+    try:
+        host = request.get_host()
+        # The site is resolved from the real host; absolute media URLs get the placeholder
+        request._wagtail_site = site
+        request.get_host = lambda: HOST_PLACEHOLDER
+        # The standard view, not ArcPagesAPIViewSet, so it never reads a stale row
+        with translation.override(page.locale.language_code):
+            response = PagesAPIViewSet.as_view({'get': 'detail_view'})(request, pk=page.pk)
+    except DisallowedHost:
+        log.warning('Not storing the API representation of page %s: %s is not an allowed host', page.pk, site.hostname)
+        return 0
+
+    if response.status_code != 200:
+        clear_representation(page)
+        return 0
+
+    PageRepresentation.objects.update_or_create(
+        page_id=page.pk,
+        defaults={
+            'host': host,
+            'revision_id': page.live_revision_id,
+            'data': json.loads(JSONRenderer().render(response.data)),
+        },
+    )
+    return 1
+
+
+def resolve_hosts(data, request):
+    """A stored representation with its media URLs made absolute against the request host"""
+    if isinstance(data, dict):
+        return {key: resolve_hosts(value, request) for key, value in data.items()}
+    if isinstance(data, list):
+        return [resolve_hosts(value, request) for value in data]
+    if isinstance(data, str) and data.startswith(PLACEHOLDER_ORIGINS):
+        return request.build_absolute_uri(data.split(HOST_PLACEHOLDER, 1)[1])
+    return data
+
+
+_pending = threading.local()
+
+
+def rematerialize_pages(page_ids):
+    """
+    Queue pages whose representation must be stored again once the current
+    transaction commits; each page is materialized once per transaction
+    """
+    if not hasattr(_pending, 'page_ids'):
+        _pending.page_ids = set()
+    _pending.page_ids.update(page_ids)
+    # Only the first callback to run after the commit finds anything to do
+    transaction.on_commit(flush_rematerialize)
+
+
+def flush_rematerialize():
+    from wagtail.models import Page
+
+    page_ids = getattr(_pending, 'page_ids', set())
+    _pending.page_ids = set()
+    for page in Page.objects.live().filter(pk__in=page_ids).specific():
+        try:
+            materialize_page(page)
+        except Exception:
+            log.exception('Storing the API representation of page %s failed', page.pk)
+
+
+def clear_representation(page):
+    from .models import PageRepresentation
+
+    PageRepresentation.objects.filter(page_id=page.pk).delete()
@@ -0,0 +1,106 @@
+"""
+Shared API serialization helpers for images and documents
+"""
+
+from collections import OrderedDict
+
+from rest_framework.fields import Field
+from wagtail.images.api.fields import ImageRenditionField
+from wagtail.images.models import SourceImageIOError
+from wagtail.images.utils import to_svg_safe_spec
+
+from .images import placeholder_fields
+from .media_urls import document_url, image_url, rendition_url
+
+# Renditions included in every full image representation
+THUMBNAIL_FILTER_SPEC = 'max-500x500'
+LARGE_FILTER_SPEC = 'max-1920x1080'
+# Filter spec of the hero_background / site_logo rendition fields
+FEATURE_FILTER_SPEC = 'fill-1920x1080'
+
+# Renditions the API asks for, worth generating ahead of time
+STANDARD_FILTER_SPECS = [THUMBNAIL_FILTER_SPEC, LARGE_FILTER_SPEC, FEATURE_FILTER_SPEC]
+
+
+def image_representation(image, request=None):
+    """
+    Full image data used by APIImageChooserBlock and the settings API
+    """
+    renditions = image.get_renditions(THUMBNAIL_FILTER_SPEC, LARGE_FILTER_SPEC)
+    data = {
+        'id': image.id,
+        'title': image.title,
+        'original': image_url(image, request),
+        'width': image.width,
+        'height': image.height,
+        'thumbnail': rendition_url(renditions[THUMBNAIL_FILTER_SPEC], request),
+        'large': rendition_url(renditions[LARGE_FILTER_SPEC], request),
+    }
+    data.update(placeholder_fields(image))
+    return data
+
+
+class APIImageRenditionField(ImageRenditionField):
+    """
+    ImageRenditionField that builds URLs through the media URL strategy and
+    includes the image placeholder and dominant colour
+    """
+
+    def to_representation(self, image):
+        try:
+            if image.is_svg() and self.preserve_svg:
+                filter_spec = to_svg_safe_spec(self.filter_spec)
+            else:
+                filter_spec = self.filter_spec
+
+            thumbnail = image.get_rendition(filter_spec)
+        except SourceImageIOError:
+            return OrderedDict([('error', 'SourceImageIOError')])
+
+        representation = OrderedDict([
+            ('url', thumbnail.url),
+            ('full_url', rendition_url(thumbnail, self.context.get('request'))),
+            ('width', thumbnail.width),
+            ('height', thumbnail.height),
+            ('alt', thumbnail.alt),
+        ])
+        representation.update(placeholder_fields(image))
+        return representation
+
+
+class ImagePlaceholderField(Field):
+    """
+    Serializes the "placeholder" and "dominant_color" of an image for the images API
+
+    Example:
+    "placeholder": {
+        "placeholder": "data:image/jpeg;base64,/9j/4AAQ...",
+        "dominant_color": "#1a2b3c"
+    }
+    """
+
+    def get_attribute(self, instance):
+        return instance
+
+    def to_representation(self, image):
+        return placeholder_fields(image)
+
+
+class MediaImageDownloadUrlField(Field):
+    """Serializes the "download_url" of an image through the media URL strategy"""
+
+    def get_attribute(self, instance):
+        return instance
+
+    def to_representation(self, image):
+        return image_url(image, self.context.get('request'))
+
+
+class MediaDocumentDownloadUrlField(Field):
+    """Serializes the "download_url" of a document through the media URL strategy"""
+
+    def get_attribute(self, instance):
+        return instance
+
+    def to_representation(self, document):
+        return document_url(document, self.context.get('request'))
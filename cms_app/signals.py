@@ -0,0 +1,300 @@
+"""
+Signal handlers for the CMS app
+"""
+
+import functools
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from wagtail.documents import get_document_model
+from wagtail.images import get_image_model
+from wagtail.search import index
+from wagtail.models import Page, Site
+from wagtail.signals import page_published, page_slug_changed, page_unpublished, post_page_move
+
+from .changes import page_change, published_action, record_change, record_changes, record_page_change
+from .image_serve import get_image_cache
+from .images import get_image_metadata
+from .models import BasePage, SiteSettings
+from .navigation import invalidate_navigation
+from .projections import clear_page, project_page
+from .purge import (
+    DOCUMENT, IMAGE, PAGE, SETTINGS, clear_page_dependencies, get_dependents, purge_media, purge_page,
+    purge_rendition, purge_settings, record_settings_dependencies,
+)
+from .representations import rematerialize_pages
+from .site_settings import invalidate_site_settings
+from .sites import invalidate_sites
+
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred_publish_effects():
+    """
+    Collect the pages published inside the block instead of reindexing,
+    projecting, logging and purging them one at a time, and apply those
+    effects to all of them once the block exits. Used by bulk imports; the
+    block should contain whole transactions.
+    """
+    _deferred.pages = {}
+    try:
+        yield
+        pages = list(_deferred.pages.values())
+    finally:
+        _deferred.pages = None
+    apply_publish_effects(pages)
+
+
+def deferrable(handler):
+    """Let deferred_publish_effects() collect the page of a page_published handler"""
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        pages = getattr(_deferred, 'pages', None)
+        if pages is not None and kwargs.get('signal') is page_published:
+            instance = kwargs['instance']
+            pages[instance.pk] = instance
+            return None
+        return handler(*args, **kwargs)
+    return wrapper
+
+
+def apply_publish_effects(pages):
+    """The work of the page_published handlers, for many pages at once"""
+    if not pages:
+        return
+    content_pages = [page for page in pages if isinstance(page, BasePage)]
+    for page in content_pages:
+        index.insert_or_update_object(page)
+        project_page(page)
+    # One change log insert and one batch of CDN purges
+    with transaction.atomic():
+        record_changes([page_change(page, published_action(page)) for page in content_pages])
+        for page in content_pages:
+            purge_page(page)
+    invalidate_navigation()
+    if any(page.is_site_root() for page in pages):
+        invalidate_sites()
+
+
+def post_save_image_metadata(instance, **kwargs):
+    """Compute the placeholder once per uploaded image file"""
+    if kwargs.get('raw'):
+        return
+
+    # Only recomputed when the metadata is missing or the file hash has changed
+    transaction.on_commit(lambda: get_image_metadata(instance))
+
+
+def clear_dynamic_image_cache(instance, **kwargs):
+    """Drop cached on-the-fly variants when an image is changed or deleted"""
+    image_id = instance.pk
+    transaction.on_commit(lambda: get_image_cache().clear_image(image_id))
+
+
+@deferrable
+def page_published_update_search_index(instance, **kwargs):
+    """Reindex a page's published content (drafts are never indexed)"""
+    if isinstance(instance, BasePage):
+        transaction.on_commit(lambda: index.insert_or_update_object(instance))
+
+
+def page_removed_update_search_index(instance, **kwargs):
+    if isinstance(instance, BasePage):
+        index.remove_object(instance)
+
+
+@deferrable
+def page_published_update_projections(instance, **kwargs):
+    if isinstance(instance, BasePage):
+        transaction.on_commit(lambda: project_page(instance))
+
+
+def page_unpublished_clear_projections(instance, **kwargs):
+    if isinstance(instance, BasePage):
+        clear_page(instance)
+
+
+@deferrable
+def clear_navigation_cache(**kwargs):
+    """The navigation tree is rebuilt on the next request"""
+    transaction.on_commit(invalidate_navigation)
+
+
+@deferrable
+def page_published_record_change(instance, **kwargs):
+    if isinstance(instance, BasePage):
+        record_page_change(instance, published_action(instance))
+
+
+def page_unpublished_record_change(instance, **kwargs):
+    if isinstance(instance, BasePage):
+        record_page_change(instance, 'unpublished')
+
+
+def page_deleted_record_change(instance, **kwargs):
+    if isinstance(instance, BasePage):
+        record_page_change(instance, 'deleted')
+
+
+def settings_saved_record_change(instance, **kwargs):
+    record_change('settings', instance.site_id, 'updated', site_id=instance.site_id)
+
+
+def media_saved_record_change(sender, instance, created=False, **kwargs):
+    if kwargs.get('raw'):
+        return
+    object_type = 'image' if sender is get_image_model() else 'document'
+    record_change(object_type, instance.pk, 'created' if created else 'updated')
+
+
+def media_deleted_record_change(sender, instance, **kwargs):
+    object_type = 'image' if sender is get_image_model() else 'document'
+    record_change(object_type, instance.pk, 'deleted')
+
+
+@deferrable
+def page_changed_purge(instance, **kwargs):
+    """Purge a published, unpublished or deleted page from the CDN"""
+    if isinstance(instance, BasePage):
+        purge_page(instance)
+
+
+def page_deleted_clear_dependencies(instance, **kwargs):
+    if isinstance(instance, BasePage):
+        clear_page_dependencies(instance)
+
+
+def settings_saved_purge(instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    record_settings_dependencies(instance)
+    purge_settings(instance.site)
+
+
+def media_changed_purge(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    purge_media(IMAGE if sender is get_image_model() else DOCUMENT, instance)
+
+
+def media_changed_rematerialize(sender, instance, **kwargs):
+    """Store the representations of the pages using a changed image or document again"""
+    if kwargs.get('raw'):
+        return
+    kind = IMAGE if sender is get_image_model() else DOCUMENT
+    rematerialize_pages(
+        source_id for source_type, source_id in get_dependents(kind, instance.pk) if source_type == PAGE
+    )
+
+
+def rendition_deleted_rematerialize(instance, **kwargs):
+    """Stored representations may point at the deleted rendition"""
+    rematerialize_pages(
+        source_id for source_type, source_id in get_dependents(IMAGE, instance.image_id) if source_type == PAGE
+    )
+
+
+def page_tree_changed_rematerialize(instance, **kwargs):
+    """A moved page, or a page whose slug changed, changes the URLs of its whole subtree"""
+    # A slug only changes when the page is published, which updates the page itself
+    pages = instance.get_descendants(inclusive=kwargs.get('signal') is post_page_move).live()
+    rematerialize_pages(pages.values_list('pk', flat=True))
+    for page in pages.specific():
+        if isinstance(page, BasePage):
+            purge_page(page)
+
+
+def rendition_deleted_purge(instance, **kwargs):
+    purge_rendition(instance)
+
+
+def site_changed_clear_caches(**kwargs):
+    """Site hostnames and root pages decide which site and URLs a request gets"""
+    def clear():
+        invalidate_sites()
+        invalidate_site_settings()
+        invalidate_navigation()
+    transaction.on_commit(clear)
+
+
+@deferrable
+def site_root_changed_clear_sites(instance, **kwargs):
+    """Sites are cached with their root page"""
+    if instance.is_site_root():
+        transaction.on_commit(invalidate_sites)
+
+
+def settings_saved_clear_cache(instance, **kwargs):
+    site_id = instance.site_id
+    transaction.on_commit(lambda: invalidate_site_settings([site_id]))
+
+
+def media_changed_clear_settings_cache(sender, instance, **kwargs):
+    """Drop the settings payloads showing a changed image or document"""
+    kind = IMAGE if sender is get_image_model() else DOCUMENT
+    site_ids = [source_id for source_type, source_id in get_dependents(kind, instance.pk) if source_type == SETTINGS]
+    if site_ids:
+        transaction.on_commit(lambda: invalidate_site_settings(site_ids))
+
+
+def register_signal_handlers():
+    Image = get_image_model()
+    Document = get_document_model()
+
+    post_save.connect(post_save_image_metadata, sender=Image)
+    post_save.connect(clear_dynamic_image_cache, sender=Image)
+    post_delete.connect(clear_dynamic_image_cache, sender=Image)
+
+    page_published.connect(page_published_update_search_index)
+    page_unpublished.connect(page_removed_update_search_index)
+    post_delete.connect(page_removed_update_search_index)
+
+    page_published.connect(page_published_update_projections)
+    page_unpublished.connect(page_unpublished_clear_projections)
+
+    page_published.connect(clear_navigation_cache)
+    page_unpublished.connect(clear_navigation_cache)
+    post_page_move.connect(clear_navigation_cache)
+    post_delete.connect(clear_navigation_cache, sender=Page)
+    post_save.connect(clear_navigation_cache, sender=SiteSettings)
+
+    page_published.connect(page_published_record_change)
+    page_unpublished.connect(page_unpublished_record_change)
+    post_delete.connect(page_deleted_record_change)
+    post_save.connect(settings_saved_record_change, sender=SiteSettings)
+    for model in (Image, Document):
+        post_save.connect(media_saved_record_change, sender=model)
+        post_delete.connect(media_deleted_record_change, sender=model)
+
+    # Connected before the purges, so the stored API representations are
+    # updated before the CDN fetches them again
+    for model in (Image, Document):
+        post_save.connect(media_changed_rematerialize, sender=model)
+        post_delete.connect(media_changed_rematerialize, sender=model)
+    post_delete.connect(rendition_deleted_rematerialize, sender=Image.get_rendition_model())
+    post_page_move.connect(page_tree_changed_rematerialize)
+    page_slug_changed.connect(page_tree_changed_rematerialize)
+
+    # Connected after the projections, so the stored API representation of a
+    # page is updated before the CDN fetches it again
+    page_published.connect(page_changed_purge)
+    page_unpublished.connect(page_changed_purge)
+    post_delete.connect(page_changed_purge)
+    post_delete.connect(page_deleted_clear_dependencies)
+    post_save.connect(settings_saved_purge, sender=SiteSettings)
+    for model in (Image, Document):
+        post_save.connect(media_changed_purge, sender=model)
+        post_delete.connect(media_changed_purge, sender=model)
+    post_delete.connect(rendition_deleted_purge, sender=Image.get_rendition_model())
+
+    post_save.connect(site_changed_clear_caches, sender=Site)
+    post_delete.connect(site_changed_clear_caches, sender=Site)
+    page_published.connect(site_root_changed_clear_sites)
+    post_page_move.connect(site_root_changed_clear_sites)
+    post_save.connect(settings_saved_clear_cache, sender=SiteSettings)
+    for model in (Image, Document):
+        post_save.connect(media_changed_clear_settings_cache, sender=model)
+        post_delete.connect(media_changed_clear_settings_cache, sender=model)
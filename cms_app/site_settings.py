@@ -0,0 +1,97 @@
+"""
+Site settings API payload
+
+The payload of each site is built on the first request and refreshed after
+the settings, the site, or an image or document they use change (see
+cms_app.signals and cms_app.cache). The settings have no translated fields,
+so every language gets the same payload. Media URLs are absolute against the
+request host unless a CDN host is configured, so each site's entry keeps its
+payloads per host.
+"""
+
+from django.core.cache import cache
+
+from .cache import envelope_timeout, get_payload, is_envelope, locked
+from .serializers import image_representation
+
+CACHE_KEY = 'cms_app:site_settings:{site_id}'
+# Held while the per-host entries under a key are read and written back
+STORE_LOCK_KEY = 'cms_app:lock:store:{key}'
+
+
+def get_site_settings(site, request):
+    """Return the cached settings payload of a site, building it if needed"""
+    key = CACHE_KEY.format(site_id=site.pk)
+    host = request.get_host()
+
+    def build():
+        return build_site_settings(site, request)
+
+    def store(envelope):
+        with locked(STORE_LOCK_KEY.format(key=key)):
+            envelopes = {h: e for h, e in (cache.get(key) or {}).items() if is_envelope(e)}
+            envelopes[host] = envelope
+            cache.set(key, envelopes, timeout=max(envelope_timeout(e) for e in envelopes.values()))
+
+    return get_payload(f'{key}:{host}', build, load=lambda: (cache.get(key) or {}).get(host), store=store)
+
+
+def invalidate_site_settings(site_ids=None):
+    """Drop the cached settings payloads of some sites, or of every site"""
+    from wagtail.models import Site
+
+    if site_ids is None:
+        site_ids = Site.objects.values_list('pk', flat=True)
+    keys = [CACHE_KEY.format(site_id=pk) for pk in site_ids]
+    for key in keys:
+        # Not between the read and the write of a store, which would put the payload back
+        with locked(STORE_LOCK_KEY.format(key=key)):
+            cache.delete(key)
+
+
+def serialize_streamfield(stream, request):
+    """Convert a StreamField to a serializable format"""
+    if not stream:
+        return []
+
+    def serialize_value(value):
+        """Recursively serialize values, handling Image objects"""
+        if hasattr(value, 'file'):  # It's an Image object
+            return image_representation(value, request)
+        elif isinstance(value, dict):
+            return {k: serialize_value(v) for k, v in value.items()}
+        elif isinstance(value, (list, tuple)):
+            return [serialize_value(item) for item in value]
+        else:
+            return value
+
+    return [
+        {
+            'type': block.block_type,
+            'value': serialize_value(block.value),
+            'id': str(block.id) if hasattr(block, 'id') else None,
+        }
+        for block in stream
+    ]
+
+
+def build_site_settings(site, request):
+    from .models import SiteSettings
+
+    settings = SiteSettings.for_site(site)
+    return {
+        'site_name': settings.site_name,
+        'site_tagline': settings.site_tagline,
+        'site_description': settings.site_description,
+        'site_logo': image_representation(settings.site_logo, request) if settings.site_logo else None,
+        'contact_info': serialize_streamfield(settings.contact_info, request),
+        'sponsors': serialize_streamfield(settings.sponsors, request),
+        'organizers': serialize_streamfield(settings.organizers, request),
+        'social_links': serialize_streamfield(settings.social_links, request),
+        'copyright_text': settings.copyright_text,
+        'footer_about_text': settings.footer_about_text,
+        'navigation_items': serialize_streamfield(settings.navigation_items, request),
+        'show_login_button': settings.show_login_button,
+        'login_button_text': settings.login_button_text,
+        'login_url': settings.login_url,
+    }
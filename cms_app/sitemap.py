@@ -0,0 +1,134 @@
+"""
+Streaming sitemap and published URL index
+
+Pages are read in keyset-paginated chunks of (path, url_path, last_published_at)
+rows and written to the response as they are read, so memory use doesn't grow
+with the size of the site. Once a site has more pages than one sitemap file may
+hold (SITEMAP_MAX_URLS, 50,000 by the protocol), /sitemap.xml becomes a sitemap
+index of /sitemap-<n>.xml files.
+"""
+
+import json
+import math
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+from wagtail.models import Page
+
+from .sites import get_site
+
+CHUNK_SIZE = 2000
+
+
+def get_request_site(request):
+    site = get_site(request)
+    if site is None:
+        raise Http404('No site found')
+    return site
+
+
+def published_pages(site):
+    return Page.objects.live().public().filter(path__startswith=site.root_page.path).order_by('path')
+
+
+def iter_page_urls(site, start_path=None, limit=None):
+    """
+    Yield ``(page_id, url, last_published_at)`` for the published pages of a
+    site in tree order, starting at ``start_path``
+    """
+    root_url = site.root_url
+    root_path_length = len(site.root_page.url_path)
+    pages = published_pages(site)
+    if start_path is not None:
+        pages = pages.filter(path__gte=start_path)
+
+    produced = 0
+    last_path = None
+    while limit is None or produced < limit:
+        chunk_size = CHUNK_SIZE if limit is None else min(CHUNK_SIZE, limit - produced)
+        chunk = pages if last_path is None else pages.filter(path__gt=last_path)
+        rows = list(chunk.values_list('id', 'path', 'url_path', 'last_published_at')[:chunk_size])
+        if not rows:
+            return
+        for page_id, path, url_path, last_published_at in rows:
+            yield page_id, root_url + '/' + url_path[root_path_length:], last_published_at
+        produced += len(rows)
+        last_path = rows[-1][1]
+
+
+def section_start_path(site, section):
+    """Path of the first page of a sitemap section (1-based)"""
+    offset = (section - 1) * settings.SITEMAP_MAX_URLS
+    return published_pages(site).values_list('path', flat=True)[offset:offset + 1].first()
+
+
+def stream_urlset(urls):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for _, url, lastmod in urls:
+        entry = f'<url><loc>{escape(url)}</loc>'
+        if lastmod:
+            entry += f'<lastmod>{lastmod.date().isoformat()}</lastmod>'
+        yield entry + '</url>\n'
+    yield '</urlset>\n'
+
+
+def stream_sitemap_index(request, sections):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for section in range(1, sections + 1):
+        url = request.build_absolute_uri(reverse('sitemap-section', args=[section]))
+        yield f'<sitemap><loc>{escape(url)}</loc></sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def xml_response(content):
+    response = StreamingHttpResponse(content, content_type='application/xml; charset=utf-8')
+    patch_cache_control(response, public=True, max_age=settings.SITEMAP_MAX_AGE)
+    return response
+
+
+@require_GET
+def sitemap(request):
+    """/sitemap.xml: the sitemap, or a sitemap index on large sites"""
+    site = get_request_site(request)
+    count = published_pages(site).count()
+    if count <= settings.SITEMAP_MAX_URLS:
+        return xml_response(stream_urlset(iter_page_urls(site)))
+    return xml_response(stream_sitemap_index(request, math.ceil(count / settings.SITEMAP_MAX_URLS)))
+
+
+@require_GET
+def sitemap_section(request, section):
+    """/sitemap-<n>.xml: the n-th SITEMAP_MAX_URLS pages of a large site"""
+    site = get_request_site(request)
+    start_path = section_start_path(site, section) if section > 0 else None
+    if start_path is None:
+        raise Http404('No such sitemap')
+    return xml_response(stream_urlset(iter_page_urls(site, start_path, settings.SITEMAP_MAX_URLS)))
+
+
+def stream_url_index(site, urls):
+    yield '{"site_id": %d, "items": [' % site.pk
+    separator = '\n'
+    for page_id, url, lastmod in urls:
+        item = {'id': page_id, 'url': url, 'lastmod': lastmod.isoformat() if lastmod else None}
+        yield separator + json.dumps(item)
+        separator = ',\n'
+    yield '\n]}\n'
+
+
+@require_GET
+def published_urls(request):
+    """
+    /api/v2/urls/: every published URL of the site with its last publish date,
+    as one streamed JSON document
+    """
+    site = get_request_site(request)
+    response = StreamingHttpResponse(stream_url_index(site, iter_page_urls(site)), content_type='application/json')
+    patch_cache_control(response, public=True, max_age=settings.SITEMAP_MAX_AGE)
+    return response
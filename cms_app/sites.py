@@ -0,0 +1,87 @@
+"""
+Site resolution from the request hostname
+
+Resolving a site with Site.find_for_request costs a query on every request.
+Sites are few and rarely change, so each process keeps them in memory with a
+hostname:port -> site map, using the same matching rules as Wagtail. The map
+is dropped when a Site (or a site root page) changes: locally right away, and
+in the other workers through a generation token in the shared cache.
+"""
+
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.http.request import split_domain_port
+
+GENERATION_KEY = 'cms_app:sites:generation'
+
+_lock = threading.Lock()
+_state = {'generation': None, 'sites': None, 'by_host': {}}
+
+
+def match_site(sites, hostname, port):
+    """
+    The site serving ``hostname:port``, as wagtail.models.sites.get_site_for_hostname
+    picks it: exact hostname and port, then the default site if it has the
+    hostname, then the only site with the hostname, then the default site
+    """
+    default = next((site for site in sites if site.is_default_site), None)
+    hostname_matches = [site for site in sites if site.hostname == hostname]
+    for site in hostname_matches:
+        if site.port == port:
+            return site
+    if default is not None and default.hostname == hostname:
+        return default
+    if len(hostname_matches) == 1:
+        return hostname_matches[0]
+    return default
+
+
+def find_site(hostname, port):
+    """The site for a hostname and port, from the in-process map"""
+    from wagtail.models import Site
+
+    generation = cache.get(GENERATION_KEY)
+    key = (hostname, port)
+    with _lock:
+        if _state['generation'] != generation:
+            _state.update(generation=generation, sites=None, by_host={})
+        if key in _state['by_host']:
+            return _state['by_host'][key]
+        sites = _state['sites']
+
+    if sites is None:
+        sites = list(Site.objects.select_related('root_page'))
+    site = match_site(sites, hostname, port)
+
+    with _lock:
+        if _state['generation'] == generation:
+            _state['sites'] = sites
+            _state['by_host'][key] = site
+    return site
+
+
+def get_site(request):
+    """
+    The site of a request, like Site.find_for_request (and cached on the
+    request the same way, so Wagtail's own lookups reuse it)
+    """
+    if request is None:
+        return None
+    if not hasattr(request, '_wagtail_site'):
+        # The raw host skips the ALLOWED_HOSTS check, as in Wagtail
+        hostname = split_domain_port(request._get_raw_host())[0]
+        try:
+            port = int(request.get_port())
+        except (TypeError, ValueError):
+            port = None
+        request._wagtail_site = find_site(hostname, port)
+    return request._wagtail_site
+
+
+def invalidate_sites():
+    """Drop the site map in this process and, through the shared cache, in every other"""
+    with _lock:
+        _state.update(generation=None, sites=None, by_host={})
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
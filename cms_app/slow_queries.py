@@ -0,0 +1,180 @@
+"""
+Slow query log
+
+SlowQueryMiddleware times every database query made while a request is being
+handled (through the connections' execute wrappers). Queries slower than
+SLOW_QUERY_THRESHOLD milliseconds are logged and, once the response is ready,
+stored as SlowQuery rows by a background thread, with the URL name of the
+request, the cms_app frames that ran them and, for SELECT queries, the EXPLAIN
+output of the database. The admin lists them to superusers; the oldest are
+deleted beyond SLOW_QUERY_MAX_ROWS.
+
+Parameter values are never stored, only their types, and queries on the
+session and user tables are not recorded at all: they carry session keys and
+password hashes.
+
+Queries run while a streaming response is iterated (the SSE endpoint) or in
+background threads are not timed.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, NotSupportedError, close_old_connections, connections
+
+log = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Frames kept in the stack summary of a query
+STACK_DEPTH = 10
+# Longest params description stored
+MAX_PARAMS_LENGTH = 2000
+# Queries on these tables are not recorded
+IGNORED_TABLES = re.compile(r'\b(django_session|auth_user)\b', re.IGNORECASE)
+
+# Single thread storing the slow queries, started on first use
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def app_stack():
+    """The cms_app frames of the current stack, innermost last, one per line"""
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(APP_DIR) and frame.filename != __file__
+    ]
+    return '\n'.join(
+        f'{os.path.relpath(frame.filename, settings.BASE_DIR)}:{frame.lineno} in {frame.name}'
+        for frame in frames[-STACK_DEPTH:]
+    )
+
+
+class QueryTimer:
+    """Execute wrapper collecting the queries over the threshold"""
+
+    def __init__(self, alias, threshold):
+        self.alias = alias
+        self.threshold = threshold
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            if duration >= self.threshold and not IGNORED_TABLES.search(sql):
+                self.slow.append({
+                    'alias': self.alias,
+                    'duration': duration,
+                    'sql': sql,
+                    'params': params,
+                    'many': many,
+                    'stack': app_stack(),
+                })
+
+
+def explain(alias, sql, params):
+    """The plan of a SELECT query as text, or '' if the database can't explain it"""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return ''
+    connection = connections[alias]
+    try:
+        prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            rows = cursor.fetchall()
+    except (DatabaseError, NotSupportedError) as e:
+        return f'EXPLAIN failed: {e}'
+    return '\n'.join(' '.join(str(column) for column in row) for row in rows)
+
+
+def describe_params(params, many):
+    """The types of the parameters, without their values"""
+    if params is None:
+        return ''
+    if many:
+        return 'executemany'
+    if isinstance(params, dict):
+        types = (f'{name}: {type(value).__name__}' for name, value in params.items())
+    else:
+        types = (type(value).__name__ for value in params)
+    return ', '.join(types)[:MAX_PARAMS_LENGTH]
+
+
+def record_slow_queries(request, queries):
+    """Log queries collected by QueryTimer for a request, and store them with their plans in the background"""
+    global _executor
+
+    match = getattr(request, 'resolver_match', None)
+    url_name = (match.view_name or '') if match else ''
+    for query in queries:
+        log.warning('Slow query (%.0f ms) in %s %s: %s', query['duration'], request.method, request.path, query['sql'][:500])
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1)
+    _executor.submit(store_slow_queries, request.method, request.path, url_name, queries)
+
+
+def store_slow_queries(method, path, url_name, queries):
+    """Explain and insert the slow queries of a request"""
+    from .models import SlowQuery
+
+    try:
+        SlowQuery.objects.bulk_create([
+            SlowQuery(
+                duration=query['duration'],
+                method=method,
+                path=path[:500],
+                url_name=url_name[:200],
+                sql=query['sql'],
+                params=describe_params(query['params'], query['many']),
+                explain='' if query['many'] else explain(query['alias'], query['sql'], query['params']),
+                stack=query['stack'],
+            )
+            for query in queries
+        ])
+        prune_slow_queries()
+    except DatabaseError:
+        log.exception('Could not store the slow queries of %s', path)
+    finally:
+        close_old_connections()
+
+
+def prune_slow_queries():
+    """Delete the oldest slow queries beyond SLOW_QUERY_MAX_ROWS"""
+    from .models import SlowQuery
+
+    limit = settings.SLOW_QUERY_MAX_ROWS
+    cutoff = list(SlowQuery.objects.order_by('-pk').values_list('pk', flat=True)[limit:limit + 1])
+    if cutoff:
+        SlowQuery.objects.filter(pk__lte=cutoff[0]).delete()
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_THRESHOLD:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timers = [QueryTimer(connection.alias, settings.SLOW_QUERY_THRESHOLD) for connection in connections.all()]
+        with ExitStack() as stack:
+            for timer in timers:
+                stack.enter_context(connections[timer.alias].execute_wrapper(timer))
+            response = self.get_response(request)
+
+        queries = [query for timer in timers for query in timer.slow]
+        if queries:
+            record_slow_queries(request, queries)
+        return response
@@ -0,0 +1,83 @@
+/**
+ * Lazy-loading StreamField editor (see cms_app/editor.py)
+ *
+ * Block forms are fetched from the server when opened and mounted through the
+ * admin's w-block controller; the ids of opened blocks are recorded in the
+ * "<name>-loaded" input so the server reads their values from the form.
+ */
+(function () {
+    'use strict';
+
+    function request(wrapper, extra) {
+        const data = new FormData(wrapper.closest('form'));
+        data.set('model', wrapper.dataset.model);
+        data.set('field', wrapper.dataset.field);
+        data.set('name', wrapper.dataset.name);
+        Object.keys(extra).forEach((key) => data.set(key, extra[key]));
+
+        return fetch(wrapper.dataset.url, {
+            method: 'POST',
+            body: data,
+            headers: { 'X-Requested-With': 'XMLHttpRequest' },
+        }).then((response) => {
+            if (!response.ok) {
+                throw new Error(`Loading the editor failed (${response.status})`);
+            }
+            return response.json();
+        });
+    }
+
+    function openBlock(wrapper, item, button) {
+        const blockId = item.dataset.lazyBlock;
+        button.disabled = true;
+
+        request(wrapper, { block_id: blockId })
+            .then(({ html }) => {
+                item.querySelector('.lazy-stream-field__form').innerHTML = html;
+                button.remove();
+
+                const loaded = wrapper.querySelector(`input[name="${wrapper.dataset.name}-loaded"]`);
+                const ids = loaded.value ? loaded.value.split(',') : [];
+                ids.push(blockId);
+                loaded.value = ids.join(',');
+            })
+            .catch((error) => {
+                button.disabled = false;
+                window.alert(error.message);
+            });
+    }
+
+    function openFullEditor(wrapper, button) {
+        button.disabled = true;
+
+        request(wrapper, {})
+            .then(({ html }) => {
+                const container = document.createElement('div');
+                container.innerHTML = html;
+                wrapper.replaceWith(container);
+            })
+            .catch((error) => {
+                button.disabled = false;
+                window.alert(error.message);
+            });
+    }
+
+    function init(wrapper) {
+        wrapper.addEventListener('click', (event) => {
+            const editButton = event.target.closest('[data-lazy-block-edit]');
+            if (editButton) {
+                openBlock(wrapper, editButton.closest('[data-lazy-block]'), editButton);
+                return;
+            }
+
+            const fullButton = event.target.closest('[data-lazy-full-editor]');
+            if (fullButton) {
+                openFullEditor(wrapper, fullButton);
+            }
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', () => {
+        document.querySelectorAll('[data-lazy-stream-field]').forEach(init);
+    });
+})();
@@ -1,11 +1,29 @@
 """
 URL Configuration for CMS App API
 """
-from django.urls import path, include
-from .api import api_router, SiteSettingsAPIView
+from django.urls import path, include, re_path
+from .api import (
+    api_router, SiteSettingsAPIView, NavigationAPIView, ChangesAPIView, PageSearchAPIView, EventListAPIView,
+    RuleListAPIView, RuleCategoryAPIView, RuleDetailAPIView,
+)
+from .image_serve import DynamicImageView
+from .sitemap import published_urls, sitemap, sitemap_section
+from .webhooks import event_stream
 
 urlpatterns = [
     path('api/v2/', api_router.urls),
     path('api/v2/settings/', SiteSettingsAPIView.as_view(), name='site-settings'),
+    path('api/v2/navigation/', NavigationAPIView.as_view(), name='navigation'),
+    path('api/v2/changes/', ChangesAPIView.as_view(), name='changes'),
+    path('api/v2/events/stream/', event_stream, name='event-stream'),
+    path('api/v2/urls/', published_urls, name='published-urls'),
+    path('api/v2/search/', PageSearchAPIView.as_view(), name='page-search'),
+    path('api/v2/events/', EventListAPIView.as_view(), name='event-list'),
+    path('api/v2/rules/', RuleListAPIView.as_view(), name='rule-list'),
+    path('api/v2/rules/categories/<slug:category>/', RuleCategoryAPIView.as_view(), name='rule-category'),
+    path('api/v2/rules/<str:rule_number>/', RuleDetailAPIView.as_view(), name='rule-detail'),
+    path('sitemap.xml', sitemap, name='sitemap'),
+    path('sitemap-<int:section>.xml', sitemap_section, name='sitemap-section'),
+    re_path(r'^dynamic-images/([^/]*)/(\d+)/([^/]*)/$', DynamicImageView.as_view(), name='dynamic-image'),
 ]
 
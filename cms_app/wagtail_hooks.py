@@ -4,9 +4,11 @@ Wagtail hooks for customizing the admin interface
 
 from wagtail import hooks
 from wagtail.admin.menu import MenuItem
-from django.urls import reverse
+from django.urls import path, reverse
 from django.utils.html import format_html
 
+from .editor import stream_block_form
+
 
 @hooks.register('insert_global_admin_css')
 def global_admin_css():
@@ -28,3 +30,11 @@ def configure_main_menu(request, menu_items):
     # You can add custom menu items here
     pass
 
+
+
+@hooks.register('register_admin_urls')
+def register_editor_urls():
+    """Block form fragments for the lazy-loading StreamField editor"""
+    return [
+        path('lazy-streamfield/block-form/', stream_block_form, name='cms_app_stream_block_form'),
+    ]
@@ -0,0 +1,153 @@
+"""
+Worker warm-up
+
+Does the work the first requests of a fresh process would otherwise pay for:
+importing the API, admin and Wagtail modules, building the URL resolver and
+the StreamField block tables of the page models, loading their content types
+and, optionally, requesting the main API endpoints of every site so their
+payloads are cached. Each step is timed in the log.
+
+Called from cms_core/wsgi.py. Under uWSGI (without lazy-apps) the imports and
+routes are warmed once in the master, so every forked worker inherits them,
+and the requests run in each worker after the fork: database connections,
+cache locks and background refresh threads must not be created before
+forking, as workers would share or lose them.
+
+Other servers give no way to tell a worker from a master that will fork
+(gunicorn --preload), so only the steps that don't touch the database run
+when the app is loaded. Run the requests from the server's hook after the
+workers start instead, e.g. in gunicorn.conf.py:
+
+    def post_worker_init(worker):
+        from cms_app.warmup import warm_up_worker
+        warm_up_worker()
+"""
+
+import logging
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.db import connections
+
+log = logging.getLogger(__name__)
+
+HOT_MODULES = [
+    'rest_framework.views',
+    'rest_framework.renderers',
+    'wagtail.api.v2.views',
+    'wagtail.api.v2.serializers',
+    'wagtail.images.api.v2.views',
+    'wagtail.documents.api.v2.views',
+    'wagtail.admin.urls',
+    'cms_app.api',
+    'cms_app.urls',
+    'cms_app.signals',
+    'cms_core.urls',
+]
+
+# Fetched for every site, after the WARMUP_URLS setting
+API_PATHS = ['/api/v2/settings/', '/api/v2/navigation/']
+
+
+def _timed(name, func):
+    start = time.perf_counter()
+    try:
+        result = func()
+    except Exception:
+        log.exception('Warm-up: %s failed', name)
+        return None
+    log.info('Warm-up: %s in %.0f ms', name, (time.perf_counter() - start) * 1000)
+    return result
+
+
+def import_hot_modules():
+    for module in HOT_MODULES:
+        import_module(module)
+
+
+def resolve_routes():
+    """Build the URL resolver and its reverse lookup tables"""
+    from django.urls import get_resolver, resolve, reverse
+
+    resolver = get_resolver()
+    resolver.reverse_dict
+    for path in API_PATHS + ['/api/v2/pages/']:
+        resolve(path)
+    reverse('wagtailapi:pages:listing')
+
+
+def load_blocks():
+    """Build the lookup tables of the StreamField blocks of the page models"""
+    from wagtail.fields import StreamField
+    from wagtail.models import get_page_models
+
+    for model in get_page_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, StreamField):
+                field.stream_block.to_python([])
+
+
+def load_content_types():
+    from django.contrib.contenttypes.models import ContentType
+    from wagtail.models import get_page_models
+
+    ContentType.objects.get_for_models(*get_page_models())
+
+
+def fetch_payloads():
+    """Request the main API endpoints of every site, caching their payloads"""
+    from django.test import Client
+    from wagtail.models import Site
+
+    for site in Site.objects.all():
+        host = site.hostname if site.port in (80, 443) else f'{site.hostname}:{site.port}'
+        client = Client(HTTP_HOST=host, raise_request_exception=False)
+        for path in settings.WARMUP_URLS + API_PATHS + [f'/api/v2/pages/{site.root_page_id}/']:
+            response = client.get(path, secure=site.port == 443)
+            if response.status_code != 200:
+                log.warning('Warm-up: %s on %s returned %s', path, host, response.status_code)
+
+
+def warm_up(fetch=True):
+    """Run the warm-up steps in this process; ``fetch`` runs the ones that query the database"""
+    start = time.perf_counter()
+    _timed('imports', import_hot_modules)
+    _timed('routes', resolve_routes)
+    _timed('blocks', load_blocks)
+    if fetch:
+        _timed('content types', load_content_types)
+        _timed('API payloads', fetch_payloads)
+        connections.close_all()
+    log.info('Warm-up finished in %.0f ms', (time.perf_counter() - start) * 1000)
+
+
+def warm_up_worker(*args):
+    """Request the API payloads in a worker process, from a post-fork hook of the server"""
+    if settings.WARMUP_ENABLED and settings.WARMUP_FETCH_PAYLOADS:
+        warm_up(fetch=True)
+
+
+def register_warmup():
+    """Warm up the WSGI process, and each uWSGI worker once it has been forked"""
+    if not settings.WARMUP_ENABLED:
+        return
+
+    try:
+        import uwsgi
+        from uwsgidecorators import postfork
+    except ImportError:
+        # Possibly a master about to fork: nothing that opens connections or threads
+        warm_up(fetch=False)
+        if settings.WARMUP_FETCH_PAYLOADS:
+            log.info('Warm-up: not under uWSGI, API payloads are left to warm_up_worker() in a post-fork hook')
+        return
+
+    if uwsgi.opt.get('lazy-apps') in (True, b'true', b'1'):
+        # Already running in the worker
+        warm_up(fetch=settings.WARMUP_FETCH_PAYLOADS)
+        return
+
+    warm_up(fetch=False)
+    if settings.WARMUP_FETCH_PAYLOADS:
+        postfork(lambda: warm_up(fetch=True))
@@ -0,0 +1,265 @@
+"""
+Signed webhooks and server-sent events for content changes
+
+Both read the change log (see cms_app.changes), so clients can cache API
+responses aggressively and refresh only what a publish, unpublish or settings
+save touched.
+
+Webhook payloads are JSON, signed with the endpoint's secret:
+
+    X-ARC-Signature: t=<unix timestamp>,v1=<hex HMAC-SHA256 of "<timestamp>.<body>">
+
+Use verify_signature() (or the same computation) on the receiving side.
+
+Each server-sent events stream holds a sync uWSGI worker (and polls the
+database) for up to SSE_MAX_DURATION seconds. At most SSE_MAX_STREAMS streams
+are open at once; further connections get a 503 with Retry-After, so dashboard
+tabs can never take every worker. Raise the limit only together with the
+number of workers, or route /api/v2/events/stream/ to a separate pool of
+workers (a second uWSGI instance, or one with gevent), and give the stream a
+proxy read timeout above SSE_HEARTBEAT_INTERVAL.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+
+from .cache import acquire_lock
+from .changes import get_changes
+from .sites import get_site
+
+log = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'X-ARC-Signature'
+
+SSE_SLOT_KEY = 'cms_app:sse:slot:{index}'
+
+# Change log actions as published events
+EVENT_TYPES = {
+    ('page', 'created'): 'publish',
+    ('page', 'updated'): 'publish',
+    ('page', 'unpublished'): 'unpublish',
+    ('page', 'deleted'): 'unpublish',
+    ('settings', 'updated'): 'settings',
+}
+
+
+def as_event(change):
+    """The event for a change, or None for changes that aren't published as events"""
+    event_type = EVENT_TYPES.get((change['object_type'], change['action']))
+    if event_type is None:
+        return None
+    event = {
+        'cursor': change['cursor'],
+        'event': event_type,
+        'timestamp': change['timestamp'],
+    }
+    if change['object_type'] == 'page':
+        event.update(page_id=change['object_id'], url=change['url'], detail_url=change['detail_url'])
+    else:
+        event.update(site_id=change['object_id'], detail_url=change['detail_url'])
+    return event
+
+
+# ===================================================
+# Signing
+# ===================================================
+
+def sign(secret, body, timestamp=None):
+    """Signature header value for a payload body (bytes)"""
+    timestamp = int(timestamp if timestamp is not None else time.time())
+    digest = hmac.new(secret.encode(), f'{timestamp}.'.encode() + body, hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={digest}'
+
+
+def verify_signature(secret, header, body, tolerance=300):
+    """Check a signature header against a payload body, rejecting old timestamps"""
+    try:
+        parts = dict(part.split('=', 1) for part in header.split(','))
+        timestamp = int(parts['t'])
+    except (ValueError, KeyError):
+        return False
+    if abs(time.time() - timestamp) > tolerance:
+        return False
+    expected = sign(secret, body, timestamp)
+    return hmac.compare_digest(expected, header)
+
+
+# ===================================================
+# Webhook delivery
+# ===================================================
+
+def send_batch(url, secret, payload, max_retries=None, retry_delay=None, timeout=None):
+    """
+    POST a signed payload, retrying with exponential backoff on network
+    errors and 5xx/429 responses. Returns ``(delivered, error)``.
+    """
+    max_retries = settings.WEBHOOK_MAX_RETRIES if max_retries is None else max_retries
+    retry_delay = settings.WEBHOOK_RETRY_DELAY if retry_delay is None else retry_delay
+    timeout = settings.WEBHOOK_TIMEOUT if timeout is None else timeout
+    body = json.dumps(payload).encode()
+
+    error = ''
+    for attempt in range(max_retries + 1):
+        if attempt:
+            time.sleep(retry_delay * 2 ** (attempt - 1))
+
+        request = urllib.request.Request(
+            url,
+            data=body,
+            method='POST',
+            headers={
+                'Content-Type': 'application/json',
+                'User-Agent': 'arc-cms-webhooks',
+                SIGNATURE_HEADER: sign(secret, body),
+            },
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                response.read()
+            return True, ''
+        except urllib.error.HTTPError as e:
+            error = f'HTTP {e.code}'
+            # Other client errors won't succeed on retry
+            if e.code < 500 and e.code != 429:
+                break
+        except (urllib.error.URLError, OSError) as e:
+            error = str(getattr(e, 'reason', e))
+        log.warning('Webhook delivery to %s failed (attempt %d): %s', url, attempt + 1, error)
+
+    return False, error
+
+
+def dispatch_endpoint(endpoint, batch_size=None):
+    """
+    Deliver the changes after an endpoint's cursor in batches, advancing the
+    cursor after each delivered batch. Returns the number of events delivered.
+    """
+    batch_size = batch_size or settings.WEBHOOK_BATCH_SIZE
+    delivered = 0
+    while True:
+        changes, cursor, has_more = get_changes(endpoint.cursor, batch_size)
+        if cursor == endpoint.cursor:
+            return delivered
+
+        events = [event for event in map(as_event, changes) if event is not None]
+        if events:
+            ok, error = send_batch(endpoint.url, endpoint.secret, {'cursor': cursor, 'events': events})
+            if not ok:
+                endpoint.consecutive_failures += 1
+                endpoint.last_error = error
+                endpoint.save(update_fields=['consecutive_failures', 'last_error'])
+                return delivered
+            endpoint.last_success_at = timezone.now()
+            delivered += len(events)
+
+        endpoint.cursor = cursor
+        endpoint.consecutive_failures = 0
+        endpoint.last_error = ''
+        endpoint.save(update_fields=['cursor', 'consecutive_failures', 'last_error', 'last_success_at'])
+        if not has_more:
+            return delivered
+
+
+# ===================================================
+# Server-sent events
+# ===================================================
+
+def format_sse(event):
+    return f'id: {event["cursor"]}\nevent: {event["event"]}\ndata: {json.dumps(event)}\n\n'
+
+
+def stream_events(cursor, site=None):
+    """
+    Generate server-sent events for the changes after ``cursor``, polling the
+    change log until SSE_MAX_DURATION has passed; clients reconnect with
+    Last-Event-ID and resume from there.
+    """
+    deadline = time.monotonic() + settings.SSE_MAX_DURATION
+    last_write = time.monotonic()
+    yield f'retry: {int(settings.SSE_POLL_INTERVAL * 1000)}\n\n'
+
+    while time.monotonic() < deadline:
+        changes, next_cursor, has_more = get_changes(cursor, settings.WEBHOOK_BATCH_SIZE, site=site)
+        for event in map(as_event, changes):
+            if event is not None:
+                yield format_sse(event)
+                last_write = time.monotonic()
+        cursor = next_cursor
+
+        if has_more:
+            continue
+        if time.monotonic() - last_write > settings.SSE_HEARTBEAT_INTERVAL:
+            # Comment line, keeps proxies from closing an idle connection
+            yield ': keep-alive\n\n'
+            last_write = time.monotonic()
+
+        # Don't hold a database connection open between polls
+        connection.close()
+        time.sleep(settings.SSE_POLL_INTERVAL)
+
+
+def acquire_stream_slot():
+    """One of the SSE_MAX_STREAMS stream slots, or None when every slot is in use"""
+    for index in range(settings.SSE_MAX_STREAMS):
+        slot = acquire_lock(SSE_SLOT_KEY.format(index=index), timeout=settings.SSE_MAX_DURATION + 60)
+        if slot is not None:
+            return slot
+    return None
+
+
+class SlotStream:
+    """Stream content that gives its slot back when the response is closed"""
+
+    def __init__(self, events, slot):
+        self.events = events
+        self.slot = slot
+
+    def __iter__(self):
+        return self.events
+
+    def close(self):
+        self.events.close()
+        if self.slot is not None:
+            self.slot.release()
+            self.slot = None
+
+
+@require_GET
+def event_stream(request):
+    """
+    /api/v2/events/stream/: server-sent publish, unpublish and settings events.
+    Starts after Last-Event-ID or ?since=, or at the latest change when neither is given.
+    """
+    from .models import ChangeLogEntry
+
+    cursor = request.headers.get('Last-Event-ID') or request.GET.get('since')
+    try:
+        cursor = max(int(cursor), 0)
+    except (TypeError, ValueError):
+        cursor = ChangeLogEntry.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    slot = acquire_stream_slot()
+    if slot is None:
+        response = HttpResponse('Too many event streams open, retry later', status=503, content_type='text/plain')
+        response['Retry-After'] = str(settings.SSE_RETRY_AFTER)
+        return response
+
+    response = StreamingHttpResponse(
+        SlotStream(stream_events(cursor, site=get_site(request)), slot),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Tell nginx not to buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
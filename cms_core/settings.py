@@ -4,7 +4,6 @@ import sys
 from pathlib import Path
 
 from corsheaders.defaults import default_headers
-from django.http import UnreadablePostError
 
 try:
     from cms_core.local_settings import lsettings
@@ -59,6 +58,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'cms_app.slow_queries.SlowQueryMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -140,6 +140,92 @@ STATIC_ROOT = lsettings.get('STATIC_ROOT', os.path.join(BASE_DIR, 'static'))
 MEDIA_URL = lsettings.get("MEDIA_URL", "/media/")
 MEDIA_ROOT = lsettings.get("MEDIA_ROOT", os.path.join(BASE_DIR, "media"))
 
+# Media URLs in API responses (see cms_app/media_urls.py)
+# e.g. MEDIA_CDN_HOST = 'https://cdn.arc.pingtech.dev'
+MEDIA_CDN_HOST = lsettings.get("MEDIA_CDN_HOST", "")
+# Per-type hosts, keyed by 'original', 'rendition' or 'document'
+MEDIA_CDN_HOSTS = lsettings.get("MEDIA_CDN_HOSTS", {})
+MEDIA_URL_VERSIONING = lsettings.get("MEDIA_URL_VERSIONING", True)
+
+# On-the-fly image variants (see cms_app/image_serve.py)
+DYNAMIC_IMAGE_CACHE_DIR = lsettings.get("DYNAMIC_IMAGE_CACHE_DIR", os.path.join(BASE_DIR, "image_cache"))
+DYNAMIC_IMAGE_CACHE_MAX_SIZE = lsettings.get("DYNAMIC_IMAGE_CACHE_MAX_SIZE", 1024 * 1024 * 1024)  # 1 GB
+DYNAMIC_IMAGE_MAX_AGE = lsettings.get("DYNAMIC_IMAGE_MAX_AGE", 60 * 60 * 24 * 30)  # 30 days
+
+# StreamFields with at least this many blocks load their block forms on demand
+# in the page editor (see cms_app/editor.py)
+LAZY_STREAMFIELD_MIN_BLOCKS = lsettings.get("LAZY_STREAMFIELD_MIN_BLOCKS", 10)
+
+# Sitemap (see cms_app/sitemap.py): URLs per sitemap file, per the protocol limit
+SITEMAP_MAX_URLS = lsettings.get("SITEMAP_MAX_URLS", 50000)
+SITEMAP_MAX_AGE = lsettings.get("SITEMAP_MAX_AGE", 60 * 60)  # 1 hour
+
+# Changes API: entries younger than this are held back until concurrent transactions settle
+CHANGE_LOG_SETTLE_SECONDS = lsettings.get("CHANGE_LOG_SETTLE_SECONDS", 1)
+
+# Webhooks (dispatch_webhooks command) and server-sent events (see cms_app/webhooks.py)
+WEBHOOK_BATCH_SIZE = lsettings.get("WEBHOOK_BATCH_SIZE", 100)
+WEBHOOK_MAX_RETRIES = lsettings.get("WEBHOOK_MAX_RETRIES", 5)
+WEBHOOK_RETRY_DELAY = lsettings.get("WEBHOOK_RETRY_DELAY", 1)  # seconds, doubled on each retry
+WEBHOOK_TIMEOUT = lsettings.get("WEBHOOK_TIMEOUT", 10)
+SSE_POLL_INTERVAL = lsettings.get("SSE_POLL_INTERVAL", 2)
+SSE_HEARTBEAT_INTERVAL = lsettings.get("SSE_HEARTBEAT_INTERVAL", 15)
+# Streams are closed after this many seconds so they don't hold a worker forever
+SSE_MAX_DURATION = lsettings.get("SSE_MAX_DURATION", 300)
+# Each open stream occupies a sync worker: streams beyond this many (per host with the file cache,
+# in total with Redis/Memcached) get a 503 with Retry-After: SSE_RETRY_AFTER seconds
+SSE_MAX_STREAMS = lsettings.get("SSE_MAX_STREAMS", 2)
+SSE_RETRY_AFTER = lsettings.get("SSE_RETRY_AFTER", 30)
+
+# CDN purges of changed content (see cms_app/purge.py); '' disables purging
+CDN_PURGE_BACKEND = lsettings.get("CDN_PURGE_BACKEND", "cms_app.purge.FrontendCachePurgeBackend")
+# URLs per purge request (Cloudflare accepts up to 30)
+CDN_PURGE_BATCH_SIZE = lsettings.get("CDN_PURGE_BATCH_SIZE", 30)
+# Frontend cache backends used by FrontendCachePurgeBackend, see the Wagtail frontend cache docs.
+# wagtail.contrib.frontend_cache is deliberately not installed: its app purges every published page
+# inline, on top of the batched purges of cms_app.purge
+WAGTAILFRONTENDCACHE = lsettings.get("WAGTAILFRONTENDCACHE", {})
+
+# Levels of pages below the site root included in the navigation API
+NAVIGATION_MAX_DEPTH = lsettings.get("NAVIGATION_MAX_DEPTH", 2)
+
+# Requests for a payload being built wait this many seconds for it before building it themselves
+# (see cms_app/cache.py)
+SINGLE_FLIGHT_WAIT = lsettings.get("SINGLE_FLIGHT_WAIT", 10)
+# Expiry of the shared cache lock, in case the worker holding it dies
+SINGLE_FLIGHT_LOCK_TIMEOUT = lsettings.get("SINGLE_FLIGHT_LOCK_TIMEOUT", 30)
+# Lock files of the workers when the cache backend can't lock atomically (file-based and dummy caches)
+LOCK_DIR = lsettings.get("LOCK_DIR", os.path.join(BASE_DIR, "locks"))
+
+# Cached API payloads (settings, navigation) are fresh for API_CACHE_TIMEOUT seconds, then served
+# stale for up to API_CACHE_MAX_STALE more while a background thread refreshes them
+API_CACHE_TIMEOUT = lsettings.get("API_CACHE_TIMEOUT", 60 * 5)
+API_CACHE_MAX_STALE = lsettings.get("API_CACHE_MAX_STALE", 60)
+API_CACHE_REFRESH_WORKERS = lsettings.get("API_CACHE_REFRESH_WORKERS", 2)
+# max-age of API responses in downstream caches, sent with stale-while-revalidate=API_CACHE_MAX_STALE
+API_CACHE_MAX_AGE = lsettings.get("API_CACHE_MAX_AGE", 60)
+
+# Warm-up of WSGI processes / uWSGI workers before their first request (see cms_app/warmup.py)
+WARMUP_ENABLED = lsettings.get("WARMUP_ENABLED", not DEBUG)
+# Also request the settings, navigation and home page API of every site (and WARMUP_URLS) in each
+# worker: after the fork under uWSGI, or from warm_up_worker() in another server's post-fork hook
+WARMUP_FETCH_PAYLOADS = lsettings.get("WARMUP_FETCH_PAYLOADS", True)
+WARMUP_URLS = lsettings.get("WARMUP_URLS", [])
+
+# Queries of a request taking longer than SLOW_QUERY_THRESHOLD milliseconds are stored with their
+# EXPLAIN plan and listed to superusers in the Django admin (see cms_app/slow_queries.py); 0 disables the log
+SLOW_QUERY_THRESHOLD = lsettings.get("SLOW_QUERY_THRESHOLD", 200)
+# The oldest slow queries are deleted beyond this many
+SLOW_QUERY_MAX_ROWS = lsettings.get("SLOW_QUERY_MAX_ROWS", 5000)
+
+# Cache for precomputed API data (navigation, ...); replaced by a DummyCache when DEBUG
+CACHES = lsettings.get("CACHES", {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    }
+})
+
 
 # ===================================================
 # Logging Settings
@@ -148,6 +234,8 @@ def skip_unreadable_post(record):
     """
     Used in the logging filters callback, to skip UnreadablePostError for the cancelled requests
     """
+    from django.http import UnreadablePostError
+
     if record.exc_info:
         _, exc_value = record.exc_info[:2]
         if isinstance(exc_value, UnreadablePostError):
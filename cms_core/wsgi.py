@@ -15,3 +15,8 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cms_core.settings')
 
 application = get_wsgi_application()
 
+# Warm the process up before its first request (see cms_app/warmup.py)
+from cms_app.warmup import register_warmup  # noqa: E402
+
+register_warmup()
+
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Test script for cached API payloads
+Checks single-flight builds within and across workers, stale-while-revalidate serving and invalidation
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import django
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cms_core.settings')
+django.setup()
+
+from django.core.cache import cache
+from django.test import override_settings
+from wagtail.models import Site
+from cms_app.cache import LOCK_KEY, acquire_lock, get_payload, make_envelope, single_flight
+from cms_app.locales import get_default_language
+from cms_app.navigation import CACHE_KEY, get_navigation, invalidate_navigation
+
+KEY = 'cms_app:test:payload'
+
+
+class Builder:
+    """Counts builds; each takes `delay` seconds and returns the build number"""
+
+    def __init__(self, delay=0.2, fail_first=False):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.builds = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.builds += 1
+            number = self.builds
+        time.sleep(self.delay)
+        if self.fail_first and number == 1:
+            raise RuntimeError('build failed')
+        return number
+
+
+def run_concurrently(function, count=8):
+    """Call `function` from `count` threads at once; returns their results (exceptions included)"""
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def call(index):
+        barrier.wait()
+        try:
+            results[index] = function()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_single_flight():
+    """Test concurrent callers share one build, and build themselves when the leader fails"""
+    print("🧪 Testing single-flight builds...")
+
+    build = Builder()
+    results = run_concurrently(lambda: single_flight(KEY, build))
+    assert build.builds == 1, f"expected 1 build, got {build.builds}"
+    assert results == [1] * 8, f"callers got different results: {results}"
+    print("✅ 8 concurrent callers, 1 build")
+
+    build = Builder(fail_first=True)
+    results = run_concurrently(lambda: single_flight(KEY, build))
+    failures = [result for result in results if isinstance(result, RuntimeError)]
+    assert len(failures) == 1, f"only the leader should fail: {results}"
+    assert all(isinstance(result, int) for result in results if result not in failures), f"unexpected: {results}"
+    print("✅ Followers of a failed leader build for themselves")
+
+
+def test_other_worker():
+    """Test a caller waits for the payload of a build holding the shared lock, and builds once it's gone"""
+    print("\n🧪 Testing builds across workers...")
+
+    # Another worker holds the lock while it builds
+    lock = acquire_lock(LOCK_KEY.format(key=KEY))
+    assert lock is not None, "lock already held"
+    threading.Timer(0.2, lambda: (cache.set(KEY, 'built elsewhere'), lock.release())).start()
+    build = Builder()
+    value = single_flight(KEY, build, lookup=lambda: cache.get(KEY))
+    assert value == 'built elsewhere' and build.builds == 0, f"built {build.builds} times, got {value!r}"
+    print("✅ Waited for the payload stored by the lock holder")
+
+    cache.delete(KEY)
+    lock = acquire_lock(LOCK_KEY.format(key=KEY))
+    threading.Timer(0.2, lock.release).start()
+    value = single_flight(KEY, build, lookup=lambda: cache.get(KEY))
+    assert value == 1 and build.builds == 1, "should build once the holder released without storing"
+    print("✅ Built once the holder released the lock without a payload")
+
+
+def test_stale_while_revalidate():
+    """Test fresh payloads are served, stale ones served while refreshed, expired ones rebuilt"""
+    print("\n🧪 Testing stale-while-revalidate...")
+
+    stored = {}
+
+    def store(envelope):
+        stored['envelope'] = envelope
+
+    def payload(build):
+        return get_payload(KEY, build, load=lambda: stored.get('envelope'), store=store)
+
+    build = Builder(delay=0.1)
+    assert payload(build) == 1 and build.builds == 1, "missing payload not built"
+    assert payload(build) == 1 and build.builds == 1, "fresh payload rebuilt"
+    print("✅ Missing payload built, then served from the cache")
+
+    # Aged out, but within API_CACHE_MAX_STALE
+    stored['envelope'] = dict(stored['envelope'], fresh_until=time.time() - 1)
+    start = time.monotonic()
+    assert payload(build) == 1, "stale payload not served"
+    assert time.monotonic() - start < build.delay, "request waited for the refresh"
+    deadline = time.monotonic() + 5
+    while stored['envelope']['value'] != 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert stored['envelope']['value'] == 2, "payload not refreshed in the background"
+    assert payload(build) == 2, "refreshed payload not served"
+    print("✅ Stale payload served at once and refreshed in the background")
+
+    # Past API_CACHE_MAX_STALE
+    expired = make_envelope('expired')
+    stored['envelope'] = dict(expired, fresh_until=time.time() - 10, stale_until=time.time() - 1)
+    assert payload(build) == 3, "expired payload served"
+    print("✅ Expired payload rebuilt before responding")
+
+
+def test_invalidation():
+    """Test a content change deletes the cached navigation instead of leaving it to be served stale"""
+    print("\n🧪 Testing invalidation...")
+
+    site = Site.objects.get(is_default_site=True)
+    language = get_default_language()
+    key = CACHE_KEY.format(site_id=site.pk, language=language)
+    get_navigation(site, language)
+    assert cache.get(key) is not None, "navigation not cached"
+
+    invalidate_navigation()
+    assert cache.get(key) is None, "navigation still cached after a change"
+    get_navigation(site, language)
+    assert cache.get(key) is not None, "navigation not cached again"
+    print("✅ Cached navigation deleted on change and rebuilt on the next request")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting cache tests...")
+
+    try:
+        with tempfile.TemporaryDirectory() as lock_dir:
+            with override_settings(LOCK_DIR=lock_dir, SINGLE_FLIGHT_WAIT=5):
+                test_single_flight()
+                test_other_worker()
+                test_stale_while_revalidate()
+                test_invalidation()
+        print("\n✅ All tests passed!")
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
+    finally:
+        cache.delete(KEY)
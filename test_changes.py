@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for the changes feed (delta sync)
+Appends change log entries in a transaction that is rolled back and pages through them with a cursor
+"""
+
+import os
+import sys
+import django
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cms_core.settings')
+django.setup()
+
+from django.db import transaction
+from django.test import Client, override_settings
+from wagtail.models import Site
+from cms_app.changes import get_changes
+from cms_app.models import ChangeLogEntry
+
+# Not a real site: entries recorded for it are rolled back
+OTHER_SITE_ID = 999999
+
+
+class Rollback(Exception):
+    pass
+
+
+def add_entries(site):
+    """Append test entries, returning the cursor before them"""
+    cursor = ChangeLogEntry.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    for object_type, object_id, action, site_id in [
+        ('page', 900001, 'updated', site.pk),
+        ('page', 900002, 'created', site.pk),
+        ('settings', OTHER_SITE_ID, 'updated', OTHER_SITE_ID),
+        ('page', 900001, 'unpublished', site.pk),
+        ('image', 900003, 'deleted', None),
+    ]:
+        ChangeLogEntry.objects.create(object_type=object_type, object_id=object_id, action=action, site_id=site_id)
+    return cursor
+
+
+def summary(changes):
+    return [(change['object_type'], change['object_id'], change['action']) for change in changes]
+
+
+def test_cursor():
+    """Test changes are paged with a cursor, filtered by site and reduced to the latest per object"""
+    print("🧪 Testing the change cursor...")
+
+    site = Site.objects.get(is_default_site=True)
+    try:
+        with transaction.atomic():
+            cursor = add_entries(site)
+
+            changes, next_cursor, has_more = get_changes(cursor, 10, site=site)
+            assert summary(changes) == [
+                ('page', 900002, 'created'),
+                ('page', 900001, 'unpublished'),
+                ('image', 900003, 'deleted'),
+            ], f"unexpected changes: {summary(changes)}"
+            assert not has_more and next_cursor == ChangeLogEntry.objects.latest('pk').pk, "cursor not advanced"
+            assert changes[1]['detail_url'] is None, "unpublished pages have nothing to fetch"
+            print("✅ Latest change per object, other sites left out, shared media kept")
+
+            seen = []
+            while True:
+                changes, cursor, has_more = get_changes(cursor, 2, site=site)
+                seen += summary(changes)
+                if not has_more:
+                    break
+            assert ('image', 900003, 'deleted') in seen and len(seen) == 4, f"unexpected pages: {seen}"
+            assert get_changes(cursor, 2, site=site) == ([], cursor, False), "changes repeated after the end"
+            print("✅ Paging with the cursor reaches every change once")
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def test_settling():
+    """Test entries younger than CHANGE_LOG_SETTLE_SECONDS are held back"""
+    print("\n🧪 Testing settling...")
+
+    site = Site.objects.get(is_default_site=True)
+    try:
+        with transaction.atomic():
+            cursor = add_entries(site)
+            with override_settings(CHANGE_LOG_SETTLE_SECONDS=60):
+                assert get_changes(cursor, 10, site=site) == ([], cursor, False), "unsettled entries returned"
+            print("✅ Recent entries held back, cursor unchanged")
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def test_api():
+    """Test the changes endpoint and its parameter validation"""
+    print("\n🧪 Testing the changes API...")
+
+    site = Site.objects.get(is_default_site=True)
+    client = Client(HTTP_HOST=site.hostname)
+    try:
+        with transaction.atomic():
+            cursor = add_entries(site)
+            data = client.get('/api/v2/changes/', {'since': cursor, 'limit': 0}).json()
+            assert len(data['changes']) == 1 and data['has_more'], f"limit not clamped to 1: {data}"
+
+            data = client.get('/api/v2/changes/', {'since': cursor}).json()
+            assert summary(data['changes'])[-1] == ('image', 900003, 'deleted'), f"unexpected feed: {data}"
+            assert client.get('/api/v2/changes/', {'since': data['cursor']}).json()['changes'] == []
+            print("✅ Feed served from the cursor, limit clamped")
+
+            for params in ({'since': 'yesterday'}, {'limit': 'all'}):
+                status = client.get('/api/v2/changes/', params).status_code
+                assert status == 400, f"{params} gave HTTP {status}, expected 400"
+            print("✅ Invalid parameters rejected")
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == "__main__":
+    print("🚀 Starting changes feed tests...")
+
+    try:
+        with override_settings(CHANGE_LOG_SETTLE_SECONDS=0):
+            test_cursor()
+            test_settling()
+            test_api()
+        print("\n✅ All tests passed!")
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
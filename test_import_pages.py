@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test script for the JSON lines page import
+Runs import_pages in a transaction that is rolled back and checks the pages, their publish effects and validation
+"""
+
+import json
+import os
+import sys
+import tempfile
+import django
+from io import StringIO
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cms_core.settings')
+django.setup()
+
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from wagtail.models import Page, Site
+from cms_app.models import ChangeLogEntry, EventIndexEntry, EventsPage, FlexiblePage
+from cms_app.purge import LocalPurgeBackend
+
+
+class Rollback(Exception):
+    pass
+
+
+def write_specs(specs):
+    """A JSON lines file of page specs; removed by the caller"""
+    fp = tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False, encoding='utf-8')
+    with fp:
+        for spec in specs:
+            fp.write((spec if isinstance(spec, str) else json.dumps(spec)) + '\n')
+    return fp.name
+
+
+def import_pages(specs, *args):
+    """Run import_pages on the specs and the on-commit handlers it registers; returns its output"""
+    path = write_specs(specs)
+    out = StringIO()
+    try:
+        with TestCase.captureOnCommitCallbacks(execute=True):
+            call_command('import_pages', path, *args, stdout=out)
+    finally:
+        os.remove(path)
+    return out.getvalue()
+
+
+def site_root():
+    return Site.objects.get(is_default_site=True).root_page
+
+
+def valid_specs():
+    root = site_root()
+    return [
+        {'type': 'cms_app.FlexiblePage', 'parent': root.pk, 'key': 'season', 'title': 'Import test season'},
+        {'type': 'cms_app.EventsPage', 'parent': 'season', 'title': 'Import test events', 'body': [
+            {'type': 'events', 'value': [{'title': 'Finals', 'date': '2025-09-20'}]},
+        ]},
+        {'type': 'cms_app.FlexiblePage', 'parent': root.url_path, 'title': 'Import test draft', 'publish': False},
+    ]
+
+
+def test_import():
+    """Test pages are created in batches under keyed, ID and URL path parents with their publish effects"""
+    print("🧪 Testing an import...")
+
+    try:
+        with transaction.atomic():
+            cursor = ChangeLogEntry.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+            LocalPurgeBackend.reset()
+            output = import_pages(valid_specs(), '--batch-size', '2')
+            assert 'Imported 3 pages (0 skipped)' in output, f"unexpected output:\n{output}"
+
+            season = FlexiblePage.objects.get(slug='import-test-season')
+            events = EventsPage.objects.get(slug='import-test-events')
+            draft = FlexiblePage.objects.get(slug='import-test-draft')
+            assert events.get_parent().pk == season.pk, "keyed parent not used"
+            assert draft.get_parent().pk == site_root().pk, "URL path parent not used"
+            assert season.live and events.live and not draft.live, "publish flags not applied"
+            assert draft.get_latest_revision() is not None, "draft has no revision"
+            print("✅ Pages created under their parents, drafts left unpublished")
+
+            assert EventIndexEntry.objects.filter(page_id=events.pk, title='Finals').exists(), "events not projected"
+            published = set(
+                ChangeLogEntry.objects.filter(pk__gt=cursor, object_type='page').values_list('object_id', flat=True)
+            )
+            assert published == {season.pk, events.pk}, f"unexpected change log: {published}"
+            assert LocalPurgeBackend.batches, "nothing purged"
+            print("✅ Projections, change log and purges applied to the published pages")
+
+            output = import_pages(valid_specs())
+            assert 'Imported 0 pages (3 skipped)' in output, f"re-import should skip existing pages:\n{output}"
+            print("✅ Re-importing skips the existing pages")
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def test_validation():
+    """Test invalid lines stop the import, unless --skip-invalid is given"""
+    print("\n🧪 Testing validation...")
+
+    root = site_root()
+    specs = valid_specs() + [
+        {'type': 'cms_app.NoSuchPage', 'parent': root.pk, 'title': 'Unknown type'},
+        {'type': 'cms_app.FlexiblePage', 'parent': root.pk, 'title': 'Unknown field', 'colour': 'red'},
+        {'type': 'cms_app.FlexiblePage', 'parent': '/no/such/page/', 'title': 'Unknown parent'},
+        {'type': 'cms_app.EventsPage', 'parent': root.pk, 'title': 'Invalid body', 'body': [
+            {'type': 'events', 'value': [{'date': '2025-09-20'}]},
+        ]},
+        # Not creatable anywhere, under an existing page or an imported one
+        {'type': 'wagtailcore.Page', 'parent': root.pk, 'title': 'Not creatable'},
+        {'type': 'wagtailcore.Page', 'parent': 'season', 'title': 'Not creatable under a key'},
+    ]
+
+    try:
+        with transaction.atomic():
+            try:
+                import_pages(specs)
+            except CommandError as e:
+                assert '6 invalid lines' in str(e), f"unexpected error: {e}"
+            else:
+                raise AssertionError("invalid lines were imported")
+            assert not Page.objects.filter(slug__startswith='import-test').exists(), "pages created despite errors"
+            print("✅ Unknown types, fields and parents, invalid blocks and disallowed types rejected")
+
+            output = import_pages(specs, '--skip-invalid')
+            assert 'Imported 3 pages (0 skipped)' in output, f"valid lines not imported:\n{output}"
+            assert 'cannot be created under' in output, f"disallowed page type not reported:\n{output}"
+            print("✅ --skip-invalid imports the valid lines")
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == "__main__":
+    print("🚀 Starting page import tests...")
+
+    try:
+        with override_settings(CDN_PURGE_BACKEND='cms_app.purge.LocalPurgeBackend'):
+            test_import()
+            test_validation()
+        print("\n✅ All tests passed!")
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script for the page tree checker
+Corrupts the tree in a transaction that is rolled back and checks check_page_tree finds and repairs it
+"""
+
+import os
+import sys
+import django
+from io import StringIO
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cms_core.settings')
+django.setup()
+
+from django.core.management import call_command
+from django.db import transaction
+from wagtail.models import Page
+
+
+class Rollback(Exception):
+    pass
+
+
+def check_tree(*args):
+    """Output of check_page_tree, reading two pages per query so the walk spans chunks"""
+    out = StringIO()
+    call_command('check_page_tree', '--chunk-size', '2', *args, stdout=out)
+    return out.getvalue()
+
+
+def leaf_page():
+    page = Page.objects.filter(depth__gt=2, numchild=0).order_by('path').first()
+    assert page is not None, "expected a page below a site root"
+    return page
+
+
+def test_healthy_tree():
+    """Test the current tree is reported clean"""
+    print("🧪 Testing a healthy tree...")
+
+    output = check_tree()
+    assert 'No problems found' in output, f"unexpected problems:\n{output}"
+    print(f"✅ {output.strip().splitlines()[-1]}")
+
+
+def test_depth_and_numchild():
+    """Test wrong depth and numchild values are reported, and fixed with --repair"""
+    print("\n🧪 Testing depth and numchild problems...")
+
+    try:
+        with transaction.atomic():
+            page = leaf_page()
+            parent = page.get_parent()
+            Page.objects.filter(pk=page.pk).update(depth=page.depth + 3)
+            Page.objects.filter(pk=parent.pk).update(numchild=parent.numchild + 5)
+
+            output = check_tree()
+            assert f'[depth] page {page.pk}' in output, f"depth problem not reported:\n{output}"
+            assert f'[numchild] page {parent.pk}' in output, f"numchild problem not reported:\n{output}"
+            assert Page.objects.get(pk=page.pk).depth == page.depth + 3, "repaired without --repair"
+            print("✅ Both problems reported, nothing changed without --repair")
+
+            output = check_tree('--repair')
+            assert 'repaired 2' in output, f"expected 2 repairs:\n{output}"
+            assert Page.objects.get(pk=page.pk).depth == page.depth, "depth not repaired"
+            assert Page.objects.get(pk=parent.pk).numchild == parent.numchild, "numchild not repaired"
+            assert 'No problems found' in check_tree(), "problems left after --repair"
+            print("✅ Repaired, and the tree checks clean again")
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def test_orphan():
+    """Test a page whose parent path doesn't exist is reported and left alone"""
+    print("\n🧪 Testing orphaned pages...")
+
+    try:
+        with transaction.atomic():
+            page = leaf_page()
+            orphan_path = page.path[:Page.steplen] + 'ZZZZ' + page.path[-Page.steplen:]
+            Page.objects.filter(pk=page.pk).update(path=orphan_path)
+
+            output = check_tree('--repair')
+            assert f'[orphan] page {page.pk}' in output, f"orphan not reported:\n{output}"
+            assert 'need manual attention' in output, f"orphan should be left for manual repair:\n{output}"
+            assert Page.objects.get(pk=page.pk).path == orphan_path, "orphan path changed"
+            print("✅ Orphan reported and left for manual repair")
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == "__main__":
+    print("🚀 Starting page tree tests...")
+
+    try:
+        test_healthy_tree()
+        test_depth_and_numchild()
+        test_orphan()
+        print("\n✅ All tests passed!")
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Test script for publish-time projections
+Publishes pages in a transaction that is rolled back and checks the event and rule indexes and their API
+"""
+
+import json
+import os
+import sys
+import django
+from datetime import date, time
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cms_core.settings')
+django.setup()
+
+from django.db import connection, transaction
+from django.test import Client, TestCase, override_settings
+from wagtail.images import get_image_model
+from wagtail.models import Site
+from cms_app.models import EventIndexEntry, EventsPage, HomePage, RuleIndexEntry
+from cms_app.projections import parse_event_date, parse_event_time, project_page
+
+
+class Rollback(Exception):
+    pass
+
+
+def stream(*blocks):
+    """Raw body JSON for ``(block type, list items)`` pairs, as the database stores it"""
+    return json.dumps([
+        {'type': block_type, 'id': f'{block_type}-block', 'value': [
+            {'type': 'item', 'id': f'{block_type}-{number}', 'value': value}
+            for number, value in enumerate(items, start=1)
+        ]}
+        for block_type, items in blocks
+    ])
+
+
+def publish(page):
+    """Publish a new page under the default site's root, running the on-commit handlers"""
+    root = Site.objects.get(is_default_site=True).root_page
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        root.add_child(instance=page)
+        page.save_revision().publish()
+    return page
+
+
+def api_client():
+    return Client(HTTP_HOST=Site.objects.get(is_default_site=True).hostname)
+
+
+def titles(response):
+    assert response.status_code == 200, f"HTTP {response.status_code}: {response.content[:200]}"
+    return [item['title'] for item in response.json()['results']]
+
+
+def test_event_dates():
+    """Test free-text event dates and times are normalized, and incomplete ones dropped"""
+    print("🧪 Testing event dates...")
+
+    assert parse_event_date('2025-03-15') == date(2025, 3, 15), "ISO date not parsed"
+    assert parse_event_date('March 15, 2025') == date(2025, 3, 15), "written date not parsed"
+    for text in ('March 15', '2024', 'Coming soon', ''):
+        assert parse_event_date(text) is None, f"{text!r} should not give a date"
+    print("✅ Complete dates parsed, partial ones left empty")
+
+    assert parse_event_time('9:00 AM - 5:00 PM') == time(9, 0), "start time not parsed"
+    assert parse_event_time('14:30') == time(14, 30), "24-hour time not parsed"
+    assert parse_event_time('All day') is None, "text without a time should not give one"
+    print("✅ Start times parsed from free text")
+
+
+def test_events():
+    """Test events are indexed on publish, served by the events API and cleared on unpublish"""
+    print("\n🧪 Testing the event index...")
+
+    try:
+        with transaction.atomic():
+            page = publish(HomePage(title='Projection test', slug='projection-test-events', body=stream(
+                ('event_details', [{
+                    'title': 'Finals', 'date': 'September 20, 2025', 'time': '2:00 PM - 6:00 PM',
+                    'location': 'Beirut', 'participants': '40 teams', 'description': '',
+                    'status': 'Registration Open', 'button_link': 'https://example.com/finals',
+                }]),
+                ('events', [{'title': 'Qualifiers', 'date': '2025-06-01', 'location': 'Tripoli'}]),
+            )))
+
+            finals = EventIndexEntry.objects.get(page_id=page.pk, title='Finals')
+            assert (finals.date, finals.time) == (date(2025, 9, 20), time(14, 0)), "event date not normalized"
+            assert finals.link == 'https://example.com/finals', "button link not indexed"
+            print("✅ Both event blocks indexed, with normalized dates")
+
+            client = api_client()
+            assert titles(client.get('/api/v2/events/', {'page_id': page.pk})) == ['Qualifiers', 'Finals']
+            assert titles(client.get('/api/v2/events/', {'page_id': page.pk, 'ordering': '-date'})) == [
+                'Finals', 'Qualifiers',
+            ]
+            assert titles(client.get('/api/v2/events/', {'page_id': page.pk, 'from': '2025-07-01'})) == ['Finals']
+            assert titles(client.get('/api/v2/events/', {'page_id': page.pk, 'location': 'Tripoli'})) == [
+                'Qualifiers',
+            ]
+            print("✅ Events API orders and filters the index")
+
+            for params in ({'from': 'June'}, {'page_id': 'home'}, {'ordering': 'location'}):
+                status = client.get('/api/v2/events/', params).status_code
+                assert status == 400, f"{params} gave HTTP {status}, expected 400"
+            print("✅ Invalid parameters rejected")
+
+            with TestCase.captureOnCommitCallbacks(execute=True):
+                page.unpublish()
+            assert not EventIndexEntry.objects.filter(page_id=page.pk).exists(), "events kept after unpublish"
+            print("✅ Events removed once the page is unpublished")
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def test_rules():
+    """Test rules are indexed per category and served by the rules API"""
+    print("\n🧪 Testing the rule index...")
+
+    try:
+        with transaction.atomic():
+            page = publish(HomePage(title='Projection test', slug='projection-test-rules', body=stream(
+                ('rule_categories', [{
+                    'title': 'Robot Design', 'description': 'Size and weight', 'icon_name': 'Settings',
+                    'rules': [
+                        {'type': 'item', 'id': 'size', 'value': 'Max 30 cm'},
+                        {'type': 'item', 'id': 'weight', 'value': 'Max 1 kg'},
+                    ],
+                }]),
+                ('general_rules', ['Be on time', 'Respect the judges']),
+                ('rules', [{'rule_number': '7', 'title': 'Safety', 'description': '<p>No lasers</p>'}]),
+            )))
+
+            rows = list(RuleIndexEntry.objects.filter(page_id=page.pk).order_by('position').values_list(
+                'category', 'rule_number', 'title',
+            ))
+            assert rows == [
+                ('robot-design', '1', 'Max 30 cm'),
+                ('robot-design', '2', 'Max 1 kg'),
+                ('general', '1', 'Be on time'),
+                ('general', '2', 'Respect the judges'),
+                ('', '7', 'Safety'),
+            ], f"unexpected rule rows: {rows}"
+            print("✅ Categorized, general and plain rules indexed and numbered")
+
+            client = api_client()
+            category = client.get('/api/v2/rules/categories/robot-design/', {'page_id': page.pk}).json()
+            assert category['title'] == 'Robot Design', f"unexpected category: {category}"
+            assert [rule['title'] for rule in category['rules']] == ['Max 30 cm', 'Max 1 kg']
+            general = titles(client.get('/api/v2/rules/', {'page_id': page.pk, 'category': 'general'}))
+            assert general == ['Be on time', 'Respect the judges'], f"unexpected general rules: {general}"
+            rule = client.get('/api/v2/rules/7/', {'page_id': page.pk}).json()
+            assert rule['description'] == '<p>No lasers</p>', f"unexpected rule: {rule}"
+            print("✅ Rules API serves categories, lists and single rules")
+
+            missing = client.get('/api/v2/rules/categories/no-such-category/', {'page_id': page.pk})
+            assert missing.status_code == 404, f"missing category gave HTTP {missing.status_code}"
+            print("✅ Unknown categories give 404")
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def check_event_without_image(page):
+    entries = list(EventIndexEntry.objects.filter(page_id=page.pk))
+    assert len(entries) == 1, f"expected 1 indexed event, got {len(entries)}"
+    assert entries[0].image_id is None, f"kept the id of deleted image {entries[0].image_id}"
+    # Foreign keys are only checked at commit: check them now
+    connection.check_constraints(table_names=[EventIndexEntry._meta.db_table])
+
+
+def test_deleted_image():
+    """Test an event pointing at a deleted image is indexed without it"""
+    print("\n🧪 Testing events with a deleted image...")
+
+    try:
+        with transaction.atomic():
+            image = get_image_model().objects.create(
+                title='Deleted', file='original_images/deleted.png', width=1, height=1,
+            )
+            image_id = image.pk
+            image.delete()
+
+            # Raw JSON, as stored once the image is gone
+            page = publish(EventsPage(title='Projection test', slug='projection-test-deleted-image', body=stream(
+                ('events', [{'title': 'Open day', 'date': '2025-06-01', 'image': image_id}]),
+            )))
+            check_event_without_image(page)
+            print("✅ Event indexed on publish, without the deleted image")
+
+            # As rebuild_projections --only events does, from the raw JSON of the page
+            counts = project_page(EventsPage.objects.get(pk=page.pk), only=['events'])
+            assert counts == {'events': 1}, f"projection failed: {counts}"
+            check_event_without_image(page)
+            print("✅ Event reindexed from the stored JSON, without the deleted image")
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == "__main__":
+    print("🚀 Starting projection tests...")
+
+    try:
+        with override_settings(CDN_PURGE_BACKEND='cms_app.purge.LocalPurgeBackend'):
+            test_event_dates()
+            test_events()
+            test_rules()
+            test_deleted_image()
+        print("\n✅ All tests passed!")
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script for revision pruning
+Builds a page history in a transaction that is rolled back and checks which revisions prune_revisions keeps
+"""
+
+import os
+import sys
+import django
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cms_core.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+from wagtail.models import Comment, Revision, Site
+from cms_app.models import FlexiblePage
+
+
+class Rollback(Exception):
+    pass
+
+
+def build_history():
+    """
+    A page with 10 revisions: the first published, a comment made on the 3rd,
+    the 4th scheduled, and drafts after that. Returns (page, revisions).
+    """
+    root = Site.objects.get(is_default_site=True).root_page
+    page = FlexiblePage(title='Prune test', slug='prune-test', body='[]')
+    root.add_child(instance=page)
+
+    revisions = []
+    for number in range(1, 11):
+        page.title = f'Prune test {number}'
+        revision = page.save_revision(log_action=True)
+        if number == 1:
+            revision.publish()
+            page.refresh_from_db()
+        revisions.append(revision)
+
+    user = get_user_model().objects.create(username='prune-test-editor')
+    Comment.objects.create(
+        page=page, user=user, text='Check this title', contentpath='title', revision_created=revisions[2],
+    )
+    Revision.objects.filter(pk=revisions[3].pk).update(approved_go_live_at=timezone.now() + timedelta(days=1))
+    return page, revisions
+
+
+def prune(*args):
+    out = StringIO()
+    call_command('prune_revisions', '--keep', '3', '--batch-size', '2', *args, stdout=out)
+    return out.getvalue()
+
+
+def remaining(page):
+    return set(Revision.page_revisions.filter(object_id=str(page.pk)).values_list('pk', flat=True))
+
+
+def test_prune():
+    """Test old drafts are deleted and recent, published, scheduled and commented revisions kept"""
+    print("🧪 Testing revision pruning...")
+
+    try:
+        with transaction.atomic():
+            page, revisions = build_history()
+            all_ids = {revision.pk for revision in revisions}
+
+            output = prune('--dry-run')
+            assert remaining(page) == all_ids, "revisions deleted in a dry run"
+            assert 'Would delete' in output, f"unexpected output:\n{output}"
+            print("✅ Dry run deletes nothing")
+
+            output = prune()
+            # 1 published (and live), 3 commented on, 4 scheduled, 8-10 the most recent
+            kept = {revisions[number - 1].pk for number in (1, 3, 4, 8, 9, 10)}
+            assert remaining(page) == kept, (
+                f"kept revisions {sorted(remaining(page))}, expected {sorted(kept)}"
+            )
+            print("✅ Drafts 2, 5, 6 and 7 deleted; published, scheduled, commented and recent ones kept")
+
+            assert Comment.objects.filter(page=page, revision_created=revisions[2]).exists(), "comment deleted"
+            # Other pages of the database may add to the counts
+            assert 'comments made on them' in output, f"kept comment revisions not reported:\n{output}"
+            print("✅ The comment and its revision survive")
+
+            page.refresh_from_db()
+            assert page.live_revision_id == revisions[0].pk, "live revision changed"
+            assert page.latest_revision_id == revisions[-1].pk, "latest revision changed"
+            print("✅ Live and latest revisions untouched")
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == "__main__":
+    print("🚀 Starting revision pruning tests...")
+
+    try:
+        with override_settings(CDN_PURGE_BACKEND='cms_app.purge.LocalPurgeBackend'):
+            test_prune()
+        print("\n✅ All tests passed!")
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for CDN purges
+Checks dependency tracking and that purges are coalesced into batches, using the local purge backend
+"""
+
+import os
+import sys
+import django
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cms_core.settings')
+django.setup()
+
+from django.db import transaction
+from django.test import override_settings
+from wagtail.images import get_image_model
+from cms_app.models import SiteSettings
+from cms_app.purge import (
+    SETTINGS, LocalPurgeBackend, flush_purges, get_dependents, purge_urls, record_dependencies,
+)
+
+# Not a real site: dependencies recorded for it are rolled back
+TEST_SITE_ID = 999999
+
+
+class Rollback(Exception):
+    pass
+
+
+def test_coalescing():
+    """Test URLs queued in one transaction are purged once, in batches"""
+    print("🧪 Testing coalesced purges...")
+
+    LocalPurgeBackend.reset()
+    with transaction.atomic():
+        purge_urls(['https://example.com/a/', 'https://example.com/b/'])
+        purge_urls(['https://example.com/b/', 'https://example.com/c/'])
+        assert LocalPurgeBackend.batches == [], "purged before the transaction committed"
+
+    assert LocalPurgeBackend.batches == [
+        ['https://example.com/a/', 'https://example.com/b/'],
+        ['https://example.com/c/'],
+    ], f"unexpected batches: {LocalPurgeBackend.batches}"
+    print("✅ 4 queued URLs purged as 3 unique URLs in batches of 2")
+
+    LocalPurgeBackend.reset()
+    flush_purges()
+    assert LocalPurgeBackend.batches == [], "nothing should be left to purge"
+    print("✅ Nothing left queued after the flush")
+
+
+def test_dependencies():
+    """Test the images referenced by site settings are recorded"""
+    print("\n🧪 Testing dependency tracking...")
+
+    image = get_image_model().objects.first()
+    if image is None:
+        print("⚠️  No images in the database, skipped")
+        return
+
+    try:
+        with transaction.atomic():
+            count = record_dependencies(SETTINGS, TEST_SITE_ID, SiteSettings(site_logo=image))
+            assert count == 1, f"expected 1 reference, got {count}"
+            assert (SETTINGS, TEST_SITE_ID) in get_dependents('image', image.pk), "dependency not recorded"
+            print(f"✅ Site logo recorded as a dependency on image {image.pk}")
+
+            record_dependencies(SETTINGS, TEST_SITE_ID, SiteSettings())
+            assert (SETTINGS, TEST_SITE_ID) not in get_dependents('image', image.pk), "stale dependency kept"
+            print("✅ Dependency dropped once the logo is removed")
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == "__main__":
+    print("🚀 Starting purge tests...")
+
+    try:
+        with override_settings(CDN_PURGE_BACKEND='cms_app.purge.LocalPurgeBackend', CDN_PURGE_BATCH_SIZE=2):
+            test_coalescing()
+            test_dependencies()
+        print("\n✅ All tests passed!")
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
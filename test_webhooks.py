@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test script for webhook delivery
+Sends signed batches to a local HTTP stand-in and checks signatures and retries
+"""
+
+import json
+import os
+import sys
+import threading
+import django
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cms_core.settings')
+django.setup()
+
+from cms_app.webhooks import SIGNATURE_HEADER, as_event, send_batch, sign, verify_signature
+
+SECRET = 'test-secret'
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Records deliveries; fails the first `failures` requests with `status`"""
+    received = []
+    failures = 0
+    status = 503
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        StandIn.received.append((self.headers.get(SIGNATURE_HEADER), body))
+        if StandIn.failures > 0:
+            StandIn.failures -= 1
+            self.send_response(StandIn.status)
+        else:
+            self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stand_in():
+    server = HTTPServer(('127.0.0.1', 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/hook'
+
+
+def reset(failures=0, status=503):
+    StandIn.received = []
+    StandIn.failures = failures
+    StandIn.status = status
+
+
+def test_signature():
+    """Test signing and verification"""
+    print("🧪 Testing signatures...")
+
+    body = b'{"events": []}'
+    header = sign(SECRET, body)
+    assert verify_signature(SECRET, header, body), "valid signature rejected"
+    assert not verify_signature('other-secret', header, body), "wrong secret accepted"
+    assert not verify_signature(SECRET, header, body + b' '), "modified body accepted"
+    assert not verify_signature(SECRET, sign(SECRET, body, timestamp=1), body), "old timestamp accepted"
+    print("✅ Signatures verified")
+
+
+def test_delivery(url):
+    """Test a signed batch is delivered as JSON"""
+    print("\n🧪 Testing delivery...")
+
+    reset()
+    payload = {'cursor': 2, 'events': [{'cursor': 2, 'event': 'publish', 'page_id': 3}]}
+    ok, error = send_batch(url, SECRET, payload, retry_delay=0)
+    assert ok, f"delivery failed: {error}"
+    assert len(StandIn.received) == 1, "expected exactly one request"
+
+    header, body = StandIn.received[0]
+    assert verify_signature(SECRET, header, body), "stand-in received a bad signature"
+    assert json.loads(body) == payload, "payload changed in transit"
+    print("✅ Batch delivered and signature verified by the stand-in")
+
+
+def test_retries(url):
+    """Test server errors are retried and client errors aren't"""
+    print("\n🧪 Testing retries...")
+
+    reset(failures=2, status=503)
+    ok, error = send_batch(url, SECRET, {'events': []}, max_retries=3, retry_delay=0)
+    assert ok and len(StandIn.received) == 3, f"expected success on the 3rd attempt, got {len(StandIn.received)}"
+    print("✅ Delivered after 2 server errors")
+
+    reset(failures=10, status=503)
+    ok, error = send_batch(url, SECRET, {'events': []}, max_retries=2, retry_delay=0)
+    assert not ok and error == 'HTTP 503' and len(StandIn.received) == 3, "expected 3 failed attempts"
+    print("✅ Gave up after the maximum number of retries")
+
+    reset(failures=1, status=400)
+    ok, error = send_batch(url, SECRET, {'events': []}, max_retries=3, retry_delay=0)
+    assert not ok and len(StandIn.received) == 1, "client errors must not be retried"
+    print("✅ Client errors are not retried")
+
+    server_down_ok, error = send_batch('http://127.0.0.1:9/hook', SECRET, {}, max_retries=1, retry_delay=0, timeout=1)
+    assert not server_down_ok and error, "expected a connection error"
+    print(f"✅ Connection errors reported: {error}")
+
+
+def test_events():
+    """Test change log entries are mapped to events"""
+    print("\n🧪 Testing event mapping...")
+
+    change = {
+        'cursor': 5, 'object_type': 'page', 'object_id': 3, 'action': 'deleted',
+        'url': '/events/', 'detail_url': None, 'timestamp': '2025-01-01T00:00:00+00:00',
+    }
+    assert as_event(change)['event'] == 'unpublish'
+    assert as_event(dict(change, object_type='image', action='updated')) is None
+    print("✅ Change log entries mapped to events")
+
+
+if __name__ == "__main__":
+    print("🚀 Starting webhook tests...")
+
+    server, url = start_stand_in()
+    try:
+        test_signature()
+        test_delivery(url)
+        test_retries(url)
+        test_events()
+        print("\n✅ All tests passed!")
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
+    finally:
+        server.shutdown()